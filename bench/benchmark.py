@@ -0,0 +1,184 @@
+"""Benchmark do motor de envio contra um servidor SMTP falso local.
+
+Gera listas sintéticas de destinatários, envia com o motor real (threads ou
+asyncio) e mede mensagens por segundo, latência por mensagem (p50/p99 do
+DATA) e pico de memória. Cada cenário roda num processo próprio, para que
+o pico de memória de um não contamine o seguinte.
+
+Exemplos:
+    python bench/benchmark.py                      # 1k, 10k e 100k, os dois motores
+    python bench/benchmark.py -n 10000 --motor asyncio --conexoes 32 --latencia 20
+    python bench/benchmark.py -n 1000 --anexos misto --queda 0.01 --saida bench_output.txt
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from servidor_smtp import ServidorSMTPFalso  # noqa: E402
+
+
+DOMINIOS = 50
+
+# Tamanhos (KB) dos anexos de cada mistura; o "grande" passa do limite de streaming
+ANEXOS = {
+    'nenhum': {},
+    'pequeno': {'pequeno': 100},
+    'misto': {'pequeno': 100, 'medio': 2 * 1024, 'grande': 12 * 1024},
+}
+
+
+def criar_anexos(pasta, mistura):
+    caminhos = {}
+    for nome, tamanho_kb in ANEXOS[mistura].items():
+        caminho = os.path.join(pasta, f"{nome}.bin")
+        with open(caminho, 'wb') as f:
+            f.write(os.urandom(tamanho_kb * 1024))
+        caminhos[nome] = caminho
+    return caminhos
+
+
+def criar_lista(quantidade, anexos):
+    """Lista sintética: domínios alternados e, na mistura, 1 em 10 com anexo médio e 1 em 100 com o grande"""
+    from contatos import ListaDestinatarios
+
+    lista = ListaDestinatarios()
+    for i in range(quantidade):
+        arquivos = []
+        if 'pequeno' in anexos:
+            arquivos.append(anexos['pequeno'])
+        if 'medio' in anexos and i % 10 == 0:
+            arquivos.append(anexos['medio'])
+        if 'grande' in anexos and i % 100 == 0:
+            arquivos.append(anexos['grande'])
+        lista.adicionar(f"Pessoa {i}", f"pessoa{i}@dominio{i % DOMINIOS}.exemplo", arquivos,
+                        {'codigo': str(i)})
+    return lista
+
+
+def rodar_cenario(cenario):
+    """Executa um cenário no processo atual e retorna o resultado"""
+    from limitador import LimitadorTaxa
+    from motor_envio import criar_motor
+
+    servidor = ServidorSMTPFalso(
+        latencia=cenario['latencia'] / 1000.0,
+        prob_limitacao=cenario['limitacao'],
+        prob_queda=cenario['queda'],
+        pipelining=not cenario['sem_pipelining'],
+        semente=1,
+    )
+    porta = servidor.iniciar()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        lista = criar_lista(cenario['destinatarios'], criar_anexos(pasta, cenario['anexos']))
+        motor = criar_motor(
+            lista, '127.0.0.1', porta, 'bench@exemplo', 'senha',
+            'Benchmark' if cenario['lote'] > 1 else 'Benchmark %(codigo)s',
+            "Olá,\n\nMensagem de teste do benchmark.\n" * 20,
+            motor=cenario['motor'],
+            conexoes=cenario['conexoes'],
+            limitador=LimitadorTaxa(pausa_limitacao=0.5),
+            diario=os.path.join(pasta, 'envios.db') if cenario['diario'] else '',
+            destinatarios_por_envio=cenario['lote'],
+            relatorio_metricas='',
+            seguranca='nenhuma',
+            ao_log=lambda mensagem: None,
+        )
+
+        inicio = time.perf_counter()
+        ok = motor.executar()
+        decorrido = time.perf_counter() - inicio
+
+    servidor.parar()
+    resumo = motor.metricas.resumo()
+    contadores = resumo['contadores']
+    # p50/p99 do DATA vêm do histograma das métricas (limite superior do intervalo)
+    envio = resumo['fases']['envio']
+    return dict(
+        cenario,
+        ok=ok,
+        segundos=round(decorrido, 3),
+        enviados=contadores.get('enviados', 0),
+        falhas=contadores.get('falhas', 0),
+        reenvios=contadores.get('reenvios', 0),
+        msg_por_s=round(contadores.get('enviados', 0) / decorrido, 1) if decorrido else 0.0,
+        p50_ms=round(envio['p50_s'] * 1000, 2),
+        p99_ms=round(envio['p99_s'] * 1000, 2),
+        # ru_maxrss é em KB no Linux (e em bytes no macOS)
+        pico_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        servidor_mensagens=servidor.mensagens,
+        servidor_mb=round(servidor.bytes / 1024 / 1024, 1),
+    )
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Benchmark do motor de envio com servidor SMTP falso")
+    parser.add_argument('-n', '--destinatarios', type=int, action='append',
+                        help="tamanho da lista (pode repetir; padrão: 1000, 10000 e 100000)")
+    parser.add_argument('--motor', choices=['threads', 'asyncio', 'ambos'], default='ambos')
+    parser.add_argument('--conexoes', type=int, default=8)
+    parser.add_argument('--anexos', choices=sorted(ANEXOS), default='nenhum', help="mistura de anexos")
+    parser.add_argument('--latencia', type=float, default=0.0, help="atraso (ms) do servidor em cada DATA")
+    parser.add_argument('--limitacao', type=float, default=0.0,
+                        help="probabilidade de responder 421 a um RCPT e fechar a conexão")
+    parser.add_argument('--queda', type=float, default=0.0,
+                        help="probabilidade de derrubar a conexão ao final de um DATA")
+    parser.add_argument('--lote', type=int, default=1,
+                        help="destinatarios_por_envio (>1 usa assunto sem personalização)")
+    parser.add_argument('--sem-pipelining', action='store_true', help="servidor não anuncia PIPELINING")
+    parser.add_argument('--sem-diario', dest='diario', action='store_false', help="desativa o diário SQLite")
+    parser.add_argument('--saida', help="acrescenta os resultados (JSON, um por linha) neste arquivo")
+    parser.add_argument('--cenario', help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    if args.cenario:
+        print(json.dumps(rodar_cenario(json.loads(args.cenario))))
+        return 0
+
+    motores = ['threads', 'asyncio'] if args.motor == 'ambos' else [args.motor]
+    base = {
+        'conexoes': args.conexoes, 'anexos': args.anexos, 'latencia': args.latencia,
+        'limitacao': args.limitacao, 'queda': args.queda, 'lote': args.lote,
+        'sem_pipelining': args.sem_pipelining, 'diario': args.diario,
+    }
+
+    print(f"{'motor':<8} {'dest.':>7} {'msg/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>7} "
+          f"{'falhas':>6} {'reenv.':>6} {'tempo s':>8}")
+    resultados = []
+    for quantidade in args.destinatarios or [1000, 10000, 100000]:
+        for motor in motores:
+            cenario = dict(base, motor=motor, destinatarios=quantidade)
+            processo = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--cenario', json.dumps(cenario)],
+                capture_output=True, text=True
+            )
+            if processo.returncode != 0:
+                print(f"{motor:<8} {quantidade:>7} falhou:\n{processo.stderr}")
+                continue
+            r = json.loads(processo.stdout.strip().splitlines()[-1])
+            resultados.append(r)
+            print(f"{motor:<8} {quantidade:>7} {r['msg_por_s']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+                  f"{r['pico_rss_mb']:>7} {r['falhas']:>6} {r['reenvios']:>6} {r['segundos']:>8}", flush=True)
+
+    if args.saida:
+        with open(args.saida, 'a', encoding='utf-8') as f:
+            for r in resultados:
+                f.write(json.dumps(dict(r, data=time.strftime('%Y-%m-%d %H:%M:%S'))) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Servidor SMTP falso para os benchmarks: aceita tudo e descarta as mensagens.
+
+Roda num event loop próprio, numa thread separada, e pode simular latência
+no DATA, respostas 421 de limitação e quedas de conexão aleatórias. Só
+conta mensagens, destinatários e bytes; nada é guardado em memória.
+"""
+import asyncio
+import random
+import threading
+
+
+class ServidorSMTPFalso:
+    def __init__(self, latencia=0.0, prob_limitacao=0.0, prob_queda=0.0, pipelining=True, semente=None):
+        self.latencia = latencia
+        self.prob_limitacao = prob_limitacao
+        self.prob_queda = prob_queda
+        self.pipelining = pipelining
+        self._aleatorio = random.Random(semente)
+        self.mensagens = 0
+        self.destinatarios = 0
+        self.bytes = 0
+        self.limitacoes = 0
+        self.quedas = 0
+        self.porta = None
+        self._loop = None
+        self._servidor = None
+        self._thread = None
+
+    def iniciar(self, host='127.0.0.1', porta=0):
+        """Sobe o servidor numa thread e retorna a porta escolhida"""
+        pronto = threading.Event()
+
+        def rodar():
+            self._loop = asyncio.new_event_loop()
+            self._servidor = self._loop.run_until_complete(
+                asyncio.start_server(self._atender, host, porta, limit=1024 * 1024)
+            )
+            self.porta = self._servidor.sockets[0].getsockname()[1]
+            pronto.set()
+            self._loop.run_forever()
+            self._servidor.close()
+            self._loop.run_until_complete(self._servidor.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=rodar, daemon=True)
+        self._thread.start()
+        pronto.wait()
+        return self.porta
+
+    def parar(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    async def _atender(self, leitor, escritor):
+        try:
+            escritor.write(b"220 bench ESMTP\r\n")
+            await self._sessao(leitor, escritor)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _sessao(self, leitor, escritor):
+        while True:
+            linha = await leitor.readline()
+            if not linha:
+                return
+            comando = linha[:4].upper()
+
+            if comando in (b'EHLO', b'HELO'):
+                extensoes = [b"250-bench", b"250-AUTH PLAIN LOGIN", b"250-8BITMIME"]
+                if self.pipelining:
+                    extensoes.append(b"250-PIPELINING")
+                extensoes.append(b"250 SIZE 0")
+                escritor.write(b"\r\n".join(extensoes) + b"\r\n")
+            elif comando == b'AUTH':
+                if b'LOGIN' in linha.upper():
+                    for _ in range(2):
+                        escritor.write(b"334 \r\n")
+                        await escritor.drain()
+                        await leitor.readline()
+                escritor.write(b"235 2.7.0 Authentication successful\r\n")
+            elif comando == b'MAIL':
+                escritor.write(b"250 2.1.0 Ok\r\n")
+            elif comando == b'RCPT':
+                if self._aleatorio.random() < self.prob_limitacao:
+                    self.limitacoes += 1
+                    escritor.write(b"421 4.7.0 Try again later, closing connection\r\n")
+                    await escritor.drain()
+                    return
+                self.destinatarios += 1
+                escritor.write(b"250 2.1.5 Ok\r\n")
+            elif comando == b'DATA':
+                escritor.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await escritor.drain()
+                while True:
+                    dados = await leitor.readline()
+                    if not dados:
+                        return
+                    if dados == b".\r\n":
+                        break
+                    self.bytes += len(dados)
+                if self.latencia:
+                    await asyncio.sleep(self.latencia)
+                if self._aleatorio.random() < self.prob_queda:
+                    self.quedas += 1
+                    return  # fecha sem responder, como uma conexão que caiu
+                self.mensagens += 1
+                escritor.write(b"250 2.0.0 Ok: queued\r\n")
+            elif comando in (b'RSET', b'NOOP'):
+                escritor.write(b"250 2.0.0 Ok\r\n")
+            elif comando == b'QUIT':
+                escritor.write(b"221 2.0.0 Bye\r\n")
+                await escritor.drain()
+                return
+            else:
+                escritor.write(b"502 5.5.2 Error: command not recognized\r\n")
+            await escritor.drain()
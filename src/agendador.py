@@ -0,0 +1,186 @@
+"""Agendador que intercala os envios por domínio de destino"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+
+# Domínios atendidos pelos mesmos servidores MX são tratados como um só grupo
+GRUPOS_MX = {
+    'googlemail.com': 'gmail.com',
+    'outlook.com': 'hotmail.com',
+    'live.com': 'hotmail.com',
+    'msn.com': 'hotmail.com',
+    'yahoo.com.br': 'yahoo.com',
+    'ymail.com': 'yahoo.com',
+}
+
+PAUSA_BASE = 15.0
+PAUSA_MAXIMA = 300.0
+# Caixas diferentes recusadas com 4xx em sequência (sem sucesso entre elas) que
+# indicam limitação do domínio; menos que isso é tratado como greylisting da caixa
+LIMITE_CAIXAS_RECUSADAS = 3
+
+
+def grupo_dominio(email):
+    dominio = email.rpartition('@')[2].strip().lower()
+    return GRUPOS_MX.get(dominio, dominio)
+
+
+def ler_limites_dominio(config):
+    """Lê as seções [dominio:<dominio>] do config.ini (conexoes, por_minuto)"""
+    limites = {}
+    for secao in config.sections():
+        if secao.startswith('dominio:'):
+            dominio = secao.split(':', 1)[1].strip().lower()
+            limites[GRUPOS_MX.get(dominio, dominio)] = {
+                'conexoes': config.getint(secao, 'conexoes', fallback=0) or None,
+                'por_minuto': config.getfloat(secao, 'por_minuto', fallback=0) or None,
+            }
+    return limites
+
+
+class _Dominio:
+    __slots__ = ('fila', 'em_andamento', 'conexoes', 'intervalo', 'proximo_envio', 'falhas_seguidas', 'recusadas')
+
+    def __init__(self, conexoes, por_minuto):
+        self.fila = deque()
+        self.em_andamento = 0
+        self.conexoes = conexoes
+        self.intervalo = 60.0 / por_minuto if por_minuto else 0.0
+        self.proximo_envio = 0.0
+        self.falhas_seguidas = 0
+        self.recusadas = set()
+
+
+class AgendadorDominios:
+    """Distribui os destinatários entre as conexões alternando os domínios.
+
+    Cada domínio tem sua fila, um limite opcional de envios simultâneos
+    (0 = sem limite além das conexões) e um intervalo mínimo entre
+    mensagens. Um domínio que responde 421, ou recusa com 4xx várias caixas
+    diferentes em sequência, entra em pausa exponencial
+    sem bloquear os demais, que continuam sendo servidos.
+    Destinatários reagendados esperam num heap até a hora da nova tentativa.
+    """
+
+    def __init__(self, destinatarios, conexoes_por_dominio=0, limites_dominio=None):
+        limites_dominio = limites_dominio or {}
+        self._cond = threading.Condition()
+        self._dominios = {}
+        self._rodizio = deque()
+        self._espera = []  # heap de (pronto_em, sequência, destinatário)
+        self._sequencia = itertools.count()
+        self.pendentes = 0
+        self.em_andamento = 0
+
+        for destinatario in destinatarios:
+            chave = grupo_dominio(destinatario['email'])
+            dominio = self._dominios.get(chave)
+            if dominio is None:
+                limite = limites_dominio.get(chave, {})
+                dominio = _Dominio(limite.get('conexoes') or conexoes_por_dominio, limite.get('por_minuto'))
+                self._dominios[chave] = dominio
+                self._rodizio.append(chave)
+            dominio.fila.append(destinatario)
+            self.pendentes += 1
+
+    def __len__(self):
+        return len(self._dominios)
+
+    def _escolher(self, agora):
+        """Próximo domínio liberado no rodízio; senão, quanto esperar"""
+        espera = None
+        for _ in range(len(self._rodizio)):
+            chave = self._rodizio[0]
+            self._rodizio.rotate(-1)
+            dominio = self._dominios[chave]
+            if not dominio.fila or (dominio.conexoes and dominio.em_andamento >= dominio.conexoes):
+                continue
+            if dominio.proximo_envio > agora:
+                falta = dominio.proximo_envio - agora
+                espera = falta if espera is None else min(espera, falta)
+                continue
+            return dominio, None
+        return None, espera
+
+    def _liberar_espera(self, agora):
+        """Devolve às filas dos domínios os reenvios cuja espera terminou"""
+        while self._espera and self._espera[0][0] <= agora:
+            _, _, destinatario = heapq.heappop(self._espera)
+            self._dominios[grupo_dominio(destinatario['email'])].fila.append(destinatario)
+
+    def proximo(self):
+        """Bloqueia até haver um destinatário liberado; None quando acabar"""
+        with self._cond:
+            while True:
+                if self.pendentes == 0 and self.em_andamento == 0:
+                    self._cond.notify_all()
+                    return None
+
+                agora = time.monotonic()
+                self._liberar_espera(agora)
+                dominio, espera = self._escolher(agora)
+                if dominio is not None:
+                    destinatario = dominio.fila.popleft()
+                    dominio.em_andamento += 1
+                    dominio.proximo_envio = agora + dominio.intervalo
+                    self.pendentes -= 1
+                    self.em_andamento += 1
+                    return destinatario
+
+                if self._espera:
+                    falta = self._espera[0][0] - agora
+                    espera = falta if espera is None else min(espera, falta)
+                self._cond.wait(timeout=espera if espera is not None else 0.5)
+
+    def concluir(self, destinatario, limitado=False, reenviar_em=None, recusado=False):
+        """Libera a vaga do domínio; `limitado` aplica a pausa do domínio (ex.: 421).
+
+        `recusado` marca uma recusa 4xx da(s) caixa(s) do destinatário: só
+        ela espera `reenviar_em`, e o domínio só é pausado quando
+        LIMITE_CAIXAS_RECUSADAS caixas diferentes são recusadas em sequência.
+        Com `reenviar_em` (segundos), o destinatário volta para a fila depois
+        dessa espera.
+        """
+        with self._cond:
+            dominio = self._dominios[grupo_dominio(destinatario['email'])]
+            dominio.em_andamento -= 1
+            self.em_andamento -= 1
+            if recusado:
+                for membro in destinatario.get('lote') or [destinatario]:
+                    dominio.recusadas.add(membro['email'].strip().lower())
+                limitado = limitado or len(dominio.recusadas) >= LIMITE_CAIXAS_RECUSADAS
+            if limitado:
+                dominio.falhas_seguidas += 1
+                dominio.recusadas.clear()
+                pausa = min(PAUSA_MAXIMA, PAUSA_BASE * 2 ** (dominio.falhas_seguidas - 1))
+                dominio.proximo_envio = max(dominio.proximo_envio, time.monotonic() + pausa)
+            elif not recusado:
+                dominio.falhas_seguidas = 0
+                dominio.recusadas.clear()
+            if reenviar_em is not None:
+                heapq.heappush(self._espera, (time.monotonic() + reenviar_em, next(self._sequencia), destinatario))
+                self.pendentes += 1
+            self._cond.notify_all()
+            return pausa if limitado else 0.0
+
+    def reenfileirar(self, destinatario, atraso):
+        """Agenda nova tentativa para quem foi recusado dentro de um lote já concluído"""
+        with self._cond:
+            heapq.heappush(self._espera, (time.monotonic() + atraso, next(self._sequencia), destinatario))
+            self.pendentes += 1
+            self._cond.notify_all()
+
+    def cancelar(self):
+        """Esvazia todas as filas e retorna os destinatários que não foram entregues"""
+        with self._cond:
+            restantes = [destinatario for _, _, destinatario in self._espera]
+            for dominio in self._dominios.values():
+                restantes.extend(dominio.fila)
+                dominio.fila.clear()
+            self._espera.clear()
+            self.pendentes = 0
+            self._cond.notify_all()
+            return restantes
@@ -0,0 +1,235 @@
+"""Assinatura DKIM (rsa-sha256, canonicalização relaxed/relaxed) das mensagens.
+
+A canonicalização e o hash do corpo são feitos aqui; só a operação RSA
+usa o pacote opcional `cryptography`, num pool de processos para que a
+assinatura escale com os núcleos sem disputar o GIL com o envio. O
+pacote e o pool só são importados quando a assinatura é iniciada, então
+quem não configura DKIM não paga por eles.
+"""
+import base64
+import hashlib
+import importlib.util
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# Cabeçalhos assinados, quando presentes na mensagem (From é obrigatório)
+CABECALHOS_ASSINADOS = ('from', 'to', 'subject', 'date', 'message-id', 'mime-version', 'content-type')
+
+# Hashes de corpo guardados (corpos idênticos: mesmo texto e mesmos anexos)
+LIMITE_CACHE_CORPOS = 4096
+
+_ESPACOS = re.compile(rb'[ \t]+')
+_ESPACOS_FIM_LINHA = re.compile(rb' \r\n')
+_ESPACOS_TEXTO = re.compile(r'[ \t]+')
+
+# Chave privada de cada processo do pool, carregada uma única vez no initializer
+_chave_processo = None
+
+
+def _carregar_chave(pem):
+    global _chave_processo
+    from cryptography.hazmat.primitives import serialization
+    _chave_processo = serialization.load_pem_private_key(pem, password=None)
+
+
+def _assinar_no_processo(dados):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    return _chave_processo.sign(dados, padding.PKCS1v15(), hashes.SHA256())
+
+
+def fronteira_conteudo(texto, anexos):
+    """Fronteira MIME derivada do corpo e dos anexos: conteúdos iguais geram bytes iguais.
+
+    `anexos` são tuplas (caminho, tamanho, mtime_ns) já conhecidas da
+    campanha, sem um stat por mensagem; tamanho e data de modificação
+    evitam que um arquivo regravado no mesmo caminho reaproveite o hash
+    antigo.
+    """
+    resumo = hashlib.sha256(texto.encode('utf-8'))
+    for caminho, tamanho, mtime in anexos:
+        resumo.update(b'\0%s\0%d:%d' % (os.fsencode(caminho), tamanho, mtime))
+    return f"==============={resumo.hexdigest()[:32]}=="
+
+
+class HashCorpoRelaxed:
+    """SHA-256 do corpo canonicalizado (relaxed), alimentado em blocos.
+
+    Os blocos são cortados em fins de linha; linhas vazias no final do
+    corpo ficam pendentes até aparecer conteúdo, pois a canonicalização
+    as descarta.
+    """
+
+    def __init__(self):
+        self._sha = hashlib.sha256()
+        self._resto = b''
+        self._vazias = 0
+
+    def update(self, dados):
+        dados = self._resto + dados
+        fim = dados.rfind(b'\r\n')
+        if fim < 0:
+            self._resto = dados
+            return
+        self._resto = dados[fim + 2:]
+        linhas = _ESPACOS_FIM_LINHA.sub(b'\r\n', _ESPACOS.sub(b' ', dados[:fim + 2]))
+        conteudo = linhas.rstrip(b'\r\n')
+        if not conteudo:
+            self._vazias += len(linhas) // 2
+            return
+        self._sha.update(b'\r\n' * self._vazias + conteudo + b'\r\n')
+        self._vazias = (len(linhas) - len(conteudo)) // 2 - 1
+
+    def digest(self):
+        if self._resto:
+            self.update(b'\r\n')
+        return self._sha.digest()
+
+
+def _canonizar_cabecalho(nome, valor):
+    valor = _ESPACOS_TEXTO.sub(' ', valor.replace('\r\n', '')).strip()
+    return f"{nome.strip().lower()}:{valor}\r\n"
+
+
+def _ler_cabecalhos(bloco):
+    """[(nome, valor bruto)] do bloco de cabeçalhos, com as continuações de linha"""
+    cabecalhos = []
+    for linha in bloco.decode('utf-8', 'surrogateescape').split('\r\n'):
+        if linha[:1] in (' ', '\t') and cabecalhos:
+            nome, valor = cabecalhos[-1]
+            cabecalhos[-1] = (nome, valor + '\r\n' + linha)
+        elif ':' in linha:
+            cabecalhos.append(tuple(linha.split(':', 1)))
+    return cabecalhos
+
+
+class AssinaturaPendente:
+    """Cabeçalho DKIM-Signature de uma mensagem, concluído quando o pool devolve a assinatura"""
+    __slots__ = ('_valor', 'futuro', '_cabecalho')
+
+    def __init__(self, valor, futuro):
+        self._valor = valor
+        self.futuro = futuro
+        self._cabecalho = None
+
+    def cabecalho(self):
+        """Linha 'DKIM-Signature: ...' em bytes, com CRLF, para ir antes da mensagem"""
+        if self._cabecalho is None:
+            assinatura = base64.b64encode(self.futuro.result()).decode('ascii')
+            dobrada = '\r\n\t '.join(assinatura[i:i + 72] for i in range(0, len(assinatura), 72))
+            self._cabecalho = f"DKIM-Signature: {self._valor}{dobrada}\r\n".encode('ascii')
+        return self._cabecalho
+
+
+class AssinadorDKIM:
+    """Assina mensagens com DKIM: chave carregada uma vez, hash de corpos repetidos em cache.
+
+    `assinar` calcula o hash do corpo (ou o reaproveita), monta o
+    cabeçalho e entrega a operação RSA ao pool de processos sem esperar;
+    quem envia a mensagem chama `cabecalho()` na assinatura pendente,
+    normalmente já pronta.
+    """
+
+    def __init__(self, dominio, seletor, caminho_chave, processos=0):
+        self.dominio = dominio
+        self.seletor = seletor
+        self.caminho_chave = caminho_chave
+        self.processos = max(0, int(processos or 0)) or os.cpu_count() or 1
+        self.assinadas = 0
+        self.hashes_reaproveitados = 0
+        self._pool = None
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def do_config(cls, config):
+        """Assinador da seção [EMAIL] (dkim_dominio, dkim_seletor, dkim_chave) ou None"""
+        caminho = config.get('EMAIL', 'dkim_chave', fallback='').strip()
+        if not caminho:
+            return None
+        return cls(
+            config.get('EMAIL', 'dkim_dominio', fallback='').strip(),
+            config.get('EMAIL', 'dkim_seletor', fallback='').strip(),
+            caminho,
+            config.getint('EMAIL', 'dkim_processos', fallback=0),
+        )
+
+    def iniciar(self):
+        """Lê e valida a chave uma vez e abre o pool; levanta erro com configuração inválida"""
+        if importlib.util.find_spec('cryptography') is None:
+            raise RuntimeError("a assinatura DKIM requer o pacote cryptography (pip install cryptography)")
+        if not self.dominio or not self.seletor:
+            raise ValueError("dkim_dominio e dkim_seletor são obrigatórios com dkim_chave")
+        with open(self.caminho_chave, 'rb') as f:
+            pem = f.read()
+        _carregar_chave(pem)  # erro de chave aparece aqui, antes de qualquer conexão
+        if self.processos == 1:
+            return  # um núcleo: assinar nas threads de montagem evita o custo de IPC
+        # spawn: o processo da janela tem threads (Qt) e um fork copiaria locks em uso
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        self._pool = ProcessPoolExecutor(
+            self.processos, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_carregar_chave, initargs=(pem,),
+        )
+        self._pool.submit(int).result()  # falha do pool aparece aqui, antes de conectar
+
+    def fechar(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def hash_corpo(self, blocos, chave=None):
+        """bh= em base64 do corpo em `blocos`; com `chave`, reaproveitado entre corpos iguais"""
+        if chave is not None:
+            with self._lock:
+                if chave in self._hashes:
+                    self._hashes.move_to_end(chave)
+                    self.hashes_reaproveitados += 1
+                    return self._hashes[chave]
+        resumo = HashCorpoRelaxed()
+        for bloco in blocos:
+            resumo.update(bloco)
+        valor = base64.b64encode(resumo.digest()).decode('ascii')
+        if chave is not None:
+            with self._lock:
+                self._hashes[chave] = valor
+                if len(self._hashes) > LIMITE_CACHE_CORPOS:
+                    self._hashes.popitem(last=False)
+        return valor
+
+    def assinar(self, bloco_cabecalhos, blocos_corpo, chave=None):
+        """Assinatura pendente da mensagem (cabeçalhos em bytes, corpo em blocos sem ponto duplicado).
+
+        `blocos_corpo` só é percorrido se o hash do corpo ainda não estiver
+        em cache para `chave` (ex.: a fronteira MIME derivada do conteúdo).
+        """
+        bh = self.hash_corpo(blocos_corpo, chave)
+        ultimos = {}
+        for nome, valor in _ler_cabecalhos(bloco_cabecalhos):
+            if nome.strip().lower() in CABECALHOS_ASSINADOS:
+                ultimos[nome.strip().lower()] = (nome, valor)
+        assinados = [ultimos[nome] for nome in CABECALHOS_ASSINADOS if nome in ultimos]
+
+        valor = (
+            f"v=1; a=rsa-sha256; c=relaxed/relaxed; d={self.dominio}; s={self.seletor};\r\n"
+            f"\tt={int(time.time())}; h={':'.join(nome.lower() for nome, _ in assinados)};\r\n"
+            f"\tbh={bh};\r\n"
+            f"\tb="
+        )
+        dados = ''.join(_canonizar_cabecalho(nome, v) for nome, v in assinados)
+        dados += _canonizar_cabecalho('dkim-signature', valor)[:-2]
+        dados = dados.encode('utf-8', 'surrogateescape')
+        if self._pool is not None:
+            futuro = self._pool.submit(_assinar_no_processo, dados)
+        else:
+            futuro = Future()
+            futuro.set_result(_assinar_no_processo(dados))
+        with self._lock:
+            self.assinadas += 1
+        return AssinaturaPendente(valor, futuro)
@@ -0,0 +1,82 @@
+"""Cache de anexos codificados em base64, válido durante uma campanha"""
+import base64
+import os
+import threading
+from collections import OrderedDict
+from email.mime.base import MIMEBase
+
+
+def parte_anexo(caminho, payload=''):
+    """Parte MIME de um anexo; o nome vai entre aspas ou codificado (RFC 2231) se não for ASCII"""
+    part = MIMEBase('application', 'octet-stream')
+    part.set_payload(payload)
+    part['Content-Transfer-Encoding'] = 'base64'
+    part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(caminho))
+    return part
+
+
+class CacheAnexos:
+    """Lê e codifica cada arquivo distinto uma única vez por campanha.
+
+    A chave é (caminho, mtime, tamanho), de modo que um arquivo alterado
+    durante o envio é recodificado. O total em memória é limitado por
+    `limite_bytes`, descartando os itens usados há mais tempo (LRU).
+    """
+
+    def __init__(self, limite_bytes=256 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self.ocupado = 0
+        self.acertos = 0
+        self.codificados = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._locks_arquivo = {}
+
+    def _chave(self, caminho):
+        st = os.stat(caminho)
+        return (os.path.abspath(caminho), st.st_mtime_ns, st.st_size)
+
+    def _buscar(self, chave):
+        with self._lock:
+            codificado = self._itens.get(chave)
+            if codificado is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+            return codificado
+
+    def _guardar(self, chave, codificado):
+        tamanho = len(codificado)
+        if tamanho > self.limite_bytes:
+            return  # Maior que o cache inteiro: não vale a pena guardar
+        with self._lock:
+            self._itens[chave] = codificado
+            self.ocupado += tamanho
+            while self.ocupado > self.limite_bytes:
+                _, antigo = self._itens.popitem(last=False)
+                self.ocupado -= len(antigo)
+
+    def codificado(self, caminho):
+        """Retorna o conteúdo do arquivo em base64 (linhas de 76 caracteres)"""
+        chave = self._chave(caminho)
+        codificado = self._buscar(chave)
+        if codificado is not None:
+            return codificado
+
+        # Conexões que pedem o mesmo arquivo ao mesmo tempo esperam uma única leitura
+        with self._lock:
+            lock_arquivo = self._locks_arquivo.setdefault(chave, threading.Lock())
+        with lock_arquivo:
+            codificado = self._buscar(chave)
+            if codificado is None:
+                with open(caminho, 'rb') as f:
+                    codificado = base64.encodebytes(f.read()).decode('ascii')
+                self._guardar(chave, codificado)
+                with self._lock:
+                    self.codificados += 1
+        with self._lock:
+            self._locks_arquivo.pop(chave, None)
+        return codificado
+
+    def parte(self, caminho):
+        """Cria a parte MIME do anexo reaproveitando o conteúdo já codificado"""
+        return parte_anexo(caminho, self.codificado(caminho))
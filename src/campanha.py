@@ -0,0 +1,41 @@
+"""Retrato imutável de uma campanha, tirado quando o envio é disparado"""
+from diario import identificar_campanha, novo_identificador
+from template import TemplateCompilado
+
+
+class Campanha:
+    """Destinatários, assunto, corpo e anexos de um envio, congelados de uma vez.
+
+    A verificação prévia e o motor de envio recebem o mesmo objeto e só
+    o leem: não precisam de lock nem de acesso à janela, e a lista e o
+    editor ficam livres para preparar a próxima campanha durante o envio.
+    Assunto e corpo já vão compilados (template_assunto, template_corpo)
+    e `anexos` é o conjunto de arquivos usados pela lista.
+    """
+    __slots__ = ('destinatarios', 'assunto', 'corpo', 'template_assunto', 'template_corpo',
+                 'anexos', 'identificador')
+
+    def __init__(self, lista, assunto, corpo, identificador=None):
+        destinatarios = lista.congelar()
+        atribuir = super().__setattr__
+        atribuir('destinatarios', destinatarios)
+        atribuir('assunto', assunto)
+        atribuir('corpo', corpo)
+        atribuir('template_assunto', TemplateCompilado(assunto))
+        atribuir('template_corpo', TemplateCompilado(corpo))
+        atribuir('anexos', destinatarios.caminhos_anexos())
+        atribuir('identificador', identificador or identificar_campanha(assunto, corpo, self.anexos))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Campanha é somente leitura")
+
+    def __len__(self):
+        return len(self.destinatarios)
+
+    def novo_envio(self):
+        """Mesma campanha com um identificador novo: envia a todos, sem retomar o diário"""
+        copia = object.__new__(Campanha)
+        for nome in self.__slots__:
+            object.__setattr__(copia, nome, getattr(self, nome))
+        object.__setattr__(copia, 'identificador', novo_identificador(self.identificador))
+        return copia
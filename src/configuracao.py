@@ -0,0 +1,54 @@
+"""config.ini e template do corpo lidos uma única vez enquanto o arquivo não mudar"""
+import configparser
+import os
+import threading
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _assinatura(caminho):
+    """(mtime, tamanho) do arquivo, ou None se ele não existir"""
+    try:
+        estado = os.stat(caminho)
+    except OSError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+def _ler_em_cache(tipo, caminho, ler):
+    assinatura = _assinatura(caminho)
+    chave = (tipo, os.path.abspath(caminho))
+    with _lock:
+        em_cache = _cache.get(chave)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+    valor = ler(caminho) if assinatura is not None else None
+    with _lock:
+        _cache[chave] = (assinatura, valor)
+    return valor
+
+
+def _ler_config(caminho):
+    config = configparser.ConfigParser()
+    config.read(caminho, encoding='utf-8')
+    return config
+
+
+def _ler_texto(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def carregar_config(caminho='config.ini'):
+    """ConfigParser do arquivo (vazio se ele não existir); relido só se o arquivo mudar.
+
+    O objeto é compartilhado: quem precisar alterá-lo deve trabalhar numa cópia.
+    """
+    return _ler_em_cache('config', caminho, _ler_config) or configparser.ConfigParser()
+
+
+def carregar_template(caminho='corpo_email.txt'):
+    """Texto do template do corpo, ou None se o arquivo não existir"""
+    return _ler_em_cache('template', caminho, _ler_texto)
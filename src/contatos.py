@@ -0,0 +1,315 @@
+"""Leitura e armazenamento de listas de contatos, sem dependência da interface gráfica"""
+import codecs
+import csv
+import os
+import re
+from array import array
+from types import MappingProxyType
+
+
+# Amostra usada para detectar delimitador e cabeçalho
+TAMANHO_AMOSTRA = 64 * 1024
+DELIMITADORES = ',;\t|'
+
+# Codificações tentadas na importação, em ordem, com o nome mostrado no log;
+# CSVs salvos pelo Excel no Windows costumam vir em Windows-1252
+CODIFICACOES = {'utf-8-sig': 'UTF-8', 'cp1252': 'Windows-1252', 'latin-1': 'Latin-1'}
+
+# Sintaxe de endereço aceita (parte local "dot-atom" e domínio com TLD alfabético)
+_EMAIL_VALIDO = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}"
+)
+
+
+def email_valido(email):
+    """Verifica a sintaxe do endereço antes de ele chegar ao servidor SMTP"""
+    return len(email) <= 254 and _EMAIL_VALIDO.fullmatch(email) is not None
+
+
+_FORA_DE_NOME = re.compile(r'\W+')
+
+
+def nome_coluna(cabecalho):
+    """Nome usável em %(coluna)s: minúsculo, com espaços e pontuação trocados por '_'"""
+    return _FORA_DE_NOME.sub('_', cabecalho.strip().lower()).strip('_')
+
+
+def normalizar_email(email, agrupar_tag=False):
+    """Chave de comparação: sem espaços, minúsculo e, opcionalmente, sem +tag"""
+    email = email.strip().lower()
+    if agrupar_tag:
+        local, _, dominio = email.rpartition('@')
+        email = f"{local.split('+', 1)[0]}@{dominio}"
+    return email
+
+
+class IndiceDestinatarios:
+    """Índice hash de endereços normalizados para descartar duplicados em O(1)"""
+
+    def __init__(self, agrupar_tag=False):
+        self.agrupar_tag = agrupar_tag
+        self.duplicados = 0
+        self._vistos = set()
+
+    def registrar(self, email):
+        """Registra o endereço; retorna False se ele já estava na lista"""
+        chave = normalizar_email(email, self.agrupar_tag)
+        if chave in self._vistos:
+            self.duplicados += 1
+            return False
+        self._vistos.add(chave)
+        return True
+
+    def __contains__(self, email):
+        return normalizar_email(email, self.agrupar_tag) in self._vistos
+
+
+def detectar_codificacao(caminho):
+    """Primeira codificação de CODIFICACOES que decodifica o arquivo inteiro.
+
+    O arquivo é percorrido em blocos, sem guardá-lo em memória; Latin-1
+    aceita qualquer byte e fica como último recurso.
+    """
+    for codificacao in list(CODIFICACOES)[:-1]:
+        decodificador = codecs.getincrementaldecoder(codificacao)()
+        try:
+            with open(caminho, 'rb') as f:
+                while True:
+                    bloco = f.read(1024 * 1024)
+                    if not bloco:
+                        break
+                    decodificador.decode(bloco)
+            decodificador.decode(b'', final=True)
+            return codificacao
+        except UnicodeDecodeError:
+            continue
+    return list(CODIFICACOES)[-1]
+
+
+def _detectar_formato(amostra):
+    """Retorna (dialeto, tem_cabecalho) a partir de linhas completas da amostra"""
+    # Descarta a última linha, que pode ter sido cortada no meio
+    if '\n' in amostra:
+        amostra = amostra[:amostra.rindex('\n') + 1]
+    primeira_linha = amostra.split('\n', 1)[0]
+
+    try:
+        dialect = csv.Sniffer().sniff(amostra, delimiters=DELIMITADORES)
+    except csv.Error:
+        # Linhas com quantidades diferentes de colunas confundem o Sniffer;
+        # usa o delimitador mais frequente na primeira linha
+        delimitador = max(DELIMITADORES, key=primeira_linha.count)
+        dialect = type('DialetoCSV', (csv.excel,), {'delimiter': delimitador})
+
+    # Há cabeçalho quando a coluna de e-mail da primeira linha não é um e-mail
+    primeira = next(csv.reader([primeira_linha], dialect), [])
+    tem_cabecalho = len(primeira) >= 2 and not email_valido(primeira[1].strip())
+    return dialect, tem_cabecalho
+
+
+def ler_contatos_csv_em_lotes(caminho, tamanho_lote=5000, codificacao=None):
+    """Lê o CSV em fluxo, gerando (lote, fração do arquivo lida, inválidos até aqui).
+
+    Só um lote fica em memória por vez, então arquivos com centenas de
+    milhares de linhas podem ser importados sem carregar tudo de uma vez.
+    Endereços com sintaxe inválida são descartados e apenas contados.
+    As colunas além de nome e e-mail vão em 'campos', com o nome do
+    cabeçalho normalizado por nome_coluna ("Nome Completo" vira
+    nome_completo) ou colunaN, se o arquivo não tiver cabeçalho, para uso
+    no template. Sem `codificacao`, ela é detectada (detectar_codificacao).
+    """
+    total_bytes = os.path.getsize(caminho) or 1
+    codificacao = codificacao or detectar_codificacao(caminho)
+    with open(caminho, 'r', encoding=codificacao, newline='') as csvfile:
+        dialect, tem_cabecalho = _detectar_formato(csvfile.read(TAMANHO_AMOSTRA))
+        csvfile.seek(0)
+
+        reader = csv.reader(csvfile, dialect)
+        cabecalho = next(reader, []) if tem_cabecalho else []
+        nomes_extras = [nome_coluna(nome) for nome in cabecalho[2:]]
+
+        lote = []
+        invalidos = 0
+        for row in reader:
+            if len(row) >= 2:  # Pelo menos nome e e-mail
+                nome, email = row[0].strip(), row[1].strip()
+                if not email_valido(email):
+                    invalidos += 1
+                    continue
+                contato = {'nome': nome, 'email': email}
+                if len(row) > 2:
+                    contato['campos'] = {
+                        (nomes_extras[i] if i < len(nomes_extras) and nomes_extras[i] else f"coluna{i + 3}"): valor.strip()
+                        for i, valor in enumerate(row[2:])
+                    }
+                lote.append(contato)
+                if len(lote) >= tamanho_lote:
+                    yield lote, min(1.0, csvfile.buffer.tell() / total_bytes), invalidos
+                    lote = []
+        yield lote, 1.0, invalidos
+
+
+def ler_contatos_csv(caminho, codificacao=None):
+    """Gera um dicionário {'nome', 'email', 'campos'} para cada linha válida do CSV"""
+    for lote, _, _ in ler_contatos_csv_em_lotes(caminho, codificacao=codificacao):
+        yield from lote
+
+
+class _ColunasDestinatarios:
+    """Leitura das colunas: cada linha vira um dicionário sob demanda"""
+    __slots__ = ()
+
+    def arquivos(self, i):
+        return self._grupos_anexos[self.anexos[i]]
+
+    def __len__(self):
+        return len(self.emails)
+
+    def __getitem__(self, i):
+        return {
+            'nome': self.nomes[i],
+            'email': self.emails[i],
+            'arquivos': list(self.arquivos(i)),
+            'campos': {chave: coluna[i] for chave, coluna in self.campos.items()},
+        }
+
+    def __iter__(self):
+        for i in range(len(self.emails)):
+            yield self[i]
+
+
+class ListaDestinatarios(_ColunasDestinatarios):
+    """Destinatários guardados em colunas, no lugar de um dicionário por linha.
+
+    Nomes e e-mails ficam em listas paralelas; os anexos são guardados uma
+    única vez por combinação distinta e cada linha aponta para ela por um
+    índice em um array compacto. Iterar ou indexar devolve dicionários
+    {'nome', 'email', 'arquivos', 'campos'} criados sob demanda, no formato
+    que o motor de envio espera. Colunas extras do CSV viram colunas aqui
+    também. Endereços repetidos são barrados pelo índice.
+    """
+
+    def __init__(self, agrupar_tag=False):
+        self.indice = IndiceDestinatarios(agrupar_tag)
+        self.nomes = []
+        self.emails = []
+        self.anexos = array('I')
+        self.campos = {}
+        self._grupos_anexos = [()]
+        self._indice_grupos = {(): 0}
+
+    def _grupo(self, arquivos):
+        arquivos = tuple(arquivos)
+        indice = self._indice_grupos.get(arquivos)
+        if indice is None:
+            indice = len(self._grupos_anexos)
+            self._grupos_anexos.append(arquivos)
+            self._indice_grupos[arquivos] = indice
+        return indice
+
+    def novos(self, contatos):
+        """Filtra os contatos cujo e-mail ainda não está na lista (nem repetido no lote)"""
+        return [contato for contato in contatos if self.indice.registrar(contato['email'])]
+
+    def adicionar(self, nome, email, arquivos=(), campos=None):
+        campos = campos or {}
+        for chave in campos.keys() - self.campos.keys():
+            self.campos[chave] = [''] * len(self.emails)
+        for chave, coluna in self.campos.items():
+            coluna.append(campos.get(chave, ''))
+
+        self.nomes.append(nome)
+        self.emails.append(email)
+        self.anexos.append(self._grupo(arquivos))
+
+    def estender(self, contatos):
+        for contato in contatos:
+            self.adicionar(contato['nome'], contato['email'], contato.get('arquivos', ()), contato.get('campos'))
+
+    def limpar(self):
+        self.__init__(self.indice.agrupar_tag)
+
+    def coluna(self, nome):
+        """Valores de uma coluna: 'nome', 'email' ou uma coluna extra do CSV (como no cabeçalho ou normalizada)"""
+        nome = nome_coluna(nome)
+        if nome == 'nome':
+            return self.nomes
+        if nome == 'email':
+            return self.emails
+        if nome not in self.campos:
+            raise KeyError(f"a lista não tem a coluna '{nome}'")
+        return self.campos[nome]
+
+    def anexar_da_pasta(self, pasta, associacoes, coluna='email'):
+        """Troca os anexos vindos de `pasta` pelos de `associacoes` ({valor da coluna: caminhos}).
+
+        Anexos de fora da pasta são mantidos, então a associação pode ser
+        refeita quando a pasta muda. Retorna quantas linhas ficaram com
+        anexos da pasta.
+        """
+        valores = self.coluna(coluna)
+        pasta = os.path.join(os.path.abspath(pasta), '')
+        mantidos_por_grupo = {}
+        com_anexos = 0
+        for i, valor in enumerate(valores):
+            grupo = self.anexos[i]
+            mantidos = mantidos_por_grupo.get(grupo)
+            if mantidos is None:
+                mantidos = tuple(c for c in self._grupos_anexos[grupo] if not c.startswith(pasta))
+                mantidos_por_grupo[grupo] = mantidos
+            encontrados = associacoes.get(valor)
+            if encontrados:
+                com_anexos += 1
+                self.anexos[i] = self._grupo(mantidos + tuple(c for c in encontrados if c not in mantidos))
+            elif len(mantidos) != len(self._grupos_anexos[grupo]):
+                self.anexos[i] = self._grupo(mantidos)
+        return com_anexos
+
+    def congelar(self):
+        """Cópia somente leitura do estado atual, para entregar ao envio"""
+        return ListaCongelada(self)
+
+    def filtrar(self, texto):
+        """Índices das linhas cujo nome ou e-mail contém `texto`"""
+        texto = texto.lower()
+        nomes, emails = self.nomes, self.emails
+        return array('l', (i for i in range(len(emails))
+                           if texto in emails[i].lower() or texto in nomes[i].lower()))
+
+    def ordenar(self, indices, campo, reverso=False):
+        """Ordena uma lista de índices pelo campo 'nome', 'email' ou 'arquivos'"""
+        if campo == 'arquivos':
+            textos = [", ".join(os.path.basename(p) for p in grupo) for grupo in self._grupos_anexos]
+            chave = lambda i: textos[self.anexos[i]]
+        else:
+            coluna = self.nomes if campo == 'nome' else self.emails
+            chave = coluna.__getitem__
+        return array('l', sorted(indices, key=chave, reverse=reverso))
+
+
+class ListaCongelada(_ColunasDestinatarios):
+    """Retrato somente leitura de uma ListaDestinatarios.
+
+    As colunas viram tuplas e o índice de anexos um memoryview somente
+    leitura, então a cópia custa uma passada pelas referências (sem criar
+    um dicionário por linha) e pode ser lida por várias threads sem lock,
+    enquanto a lista original continua sendo editada.
+    """
+    __slots__ = ('nomes', 'emails', 'anexos', 'campos', '_grupos_anexos')
+
+    def __init__(self, lista):
+        atribuir = super().__setattr__
+        atribuir('nomes', tuple(lista.nomes))
+        atribuir('emails', tuple(lista.emails))
+        atribuir('anexos', memoryview(array('I', lista.anexos)).toreadonly())
+        atribuir('campos', MappingProxyType({chave: tuple(coluna) for chave, coluna in lista.campos.items()}))
+        atribuir('_grupos_anexos', tuple(lista._grupos_anexos))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("ListaCongelada é somente leitura")
+
+    def caminhos_anexos(self):
+        """Conjunto dos arquivos anexados a algum destinatário da lista"""
+        # Grupos que nenhuma linha usa mais (removida ou reanexada) ficam de fora
+        return frozenset(caminho for indice in set(self.anexos) for caminho in self._grupos_anexos[indice])
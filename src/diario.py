@@ -0,0 +1,154 @@
+"""Diário persistente de envio, para retomar campanhas interrompidas"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+NA_FILA = 'na_fila'
+ENVIADO = 'enviado'
+FALHOU = 'falhou'
+REENVIANDO = 'reenviando'
+
+
+def identificar_campanha(assunto, corpo, anexos=()):
+    """Identificador estável da campanha: assunto, corpo e anexos (caminho, tamanho e mtime).
+
+    Reenviar o mesmo texto com anexos diferentes (ou alterados) é outra campanha.
+    """
+    resumo = hashlib.sha1(f"{assunto}\0{corpo}".encode('utf-8'))
+    for caminho in sorted(set(anexos)):
+        try:
+            estado = os.stat(caminho)
+            assinatura = f"{estado.st_size}:{estado.st_mtime_ns}"
+        except OSError:
+            assinatura = "ausente"
+        resumo.update(f"\0{caminho}\0{assinatura}".encode('utf-8', 'surrogateescape'))
+    return resumo.hexdigest()[:16]
+
+
+def novo_identificador(identificador):
+    """Identificador de um novo envio da mesma campanha, que não retoma o anterior"""
+    return f"{identificador}-{time.strftime('%Y%m%d%H%M%S')}"
+
+
+def ja_enviados(caminho, campanha):
+    """Quantos destinatários da campanha já receberam segundo o diário (0 sem diário)"""
+    if not caminho or not os.path.exists(caminho):
+        return 0
+    diario = DiarioEnvio(caminho)
+    try:
+        return diario.resumo(campanha).get(ENVIADO, 0)
+    finally:
+        diario.fechar()
+
+
+def ler_suprimidos(caminho):
+    """Lista de supressão do diário em `caminho` (vazia sem diário)"""
+    if not caminho or not os.path.exists(caminho):
+        return set()
+    diario = DiarioEnvio(caminho)
+    try:
+        return diario.suprimidos()
+    finally:
+        diario.fechar()
+
+
+class DiarioEnvio:
+    """Registra o estado de cada destinatário em SQLite (modo WAL).
+
+    A tabela `eventos` só recebe inserções, formando o histórico completo;
+    `estado` guarda a situação atual de cada (campanha, e-mail) e é indexada
+    pela chave primária, então verificar se alguém já recebeu é uma consulta
+    pontual mesmo em listas grandes. `supressao` guarda os endereços
+    recusados de forma definitiva, que nenhuma campanha futura deve tentar.
+    """
+
+    def __init__(self, caminho='envios.db'):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS eventos (
+                campanha TEXT NOT NULL,
+                email TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                erro TEXT,
+                momento REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS estado (
+                campanha TEXT NOT NULL,
+                email TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                erro TEXT,
+                atualizado REAL NOT NULL,
+                PRIMARY KEY (campanha, email)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS supressao (
+                email TEXT PRIMARY KEY,
+                codigo INTEGER,
+                motivo TEXT,
+                momento REAL NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self._conn.commit()
+
+    def enfileirar(self, campanha, emails):
+        """Coloca na fila quem ainda não tem registro; retorna o estado de todos"""
+        agora = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO estado (campanha, email, estado, atualizado) VALUES (?, ?, ?, ?)",
+                ((campanha, email, NA_FILA, agora) for email in emails)
+            )
+            cursor = self._conn.execute("SELECT email, estado FROM estado WHERE campanha = ?", (campanha,))
+            return dict(cursor.fetchall())
+
+    def registrar(self, campanha, email, estado, erro=None):
+        """Grava a transição de estado de um destinatário (commit imediato)"""
+        agora = time.time()
+        tentou = 1 if estado in (ENVIADO, FALHOU) else 0
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO eventos (campanha, email, estado, erro, momento) VALUES (?, ?, ?, ?, ?)",
+                (campanha, email, estado, erro, agora)
+            )
+            self._conn.execute(
+                """INSERT INTO estado (campanha, email, estado, tentativas, erro, atualizado)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (campanha, email) DO UPDATE SET
+                       estado = excluded.estado,
+                       tentativas = estado.tentativas + excluded.tentativas,
+                       erro = excluded.erro,
+                       atualizado = excluded.atualizado""",
+                (campanha, email, estado, tentou, erro, agora)
+            )
+
+    def suprimir(self, email, codigo, motivo):
+        """Inclui o endereço na lista de supressão (vale para todas as campanhas)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO supressao (email, codigo, motivo, momento) VALUES (?, ?, ?, ?)",
+                (email.strip().lower(), codigo, motivo, time.time())
+            )
+
+    def suprimidos(self):
+        """Conjunto de endereços (minúsculos) na lista de supressão"""
+        with self._lock:
+            return {email for (email,) in self._conn.execute("SELECT email FROM supressao")}
+
+    def resumo(self, campanha):
+        """Quantidade de destinatários por estado"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT estado, COUNT(*) FROM estado WHERE campanha = ? GROUP BY estado", (campanha,)
+            )
+            return dict(cursor.fetchall())
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
@@ -1,25 +1,29 @@
+import time
+_INICIO_PROCESSO = time.perf_counter()
+
 import os
-from dotenv import load_dotenv
 from pathlib import Path
 
-import csv
 import sys
-import threading
-import smtplib
 import configparser
-import time
-import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+
+from perfil_inicio import PerfilInicio
+from registro import RegistroEnvio
+from contatos import ler_contatos_csv_em_lotes, detectar_codificacao, CODIFICACOES, ListaDestinatarios, email_valido
+from configuracao import carregar_config, carregar_template
+
+# Fases da abertura; só são exibidas com --profile-startup.
+# Motor de envio, verificação e dotenv são importados só quando usados.
+PERFIL = PerfilInicio(_INICIO_PROCESSO)
+PERFIL.marcar('imports do aplicativo')
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QLineEdit, QPushButton, QTextEdit, QProgressBar,
-                            QTreeWidget, QTreeWidgetItem, QFileDialog, QMessageBox,
-                            QGroupBox, QFormLayout, QToolBar, QTabWidget, QScrollArea)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                            QTableView, QHeaderView, QAbstractItemView, QFileDialog, QMessageBox,
+                            QGroupBox, QFormLayout, QToolBar, QTabWidget)
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QTextCursor, QAction, QPalette, QColor, QIcon
+PERFIL.marcar('imports PyQt6')
 
 
 # Configurações iniciais
@@ -29,12 +33,55 @@ DEFAULT_CONFIG = {
     'email_subject': 'Documentos Importantes'
 }
 
+# Linhas mantidas no painel de log (as mais antigas saem; o arquivo envio.log guarda tudo)
+LINHAS_LOG_TELA = 2000
+
+# Índices das abas montadas sob demanda
+ABA_EDITOR = 0
+ABA_LOG = 1
+
+
+def folha_de_estilo(escuro):
+    """Folha de estilo única da aplicação para o tema; trocar de tema é uma só chamada"""
+    return """
+        QGroupBox {
+            font-weight: bold;
+            border: 1px solid %(borda)s;
+            border-radius: 4px;
+            margin-top: 10px;
+            padding-top: 12px;
+        }
+        QGroupBox::title {
+            subcontrol-origin: margin;
+            left: 10px;
+        }
+        QTextEdit#log {
+            background-color: %(fundo_log)s;
+            color: %(texto_log)s;
+            font-family: Consolas, monospace;
+            font-size: 10pt;
+            border: 1px solid %(borda_log)s;
+        }
+    """ % {
+        'borda': "#555" if escuro else "#aaa",
+        'fundo_log': "#2d2d2d" if escuro else "#f9f9f9",
+        'texto_log': "#e0e0e0" if escuro else "#000000",
+        'borda_log': "#444" if escuro else "#ddd",
+    }
+
+
 class EmailSenderApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, perfil=None):
         super().__init__()
-        self.setWindowTitle("Ferramenta de Envio de E-mails em Massa")
-        self.resize(1200, 800)
         self.dark_mode = False
+        # Com um perfil, a abertura é cronometrada e o relatório sai no terminal
+        self.perfil = perfil or PerfilInicio()
+        self.perfilar = perfil is not None
+        self._pintada = False
+        QApplication.instance().setStyleSheet(folha_de_estilo(self.dark_mode))
+
+        # Log em lotes: as linhas entram no buffer e o timer as exibe de uma vez
+        self.registro = RegistroEnvio('envio.log')
 
         try:
             icon_path = os.path.join(os.path.dirname(__file__), 'assets', 'icon-email-sender.ico.ico')
@@ -43,12 +90,26 @@ class EmailSenderApp(QMainWindow):
             self.log("Ícone não encontrado, usando padrão do sistema")
         
         # Estrutura de dados
-        self.lista_para_envio = []
+        self.lista_para_envio = ListaDestinatarios()
         self.anexos_selecionados = []
         self.attachments_dir = str(Path.home() / "Documents")  # Pasta padrão
-        
+        self.config = configparser.ConfigParser()
+
+        # Pasta de anexos por destinatário: o índice é refeito só no que mudou
+        self.pasta_anexos = ''
+        self.coluna_anexos = 'email'
+        self.padrao_anexos = '{valor}.*'
+        self.indice_anexos = None
+        self.indexador = None
+        self._reindexar = False
+
+        # Editor e log são montados depois da primeira pintura (ou quando usados)
+        self.text_edit = None
+        self.log_text = None
+
         self.init_ui()
         self.load_config()
+        self.perfil.marcar('config.ini')
         
     def init_ui(self):
         # Configuração principal da janela
@@ -70,7 +131,6 @@ class EmailSenderApp(QMainWindow):
         
         # Seção 1: Adicionar Destinatário
         add_group = QGroupBox("Adicionar Destinatário")
-        add_group.setStyleSheet("QGroupBox { font-weight: bold; }")
         add_layout = QFormLayout()
         add_layout.setRowWrapPolicy(QFormLayout.RowWrapPolicy.WrapAllRows)
         
@@ -89,16 +149,23 @@ class EmailSenderApp(QMainWindow):
         btn_adicionar_anexos.setStyleSheet("background-color: #673AB7; color: white;")
         btn_adicionar_anexos.clicked.connect(self.selecionar_arquivos)
         
-        btn_importar = QPushButton("Importar CSV")
-        btn_importar.setStyleSheet("background-color: #FF9800; color: white;")
-        btn_importar.clicked.connect(self.importar_contatos_csv)
+        self.btn_importar = QPushButton("Importar CSV")
+        self.btn_importar.setStyleSheet("background-color: #FF9800; color: white;")
+        self.btn_importar.clicked.connect(self.importar_contatos_csv)
         
+        self.btn_pasta_anexos = QPushButton("Anexos da Pasta")
+        self.btn_pasta_anexos.setStyleSheet("background-color: #009688; color: white;")
+        self.btn_pasta_anexos.setToolTip("Associa a cada destinatário os arquivos da pasta cujo nome "
+                                         "corresponde a uma coluna da lista (padrao_anexos no config.ini)")
+        self.btn_pasta_anexos.clicked.connect(self.selecionar_pasta_anexos)
+
         btn_adicionar = QPushButton("Adicionar à Lista")
         btn_adicionar.setStyleSheet("background-color: #4CAF50; color: white;")
         btn_adicionar.clicked.connect(self.adicionar_destinatario)
         
         btn_layout.addWidget(btn_adicionar_anexos)
-        btn_layout.addWidget(btn_importar)
+        btn_layout.addWidget(self.btn_importar)
+        btn_layout.addWidget(self.btn_pasta_anexos)
         btn_layout.addWidget(btn_adicionar)
         
         # Organização dos elementos
@@ -110,7 +177,6 @@ class EmailSenderApp(QMainWindow):
         
         # Seção 2: Configurações do E-mail
         config_group = QGroupBox("Configurações do E-mail")
-        config_group.setStyleSheet("QGroupBox { font-weight: bold; }")
         config_layout = QFormLayout()
         
         self.smtp_server = QLineEdit()
@@ -135,7 +201,6 @@ class EmailSenderApp(QMainWindow):
 
         # Seção 3: Preferências
         pref_group = QGroupBox("Preferências")
-        pref_group.setStyleSheet("QGroupBox { font-weight: bold; }")
         pref_layout = QVBoxLayout()
         
         # Botão de alternar tema
@@ -160,6 +225,7 @@ class EmailSenderApp(QMainWindow):
         left_layout.addWidget(config_group)
         left_layout.addWidget(pref_group)
         left_layout.addStretch()
+        self.perfil.marcar('janela: coluna esquerda')
         
         # --- COLUNA DIREITA (70% largura) ---
         right_column = QWidget()
@@ -169,84 +235,42 @@ class EmailSenderApp(QMainWindow):
         
         # Seção 3: Lista de Envios Pendentes
         view_group = QGroupBox("Lista de Envios Pendentes")
-        view_group.setStyleSheet("QGroupBox { font-weight: bold; }")
         view_layout = QVBoxLayout()
         
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Nome", "E-mail", "Arquivos Anexados"])
-        self.tree.setColumnWidth(0, 200)
-        self.tree.setColumnWidth(1, 250)
-        self.tree.setColumnWidth(2, 350)
-        
-        view_layout.addWidget(self.tree)
+        self.filtro_entry = QLineEdit()
+        self.filtro_entry.setPlaceholderText("Filtrar por nome ou e-mail...")
+        self.filtro_entry.returnPressed.connect(self.filtrar_lista)
+
+        # Visão virtual: só as linhas visíveis são desenhadas, os dados ficam em self.lista_para_envio
+        self.modelo = ModeloDestinatarios(self.lista_para_envio)
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
+        self.tabela.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.tabela.setSortingEnabled(True)
+        self.tabela.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tabela.verticalHeader().setVisible(False)
+        self.tabela.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tabela.verticalHeader().setDefaultSectionSize(22)
+        self.tabela.horizontalHeader().setStretchLastSection(True)
+        self.tabela.setColumnWidth(0, 200)
+        self.tabela.setColumnWidth(1, 250)
+        self.tabela.setColumnWidth(2, 350)
+        
+        view_layout.addWidget(self.filtro_entry)
+        view_layout.addWidget(self.tabela)
         view_group.setLayout(view_layout)
         
-        # Seção 4: Editor de E-mail (com aba para Log)
-        tab_widget = QTabWidget()
-        
-        # Aba 1: Editor de E-mail
-        editor_tab = QWidget()
-        editor_tab_layout = QVBoxLayout(editor_tab)
-        
-        # Toolbar de formatação
-        toolbar = QToolBar()
-        btn_bold = QAction("Negrito", self)
-        btn_bold.triggered.connect(self.formatar_texto_negrito)
-        toolbar.addAction(btn_bold)
-        
-        # Área de edição
-        self.text_edit = QTextEdit()
-        self.text_edit.setAcceptRichText(True)
-        
-        # Carrega template se existir
-        if os.path.exists('corpo_email.txt'):
-            with open('corpo_email.txt', 'r', encoding='utf-8') as f:
-                self.text_edit.setPlainText(f.read())
-        
-        # Botões do editor
-        editor_btn_frame = QWidget()
-        editor_btn_layout = QHBoxLayout(editor_btn_frame)
-        editor_btn_layout.setContentsMargins(0, 0, 0, 0)
-        
-        btn_salvar = QPushButton("💾 Salvar Template")
-        btn_salvar.setStyleSheet("background-color: #4CAF50; color: white;")
-        btn_salvar.clicked.connect(self.salvar_template_email)
-        
-        btn_carregar = QPushButton("📂 Carregar Template")
-        btn_carregar.setStyleSheet("background-color: #2196F3; color: white;")
-        btn_carregar.clicked.connect(self.carregar_template_email)
-        
-        editor_btn_layout.addWidget(btn_salvar)
-        editor_btn_layout.addWidget(btn_carregar)
-        
-        # Monta o layout do editor
-        editor_tab_layout.addWidget(toolbar)
-        editor_tab_layout.addWidget(self.text_edit)
-        editor_tab_layout.addWidget(editor_btn_frame)
-        
-        # Aba 2: Log de Execução
-        log_tab = QWidget()
-        log_tab_layout = QVBoxLayout(log_tab)
-        
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #f9f9f9;
-                font-family: Consolas, monospace;
-                font-size: 10pt;
-            }
-        """)
-        
-        self.progress = QProgressBar()
-        self.progress.setRange(0, 100)
-        
-        log_tab_layout.addWidget(self.log_text)
-        log_tab_layout.addWidget(self.progress)
-        
-        # Adiciona as abas
-        tab_widget.addTab(editor_tab, "Editor de E-mail")
-        tab_widget.addTab(log_tab, "Log de Execução")
+        self.perfil.marcar('janela: lista de envios')
+
+        # Seção 4: Editor de E-mail e Log, em abas preenchidas sob demanda
+        self.abas = QTabWidget()
+        self.aba_editor = QWidget()
+        QVBoxLayout(self.aba_editor)
+        self.aba_log = QWidget()
+        QVBoxLayout(self.aba_log)
+        self.abas.addTab(self.aba_editor, "Editor de E-mail")
+        self.abas.addTab(self.aba_log, "Log de Execução")
+        self.abas.currentChanged.connect(self.montar_aba)
         
         # Botões de controle
         control_frame = QWidget()
@@ -276,15 +300,67 @@ class EmailSenderApp(QMainWindow):
         
         # Adiciona tudo à coluna direita
         right_layout.addWidget(view_group)
-        right_layout.addWidget(tab_widget)
+        right_layout.addWidget(self.abas)
         right_layout.addWidget(control_frame)
         
         # Adiciona as colunas ao layout principal
         main_layout.addWidget(left_column, stretch=3)  # 30%
         main_layout.addWidget(right_column, stretch=7) # 70%
+        self.perfil.marcar('janela: abas e controles')
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._pintada:
+            self._pintada = True
+            self.perfil.pintou()
+            # A janela já está na tela: monta o restante sem atrasar a primeira pintura
+            QTimer.singleShot(0, self.montar_adiados)
+
+    def montar_adiados(self):
+        """Monta o editor logo após a primeira pintura; no perfil, também o log, e encerra"""
+        with self.perfil.medir('editor (adiado)'):
+            self.criar_editor_email()
+        if self.perfilar:
+            with self.perfil.medir('log (sob demanda)'):
+                self.criar_aba_log()
+            print("\n".join(self.perfil.linhas()), flush=True)
+            QApplication.instance().quit()
+
+    def montar_aba(self, indice):
+        if indice == ABA_EDITOR:
+            self.criar_editor_email()
+        elif indice == ABA_LOG:
+            self.criar_aba_log()
+
+    def criar_aba_log(self):
+        """Monta a aba de log (painel, barra de progresso e métricas) na primeira vez que é usada"""
+        if self.log_text is not None:
+            return
+        log_tab_layout = self.aba_log.layout()
+
+        self.log_text = QTextEdit()
+        self.log_text.setObjectName("log")
+        self.log_text.setReadOnly(True)
+        self.log_text.document().setMaximumBlockCount(LINHAS_LOG_TELA)
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+
+        # Métricas do envio em andamento (msg/s, falhas, fila, tempos por fase)
+        self.metricas_label = QLabel("")
+        self.metricas_label.setStyleSheet("font-family: Consolas, monospace;")
         
-        # Carrega configurações
-        self.load_config()
+        log_tab_layout.addWidget(self.log_text)
+        log_tab_layout.addWidget(self.progress)
+        log_tab_layout.addWidget(self.metricas_label)
+
+        # Até aqui as linhas esperavam no buffer do registro
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(250)
+        self.log_timer.timeout.connect(self.descarregar_log)
+        self.log_timer.timeout.connect(self.atualizar_metricas)
+        self.log_timer.start()
+        self.descarregar_log()
 
     def alternar_tema(self):
         """Alterna entre tema claro e escuro"""
@@ -305,50 +381,16 @@ class EmailSenderApp(QMainWindow):
             palette.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
             palette.setColor(QPalette.ColorRole.Highlight, QColor(142, 45, 197).lighter())
             palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.white)
-            
-            # Ajusta estilos específicos
-            self.log_text.setStyleSheet("""
-                QTextEdit {
-                    background-color: #2d2d2d;
-                    color: #000000;
-                    font-family: Consolas, monospace;
-                    font-size: 10pt;
-                    border: 1px solid #444;
-                }
-            """)
             self.tema_btn.setText("☀ Ativar Tema Claro")
         else:
             # Volta ao tema padrão (claro)
             palette = QApplication.style().standardPalette()
-            
-            self.log_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #f9f9f9;
-                font-family: Consolas, monospace;
-                font-size: 10pt;
-                border: 1px solid #ddd;
-            }
-        """)
-        self.tema_btn.setText("🌙 Ativar Tema Escuro")
-        
-        # Aplica a paleta global
-        QApplication.instance().setPalette(palette)
-        
-        # Atualiza o texto de todos os grupos
-        for group in self.findChildren(QGroupBox):
-            group.setStyleSheet("""
-                QGroupBox {
-                    font-weight: bold;
-                    border: 1px solid %s;
-                    border-radius: 4px;
-                    margin-top: 10px;
-                    padding-top: 12px;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    left: 10px;
-                }
-            """ % ("#555" if self.dark_mode else "#aaa"))
+            self.tema_btn.setText("🌙 Ativar Tema Escuro")
+        
+        # Paleta e folha de estilo globais: grupos e log são restilizados de uma vez
+        app = QApplication.instance()
+        app.setPalette(palette)
+        app.setStyleSheet(folha_de_estilo(self.dark_mode))
 
     def formatar_texto_negrito(self):
         """Adiciona formatação em negrito ao texto selecionado"""
@@ -368,19 +410,24 @@ class EmailSenderApp(QMainWindow):
     def load_config(self):
         """Carrega configurações de múltiplas fontes"""
         try: 
-            config = configparser.ConfigParser() 
-            config.read('config.ini') 
+            config = carregar_config('config.ini')
             
             self.smtp_server.setText(config.get('EMAIL', 'servidor_smtp', fallback='smtp.gmail.com')) 
             self.smtp_port.setText(config.get('EMAIL', 'porta_smtp', fallback='587')) 
             self.email_user.setText(config.get('EMAIL', 'usuario', fallback='')) 
             self.email_subject.setText(config.get('EMAIL', 'assunto', fallback='Manual de Uso - WL Pesos Padrão')) 
+            self.lista_para_envio.indice.agrupar_tag = config.getboolean('EMAIL', 'agrupar_tag_mais', fallback=False)
+            self.pasta_anexos = config.get('EMAIL', 'pasta_anexos', fallback='').strip()
+            self.coluna_anexos = config.get('EMAIL', 'coluna_anexos', fallback='email').strip() or 'email'
+            self.padrao_anexos = config.get('EMAIL', 'padrao_anexos', fallback='{valor}.*').strip() or '{valor}.*'
+            self.config = config
             self.log("Configurações carregadas do arquivo config.ini")   
         except Exception as e: 
             self.log(f"⚠ Erro ao carregar config: {str(e)}") 
     
     def save_config(self):   
         try: 
+            from dotenv import load_dotenv
 
             # 1. Tenta carregar do .env
             load_dotenv()
@@ -405,10 +452,37 @@ class EmailSenderApp(QMainWindow):
             self.log(f"❌ Erro ao carregar as configurações: {str(e)}")
     
     def log(self, message):   
-        timestamp = time.strftime("%H:%M:%S", time.localtime())   
-        self.log_text.append(f"[{timestamp}] {message}")   
+        self.registro.escrever(message)
+
+    def descarregar_log(self):
+        """Exibe de uma vez as linhas acumuladas desde o último ciclo do timer"""
+        if self.log_text is None:
+            return
+        linhas, descartadas = self.registro.coletar()
+        if not linhas:
+            return
+        if descartadas:
+            linhas.insert(0, f"… {descartadas} linha(s) omitidas da tela (veja envio.log)")
+        self.log_text.append("\n".join(linhas))
         self.log_text.moveCursor(QTextCursor.MoveOperation.End)
     
+    def atualizar_metricas(self, final=False):
+        """Atualiza o painel de métricas enquanto o envio está em andamento"""
+        thread = getattr(self, 'email_thread', None)
+        if thread is None or not (final or thread.isRunning()):
+            return
+        resumo = thread.motor.metricas.resumo()
+        contadores = resumo['contadores']
+        fases = resumo['fases']
+        self.metricas_label.setText(
+            f"📊 {resumo['mensagens_por_segundo']:.1f} msg/s | "
+            f"enviados {contadores.get('enviados', 0)} | falhas {contadores.get('falhas', 0)} | "
+            f"reenvios {contadores.get('reenvios', 0)} | fila {resumo['medidores'].get('fila', 0)}\n"
+            f"envio p50 {fases['envio']['p50_s'] * 1000:.0f} ms, p99 {fases['envio']['p99_s'] * 1000:.0f} ms | "
+            f"montagem p50 {fases['montar']['p50_s'] * 1000:.0f} ms | "
+            f"conexão p50 {fases['conectar']['p50_s'] * 1000:.0f} ms"
+        )
+
     def selecionar_arquivos(self):
         '''Abre diálogo para seleção de arquivos anexos'''
         files, _ = QFileDialog.getOpenFileNames(
@@ -428,14 +502,69 @@ class EmailSenderApp(QMainWindow):
             self.anexos_label.setText("Nenhum arquivo selecionado")
             self.anexos_label.setStyleSheet("color: #666; font-style: italic;")
     
+    def selecionar_pasta_anexos(self):
+        """Escolhe a pasta cujos arquivos são associados aos destinatários pelo nome"""
+        pasta = QFileDialog.getExistingDirectory(
+            self, "Selecione a pasta de anexos", self.pasta_anexos or self.attachments_dir
+        )
+        if pasta:
+            self.pasta_anexos = pasta
+            self.indexar_pasta_anexos()
+
+    def indexar_pasta_anexos(self):
+        """Atualiza o índice da pasta em segundo plano e associa os arquivos à lista"""
+        if not self.pasta_anexos or not self.lista_para_envio:
+            return
+        if self.indexador is not None and self.indexador.isRunning():
+            self._reindexar = True
+            return
+        from indice_anexos import IndiceAnexos
+
+        self.criar_aba_log()
+        if self.indice_anexos is None or self.indice_anexos.pasta != os.path.abspath(self.pasta_anexos):
+            self.indice_anexos = IndiceAnexos(self.pasta_anexos)
+        try:
+            valores = tuple(self.lista_para_envio.coluna(self.coluna_anexos))
+        except KeyError as e:
+            self.log(f"⚠ Anexos da pasta: {e.args[0]} (coluna_anexos no config.ini)")
+            return
+
+        self._reindexar = False
+        self.btn_pasta_anexos.setEnabled(False)
+        self.log(f"⏳ Indexando {self.indice_anexos.pasta}...")
+        self.indexador = IndexacaoThread(self.indice_anexos, valores, self.padrao_anexos)
+        self.indexador.finished_signal.connect(self.indexacao_finalizada)
+        self.indexador.start()
+
+    def indexacao_finalizada(self, associacoes, novos, removidos, erro):
+        self.btn_pasta_anexos.setEnabled(True)
+        if erro:
+            self.log(f"❌ Erro ao associar anexos da pasta: {erro}")
+        else:
+            pasta = self.indice_anexos.pasta
+            # A coluna pode ter sumido se a lista foi limpa durante a indexação
+            try:
+                com_anexos = self.modelo.anexar_da_pasta(pasta, associacoes, self.coluna_anexos)
+            except KeyError as e:
+                self.log(f"⚠ Anexos da pasta: {e.args[0]}")
+            else:
+                self.log(f"📎 {com_anexos} destinatário(s) com anexos da pasta {pasta} "
+                         f"({len(self.indice_anexos)} arquivo(s); +{novos}/-{removidos} desde a última leitura)")
+        if self._reindexar:
+            self.indexar_pasta_anexos()
+
     def adicionar_destinatario(self):
         nome = self.nome_entry.text().strip()
         email = self.email_entry.text().strip()
 
-        # Validação básica de e-mail
-        if not "@" in email or "." not in email.split("@")[-1]:
+        # Validação da sintaxe do e-mail
+        if not email_valido(email):
             QMessageBox.warning(self, "E-mail inválido", "Por favor, insira um endereço de e-mail válido.")
             return
+
+        if email in self.lista_para_envio.indice:
+            QMessageBox.warning(self, "E-mail duplicado", f"{email} já está na lista de envio.")
+            return
         
         if not nome or not email:
             QMessageBox.warning(self, "Campos Vazios", "Por favor, preencha o nome e e-mail.")
@@ -451,27 +580,15 @@ class EmailSenderApp(QMainWindow):
             if reply == QMessageBox.StandardButton.No:
                 return
             
-        # Converte caminhos para absolutos e verifica existência
-        arquivos_validos = []
-        for arquivo in self.anexos_selecionados:
-            arquivo_abs = os.path.abspath(arquivo)
-            if os.path.exists(arquivo_abs):
-                arquivos_validos.append(arquivo_abs)
-            else:
-                QMessageBox.warning(self, "Arquivo não encontrado", 
-                                  f"O arquivo será ignorado (não encontrado):\n{arquivo}")
+        # Caminhos absolutos; existência e leitura são conferidas na verificação prévia
+        arquivos = [os.path.abspath(arquivo) for arquivo in self.anexos_selecionados]
 
-        # Adiciona à árvore (mostra apenas nomes dos arquivos)
-        nomes_arquivos = [os.path.basename(p) for p in arquivos_validos] if arquivos_validos else ["Nenhum anexo"]
-        item = QTreeWidgetItem([nome, email, ", ".join(nomes_arquivos)])
-        self.tree.addTopLevelItem(item)
-        
-        # Armazena os dados
-        self.lista_para_envio.append({
+        # Armazena os dados (a tabela mostra apenas os nomes dos arquivos)
+        self.modelo.adicionar_lote([{
             'nome': nome,
             'email': email,
-            'arquivos': arquivos_validos
-        })
+            'arquivos': arquivos
+        }])
         
         # Limpa os campos
         self.nome_entry.clear()
@@ -486,26 +603,87 @@ class EmailSenderApp(QMainWindow):
                               "Por favor, adicione pelo menos um destinatário.")
             return
             
+        from campanha import Campanha
+        from diario import ja_enviados
+        from motor_envio import opcoes_envio
+
+        self.criar_editor_email()
+        self.criar_aba_log()
+
+        # Retrato da campanha no momento do clique: verificação e envio leem só
+        # esta cópia, e a lista/editor podem ser alterados durante o envio
+        self.campanha = Campanha(self.lista_para_envio, self.email_subject.text(), self.text_edit.toPlainText())
+        try:
+            self.opcoes_envio = opcoes_envio(self.config, self.smtp_server.text())
+        except ValueError as e:
+            self.log(f"❌ {e}")
+            QMessageBox.critical(self, "Configuração inválida", str(e))
+            return
+
+        # Mesma campanha já enviada antes: retomar só com a confirmação do usuário
+        enviados = ja_enviados(self.opcoes_envio['diario'], self.campanha.identificador)
+        if enviados:
+            caixa = QMessageBox(self)
+            caixa.setIcon(QMessageBox.Icon.Question)
+            caixa.setWindowTitle("Campanha já enviada")
+            caixa.setText(
+                f"Esta campanha (mesmo assunto, corpo e anexos) já foi enviada para {enviados} "
+                "destinatário(s).\n\nRetomar o envio anterior, pulando quem já recebeu, "
+                "ou enviar de novo para todos?"
+            )
+            btn_retomar = caixa.addButton("Retomar", QMessageBox.ButtonRole.AcceptRole)
+            btn_todos = caixa.addButton("Enviar para todos", QMessageBox.ButtonRole.DestructiveRole)
+            caixa.addButton(QMessageBox.StandardButton.Cancel)
+            caixa.exec()
+            if caixa.clickedButton() is btn_todos:
+                self.campanha = self.campanha.novo_envio()
+            elif caixa.clickedButton() is not btn_retomar:
+                return
+
         self.send_btn.setEnabled(False)
+        self.send_btn.setText("Verificando...")
+
+        # Verificação prévia dos anexos em segundo plano, antes de qualquer conexão
+        self.verificador = VerificacaoThread(self.campanha, self.opcoes_envio['limitador'], self.opcoes_envio['diario'])
+        self.verificador.finished_signal.connect(self.verificacao_concluida)
+        self.verificador.start()
+
+    def verificacao_concluida(self, relatorio):
+        opcoes = self.opcoes_envio
+        if relatorio.problemas:
+            reply = QMessageBox.question(
+                self,
+                "Problemas nos anexos",
+                "\n".join(relatorio.linhas()) + "\n\nEnviar mesmo assim, sem os anexos com problema?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.No:
+                self.send_btn.setEnabled(True)
+                self.send_btn.setText("▶ ENVIAR TUDO")
+                return
+            opcoes['anexo_ausente'] = 'avisar'
+
         self.send_btn.setText("Enviando...")
-        
+
         # Cria e inicia uma thread para envio
         self.email_thread = EmailThread(
-            self.lista_para_envio,
+            self.campanha,
             self.smtp_server.text(),
             self.smtp_port.text(),
             self.email_user.text(),
             self.email_pass.text(),
-            self.email_subject.text()
+            self.registro,
+            verificacao=relatorio,
+            **opcoes
         )
         
-        self.email_thread.update_signal.connect(self.log)
         self.email_thread.progress_signal.connect(self.progress.setValue)
         self.email_thread.finished_signal.connect(self.envio_finalizado)
         
         self.email_thread.start()
     
     def envio_finalizado(self, success):
+        self.atualizar_metricas(final=True)
         self.send_btn.setEnabled(True)
         self.send_btn.setText("▶ ENVIAR TUDO")
         
@@ -529,8 +707,7 @@ class EmailSenderApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.lista_para_envio.clear()
-            self.tree.clear()
+            self.modelo.limpar()
             self.log("ℹ️ Lista de envio foi limpa.")
 
     def importar_contatos_csv(self):
@@ -545,101 +722,84 @@ class EmailSenderApp(QMainWindow):
         if not filename:
             return
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as csvfile:
-                # Detecta automaticamente o delimitador
-                dialect = csv.Sniffer().sniff(csvfile.read(1024))
-                csvfile.seek(0)
-                reader = csv.reader(csvfile, dialect)
-                
-                # Pula cabeçalho se existir
-                try:
-                    if csv.Sniffer().has_header(csvfile.read(1024)):
-                        csvfile.seek(0)
-                        next(reader)  # Pula a linha de cabeçalho
-                    csvfile.seek(0)
-                except:
-                    csvfile.seek(0)
-                
-                contatos_importados = 0
-                for row in reader:
-                    if len(row) >= 2:  # Pelo menos nome e e-mail
-                        nome, email = row[0], row[1]
-                        if "@" in email:  # Verificação básica de e-mail
-                            # Adiciona à lista de envio
-                            self.lista_para_envio.append({
-                                'nome': nome.strip(),
-                                'email': email.strip(),
-                            })
-                            
-                            # Adiciona à visualização
-                            item = QTreeWidgetItem([nome.strip(), email.strip(), ", "])
-                            self.tree.addTopLevelItem(item)
-                            contatos_importados += 1
-                
-                self.log(f"✅ {contatos_importados} contatos importados de {filename}")
-                QMessageBox.information(self, "Importação concluída", 
-                                    f"Foram importados {contatos_importados} contatos com sucesso!")
-        
-        except Exception as e:
-            self.log(f"❌ Erro ao importar CSV: {str(e)}")
+        # A leitura roda em segundo plano; a tabela recebe os contatos em lotes
+        self.criar_aba_log()
+        self.btn_importar.setEnabled(False)
+        self.log(f"⏳ Importando contatos de {filename}...")
+        self._duplicados_antes = self.lista_para_envio.indice.duplicados
+        self.importador = ImportadorCSV(filename)
+        self.importador.lote_signal.connect(self.adicionar_lote_contatos)
+        self.importador.progress_signal.connect(self.progress.setValue)
+        self.importador.finished_signal.connect(self.importacao_finalizada)
+        self.importador.start()
+
+    def adicionar_lote_contatos(self, lote):
+        """Acrescenta um lote de contatos importados à lista"""
+        self.modelo.adicionar_lote(lote)
+
+    def filtrar_lista(self):
+        """Mostra apenas os destinatários que contêm o texto do filtro"""
+        self.modelo.filtrar(self.filtro_entry.text().strip())
+
+    def importacao_finalizada(self, filename, contatos_lidos, invalidos, codificacao, erro):
+        self.btn_importar.setEnabled(True)
+        duplicados = self.lista_para_envio.indice.duplicados - self._duplicados_antes
+        contatos_importados = contatos_lidos - duplicados
+        if erro:
+            self.log(f"❌ Erro ao importar CSV: {erro}")
             QMessageBox.critical(self, "Erro na importação", 
-                            f"Não foi possível ler o arquivo CSV:\n{str(e)}")
+                            f"Não foi possível ler o arquivo CSV:\n{erro}")
+            return
+
+        self.log(f"✅ {contatos_importados} contatos importados de {filename} (codificação {CODIFICACOES[codificacao]})")
+        if duplicados or invalidos:
+            self.log(f"ℹ️ Ignorados: {duplicados} duplicado(s), {invalidos} e-mail(s) inválido(s)")
+        # Contatos novos também recebem os anexos da pasta configurada
+        self.indexar_pasta_anexos()
+        QMessageBox.information(self, "Importação concluída", 
+                            f"Foram importados {contatos_importados} contatos com sucesso!")
             
     def criar_editor_email(self):
-        """Cria a seção de edição do corpo do e-mail"""
-        # Grupo para o editor
-        editor_group = QGroupBox("Editor de E-mail")
-        editor_layout = QVBoxLayout()
+        """Monta a aba do editor do corpo do e-mail (uma única vez)"""
+        if self.text_edit is not None:
+            return
+        editor_tab_layout = self.aba_editor.layout()
         
-        # Barra de ferramentas básica
+        # Toolbar de formatação
         toolbar = QToolBar()
-        
-        # Botões de formatação
         btn_bold = QAction("Negrito", self)
-        btn_bold.triggered.connect(lambda: self.text_edit.insertHtml("<b>texto</b>"))
+        btn_bold.triggered.connect(self.formatar_texto_negrito)
         toolbar.addAction(btn_bold)
         
         # Área de edição
         self.text_edit = QTextEdit()
         self.text_edit.setAcceptRichText(True)
         
-        # Carrega template existente se disponível
-        if os.path.exists('corpo_email.txt'):
-            template_padrao =  '''Prezado(a) %(nome)s,
-            
-            Segue em anexo os documetnos solicitados.
-            
-            Atenciosamente,
-            Equipe'''
-            with open('corpo_email.txt', 'w', encoding='utf-8') as f:
-                f.write(template_padrao)
-
-            with open('corpo_email.txt', 'r', encoding='utf-8') as f:
-                self.text_edit.setPlainText(f.read())
+        # Carrega o template salvo, se existir (lido uma vez e mantido em cache)
+        template = carregar_template('corpo_email.txt')
+        if template is not None:
+            self.text_edit.setPlainText(template)
         
-        # Botões de ação
-        btn_frame = QWidget()
-        btn_layout = QHBoxLayout(btn_frame)
+        # Botões do editor
+        editor_btn_frame = QWidget()
+        editor_btn_layout = QHBoxLayout(editor_btn_frame)
+        editor_btn_layout.setContentsMargins(0, 0, 0, 0)
         
         btn_salvar = QPushButton("💾 Salvar Template")
-        btn_salvar.clicked.connect(self.salvar_template_email)
         btn_salvar.setStyleSheet("background-color: #4CAF50; color: white;")
+        btn_salvar.clicked.connect(self.salvar_template_email)
         
         btn_carregar = QPushButton("📂 Carregar Template")
-        btn_carregar.clicked.connect(self.carregar_template_email)
         btn_carregar.setStyleSheet("background-color: #2196F3; color: white;")
+        btn_carregar.clicked.connect(self.carregar_template_email)
         
-        btn_layout.addWidget(btn_salvar)
-        btn_layout.addWidget(btn_carregar)
-        
-        # Monta o layout completo
-        editor_layout.addWidget(toolbar)
-        editor_layout.addWidget(self.text_edit)
-        editor_layout.addWidget(btn_frame)
-        editor_group.setLayout(editor_layout)
+        editor_btn_layout.addWidget(btn_salvar)
+        editor_btn_layout.addWidget(btn_carregar)
         
-        return editor_group
+        # Monta o layout do editor
+        editor_tab_layout.addWidget(toolbar)
+        editor_tab_layout.addWidget(self.text_edit)
+        editor_tab_layout.addWidget(editor_btn_frame)
 
     def salvar_template_email(self):
         """Salva o template do e-mail em um arquivo"""
@@ -675,125 +835,195 @@ class EmailSenderApp(QMainWindow):
             except Exception as e:
                 self.log(f"❌ Erro ao carregar template: {str(e)}")
 
+class ModeloDestinatarios(QAbstractTableModel):
+    """Modelo virtual sobre ListaDestinatarios para a QTableView.
+
+    A ordenação e o filtro só reorganizam um array de índices; nenhum
+    item de widget é criado por destinatário.
+    """
+    CABECALHOS = ["Nome", "E-mail", "Arquivos Anexados"]
+    CAMPOS = ['nome', 'email', 'arquivos']
+
+    def __init__(self, lista):
+        super().__init__()
+        self.lista = lista
+        self._linhas = None  # None = todas as linhas, na ordem de inserção
+        self._ordem = None
+        self._filtro = ''
+
+    def _recalcular(self):
+        if not self._filtro and self._ordem is None:
+            self._linhas = None
+            return
+        indices = self.lista.filtrar(self._filtro) if self._filtro else range(len(self.lista))
+        if self._ordem is not None:
+            campo, reverso = self._ordem
+            indices = self.lista.ordenar(indices, campo, reverso)
+        self._linhas = indices
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.lista) if self._linhas is None else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.CABECALHOS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        linha = index.row()
+        i = linha if self._linhas is None else self._linhas[linha]
+        coluna = index.column()
+        if coluna == 0:
+            return self.lista.nomes[i]
+        if coluna == 1:
+            return self.lista.emails[i]
+        arquivos = self.lista.arquivos(i)
+        return ", ".join(os.path.basename(p) for p in arquivos) if arquivos else "Nenhum anexo"
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.CABECALHOS[section]
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        # Coluna -1 volta à ordem de inserção
+        self._ordem = None if column < 0 else (self.CAMPOS[column], order == Qt.SortOrder.DescendingOrder)
+        self._recalcular()
+        self.layoutChanged.emit()
+
+    def filtrar(self, texto):
+        self.beginResetModel()
+        self._filtro = texto
+        self._recalcular()
+        self.endResetModel()
+
+    def adicionar_lote(self, contatos):
+        """Acrescenta contatos inéditos; sem filtro/ordem, insere só as linhas novas"""
+        contatos = self.lista.novos(contatos)
+        if not contatos:
+            return
+        if self._linhas is None:
+            inicio = len(self.lista)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(contatos) - 1)
+            self.lista.estender(contatos)
+            self.endInsertRows()
+        else:
+            self.beginResetModel()
+            self.lista.estender(contatos)
+            self._recalcular()
+            self.endResetModel()
+
+    def anexar_da_pasta(self, pasta, associacoes, coluna):
+        """Aplica a associação da pasta de anexos e atualiza só a coluna de arquivos"""
+        com_anexos = self.lista.anexar_da_pasta(pasta, associacoes, coluna)
+        if self._ordem is not None and self._ordem[0] == 'arquivos':
+            self.layoutAboutToBeChanged.emit()
+            self._recalcular()
+            self.layoutChanged.emit()
+        elif self.rowCount():
+            self.dataChanged.emit(self.index(0, 2), self.index(self.rowCount() - 1, 2))
+        return com_anexos
+
+    def limpar(self):
+        self.beginResetModel()
+        self.lista.limpar()
+        self._recalcular()
+        self.endResetModel()
+
 class EmailThread(QThread):
-    update_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int)
     finished_signal = pyqtSignal(bool)
     
-    def __init__(self, lista_para_envio, smtp_server, smtp_port, email_user, email_pass, email_subject):
+    def __init__(self, campanha, smtp_server, smtp_port, email_user, email_pass, registro, **opcoes):
         super().__init__()
-        self.lista_para_envio = lista_para_envio
-        self.smtp_server = smtp_server
-        self.smtp_port = smtp_port
-        self.email_user = email_user
-        self.email_pass = email_pass
-        self.email_subject = email_subject
+        from motor_envio import criar_motor
+        self.motor = criar_motor(
+            campanha.destinatarios, smtp_server, smtp_port, email_user, email_pass, campanha.template_assunto,
+            campanha.template_corpo,
+            campanha=campanha.identificador,
+            anexos=campanha.anexos,
+            ao_log=registro.escrever,
+            ao_detalhe=registro.detalhe,
+            ao_progresso=self.progress_signal.emit,
+            **opcoes
+        )
     
     def run(self):
-        try:
-            # Verificar configurações
-            if not all([self.smtp_server, self.smtp_port, self.email_user, self.email_pass]):
-                self.update_signal.emit("⚠ Erro: Preencha todos os campos de configuração do e-mail e a senha.")
-                self.finished_signal.emit(False)
-                return
+        self.finished_signal.emit(self.motor.executar())
 
-            total_a_enviar = len(self.lista_para_envio)
-            if total_a_enviar == 0:
-                self.update_signal.emit("ℹ️ A lista de envio está vazia. Adicione destinatários primeiro.")
-                self.finished_signal.emit(False)
-                return
+class VerificacaoThread(QThread):
+    finished_signal = pyqtSignal(object)
 
-            # Conectar ao servidor SMTP
-            porta = int(self.smtp_port)
-            self.update_signal.emit(f"⏳ Conectando a {self.smtp_server} na porta {porta}...")
+    def __init__(self, campanha, limitador, diario=''):
+        super().__init__()
+        self.campanha = campanha
+        self.limitador = limitador
+        self.diario = diario
 
-            if porta == 465:
-                server = smtplib.SMTP_SSL(host=self.smtp_server, port=porta, timeout=20)
-            else:
-                server = smtplib.SMTP(host=self.smtp_server, port=porta, timeout=20)
-                server.starttls()
-            
-            self.update_signal.emit(f"🔑 Autenticando usuário {self.email_user}...")
-            server.login(self.email_user, self.email_pass)
-            self.update_signal.emit("✅ Conexão e login realizados com sucesso!")
+    def run(self):
+        from diario import ler_suprimidos
+        from verificacao import verificar_envio
+        self.finished_signal.emit(
+            verificar_envio(self.campanha.destinatarios, self.limitador, ler_suprimidos(self.diario))
+        )
 
-            # Ler template do corpo do e-mail
-            with open('corpo_email.txt', 'r', encoding='utf-8') as f:
-                corpo_template = self.text_edit.toPlainText()
+class ImportadorCSV(QThread):
+    lote_signal = pyqtSignal(list)
+    progress_signal = pyqtSignal(int)
+    finished_signal = pyqtSignal(str, int, int, str, str)
 
-            # Enviar e-mails
-            self.update_signal.emit(f"📤 Iniciando envio para {total_a_enviar} destinatário(s)...")
-            
-            for i, destinatario in enumerate(self.lista_para_envio, 1):
-                try:
-                    nome = destinatario['nome']
-                    email_dest = destinatario['email']
-                    lista_de_anexos = destinatario['arquivos']
-
-                    self.update_signal.emit(f"Preparando e-mail para {email_dest} com {len(lista_de_anexos)} anexo(s)")
-                    
-                    msg = MIMEMultipart()
-                    msg['From'] = self.email_user
-                    msg['To'] = email_dest
-                    msg['Subject'] = self.email_subject
-
-                    corpo_personalizado = corpo_template.replace('%(nome)s', nome)
-                    msg.attach(MIMEText(corpo_personalizado, 'plain'))
-
-                    # Log detalhado dos anexos
-                    for idx, caminho_arquivo in enumerate(lista_de_anexos, 1):
-                        self.update_signal.emit(f"  Verificando anexo {idx}: {caminho_arquivo}")
-                        if not os.path.exists(caminho_arquivo):
-                            self.update_signal.emit(f"  ⚠ Arquivo não encontrado: {caminho_arquivo}")
-                            continue
-
-                        try:
-                            with open(caminho_arquivo, 'rb') as attachment:
-                                part = MIMEBase('application', 'octet-stream')
-                                part.set_payload(attachment.read())
-                                encoders.encode_base64(part)
-                                nome_arquivo = os.path.basename(caminho_arquivo)
-                                part.add_header(
-                                    'Content-Disposition', 
-                                    f"attachment; filename={nome_arquivo}"
-                                )
-                                msg.attach(part)
-                                self.update_signal.emit(f"  ✅ Anexo adicionado: {nome_arquivo}")
-                        except Exception as e:
-                            self.update_signal.emit(f"  ❌ Erro ao processar anexo: {str(e)}")
-                            continue
-
-                    server.send_message(msg)
-                    self.update_signal.emit(f"✅ ({i}/{total_a_enviar}) E-mail enviado para: {email_dest}")
-                    
-                    # Atualizar progresso
-                    progresso = int((i / total_a_enviar) * 100)
-                    self.progress_signal.emit(progresso)
-                    
-                    time.sleep(1)
-
-                except Exception as e:
-                    self.update_signal.emit(f"❌ Falha no envio para {email_dest}: {str(e)}")
-                    continue
-            
-            server.quit()
-            self.update_signal.emit("\n🎉 Processo finalizado!")
-            self.finished_signal.emit(True)
-
-        except smtplib.SMTPAuthenticationError:
-            self.update_signal.emit("⛔ ERRO DE AUTENTICAÇÃO: Usuário ou senha incorretos.")
-            self.update_signal.emit("ℹ️ DICA: Se usar Gmail/Outlook com 2FA, você precisa de uma 'Senha de App'.")
-            self.finished_signal.emit(False)
+    def __init__(self, filename, tamanho_lote=5000):
+        super().__init__()
+        self.filename = filename
+        self.tamanho_lote = tamanho_lote
+
+    def run(self):
+        importados = invalidos = 0
+        codificacao = ""
+        try:
+            codificacao = detectar_codificacao(self.filename)
+            for lote, fracao, invalidos in ler_contatos_csv_em_lotes(self.filename, self.tamanho_lote, codificacao):
+                if lote:
+                    self.lote_signal.emit(lote)
+                    importados += len(lote)
+                self.progress_signal.emit(int(fracao * 100))
+            self.finished_signal.emit(self.filename, importados, invalidos, codificacao, "")
+        except Exception as e:
+            self.finished_signal.emit(self.filename, importados, invalidos, codificacao, str(e))
+
+class IndexacaoThread(QThread):
+    finished_signal = pyqtSignal(object, int, int, str)
+
+    def __init__(self, indice, valores, padrao):
+        super().__init__()
+        self.indice = indice
+        self.valores = valores
+        self.padrao = padrao
+
+    def run(self):
+        try:
+            novos, removidos = self.indice.atualizar()
+            associacoes = self.indice.associar(self.valores, self.padrao)
+            self.finished_signal.emit(associacoes, novos, removidos, "")
         except Exception as e:
-            self.update_signal.emit(f"⛔ Erro crítico durante o processo: {str(e)}")
-            self.finished_signal.emit(False)
+            self.finished_signal.emit({}, 0, 0, str(e))
 
 if __name__ == "__main__":
+    # --profile-startup: mostra o tempo de cada fase da abertura e encerra
+    perfilar = '--profile-startup' in sys.argv
+    if perfilar:
+        sys.argv.remove('--profile-startup')
+
     app = QApplication(sys.argv)
     
     # Aplicar um estilo moderno
     app.setStyle("Fusion")
+    PERFIL.marcar('QApplication')
     
-    window = EmailSenderApp()
+    window = EmailSenderApp(PERFIL if perfilar else None)
     window.show()
+    PERFIL.marcar('show')
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""Envio em massa pela linha de comando (sem interface gráfica).
+
+Usa o mesmo motor da janela PyQt6, lendo o servidor SMTP do .env/config.ini,
+os destinatários de um CSV e o corpo de corpo_email.txt. Não importa PyQt6,
+então pode rodar em servidores e no cron.
+
+Exemplo:
+    python src/enviar_cli.py --csv contatos.csv --anexo manual.pdf
+"""
+import argparse
+import configparser
+import getpass
+import os
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from contatos import ler_contatos_csv, detectar_codificacao, CODIFICACOES, ListaDestinatarios
+from campanha import Campanha
+from diario import ja_enviados, ler_suprimidos
+from indice_anexos import IndiceAnexos, PADRAO_ANEXOS
+from motor_envio import criar_motor, opcoes_envio
+from verificacao import verificar_envio
+
+
+def log(message):
+    timestamp = time.strftime("%H:%M:%S", time.localtime())
+    print(f"[{timestamp}] {message}", flush=True)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Envio de e-mails em massa sem interface gráfica")
+    parser.add_argument('--csv', required=True, help="arquivo CSV com nome e e-mail dos destinatários")
+    parser.add_argument('--corpo', default='corpo_email.txt', help="template do corpo do e-mail")
+    parser.add_argument('--config', default='config.ini', help="arquivo de configuração")
+    parser.add_argument('--assunto', help="assunto (padrão: 'assunto' do config.ini)")
+    parser.add_argument('--anexo', action='append', default=[],
+                        help="arquivo anexado a todos os destinatários (pode repetir)")
+    parser.add_argument('--pasta-anexos', help="pasta com anexos por destinatário (padrão: pasta_anexos do config.ini)")
+    parser.add_argument('--coluna-anexos', help="coluna cujo valor dá nome aos arquivos (padrão: coluna_anexos ou email)")
+    parser.add_argument('--padrao-anexos',
+                        help="glob com {valor} ou 're:' + regex (padrão: padrao_anexos ou '{valor}.*')")
+    parser.add_argument('--campanha',
+                        help="identificador da campanha no diário; informe o de um envio anterior para retomá-lo "
+                             "(padrão: derivado de assunto, corpo e anexos)")
+    parser.add_argument('--conexoes', type=int, help="sessões SMTP simultâneas (padrão: config.ini)")
+    parser.add_argument('--verificar', action='store_true',
+                        help="só faz a verificação prévia (anexos, destinatários, estimativas) e sai")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    # Mesma precedência da interface: .env, depois config.ini, depois padrões
+    load_dotenv()
+    config = configparser.ConfigParser()
+    config.read(args.config)
+
+    smtp_server = os.getenv('SMTP_SERVER') or config.get('EMAIL', 'servidor_smtp', fallback='smtp.gmail.com')
+    smtp_port = os.getenv('SMTP_PORT') or config.get('EMAIL', 'porta_smtp', fallback='587')
+    email_user = os.getenv('EMAIL_USER') or config.get('EMAIL', 'usuario', fallback='')
+    email_subject = args.assunto or config.get('EMAIL', 'assunto', fallback='Documentos Importantes')
+    email_pass = os.getenv('EMAIL_PASSWORD')
+    if not email_pass and not args.verificar:
+        email_pass = getpass.getpass(f"Senha de {email_user}: ")
+
+    try:
+        with open(args.corpo, 'r', encoding='utf-8') as f:
+            corpo_template = f.read()
+    except OSError as e:
+        log(f"❌ Erro ao ler o corpo do e-mail: {str(e)}")
+        return 1
+
+    anexos = [os.path.abspath(caminho) for caminho in args.anexo]
+    lista = ListaDestinatarios(config.getboolean('EMAIL', 'agrupar_tag_mais', fallback=False))
+    try:
+        codificacao = detectar_codificacao(args.csv)
+        lista.estender(dict(contato, arquivos=anexos) for contato in ler_contatos_csv(args.csv, codificacao)
+                       if lista.indice.registrar(contato['email']))
+    except Exception as e:
+        log(f"❌ Erro ao importar CSV: {str(e)}")
+        return 1
+    log(f"✅ {len(lista)} contatos importados de {args.csv} (codificação {CODIFICACOES[codificacao]})")
+    if lista.indice.duplicados:
+        log(f"ℹ️ Ignorados: {lista.indice.duplicados} duplicado(s)")
+
+    pasta_anexos = args.pasta_anexos or config.get('EMAIL', 'pasta_anexos', fallback='').strip()
+    if pasta_anexos:
+        coluna = args.coluna_anexos or config.get('EMAIL', 'coluna_anexos', fallback='').strip() or 'email'
+        padrao = args.padrao_anexos or config.get('EMAIL', 'padrao_anexos', fallback='').strip() or PADRAO_ANEXOS
+        indice = IndiceAnexos(pasta_anexos)
+        try:
+            indice.atualizar()
+            associacoes = indice.associar(lista.coluna(coluna), padrao)
+            com_anexos = lista.anexar_da_pasta(pasta_anexos, associacoes, coluna)
+        except (KeyError, ValueError, re.error) as e:
+            log(f"❌ Erro ao associar anexos da pasta: {e.args[0] if isinstance(e, KeyError) else e}")
+            return 1
+        log(f"📎 {com_anexos} destinatário(s) com anexos da pasta {indice.pasta} ({len(indice)} arquivo(s))")
+    campanha = Campanha(lista, email_subject, corpo_template, args.campanha)
+
+    try:
+        opcoes = opcoes_envio(config, smtp_server)
+    except ValueError as e:
+        log(f"❌ {e}")
+        return 1
+    if args.conexoes:
+        opcoes['conexoes'] = args.conexoes
+
+    # Retomar é uma escolha explícita: sem --campanha, um envio anterior igual não é continuado
+    if not args.campanha and not args.verificar:
+        enviados = ja_enviados(opcoes['diario'], campanha.identificador)
+        if enviados:
+            log(f"⚠ Esta campanha já foi enviada para {enviados} destinatário(s) "
+                f"(identificador {campanha.identificador}).")
+            log(f"ℹ️ Para retomar, pulando quem já recebeu: --campanha {campanha.identificador}")
+            log("ℹ️ Para enviar de novo a todos: --campanha com um identificador novo")
+            return 1
+
+    if args.verificar:
+        relatorio = verificar_envio(campanha.destinatarios, opcoes['limitador'], ler_suprimidos(opcoes['diario']))
+        for linha in relatorio.linhas():
+            log(linha)
+        return 0 if relatorio.ok else 1
+
+    motor = criar_motor(
+        campanha.destinatarios, smtp_server, smtp_port, email_user, email_pass, campanha.template_assunto,
+        campanha.template_corpo, campanha=campanha.identificador, anexos=campanha.anexos, ao_log=log, **opcoes
+    )
+    return 0 if motor.executar() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
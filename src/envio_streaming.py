@@ -0,0 +1,161 @@
+"""Envio SMTP em fluxo para mensagens com anexos grandes.
+
+Em vez de montar a mensagem inteira em memória, os anexos grandes são lidos
+em blocos, codificados em base64 e escritos diretamente no comando DATA,
+mantendo o consumo de memória constante independente do tamanho do arquivo.
+"""
+import base64
+import io
+import re
+import smtplib
+import uuid
+from email.generator import BytesGenerator
+
+from cache_anexos import parte_anexo
+
+
+# Múltiplo de 57 bytes: cada bloco vira linhas completas de 76 caracteres
+TAMANHO_BLOCO = 57 * 4096
+
+_PONTO_INICIO_LINHA = re.compile(rb'(?m)^\.')
+
+
+def _cabecalho_anexo(caminho):
+    """Cabeçalhos da parte do anexo, iguais aos dos anexos pequenos (CacheAnexos.parte)"""
+    parte = parte_anexo(caminho)
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, policy=parte.policy.clone(linesep='\r\n')).flatten(parte)
+    return buffer.getvalue()
+
+
+def _blocos_base64(caminho):
+    """Gera o arquivo codificado em base64 (CRLF) bloco a bloco"""
+    with open(caminho, 'rb') as f:
+        while True:
+            bloco = f.read(TAMANHO_BLOCO)
+            if not bloco:
+                break
+            yield base64.encodebytes(bloco).replace(b'\n', b'\r\n')
+
+
+def gerar_mensagem(msg, anexos_grandes, escapar=True, prefixo=b''):
+    """Serializa `msg` e acrescenta os anexos grandes como partes em fluxo.
+
+    `msg` deve ser um MIMEMultipart já com cabeçalhos, corpo e anexos
+    pequenos; os blocos gerados já estão com CRLF e ponto duplicado
+    (sem `escapar`, saem como na mensagem, para calcular o hash DKIM).
+    `prefixo` vai à frente dos cabeçalhos (ex.: DKIM-Signature). Uma
+    fronteira já definida na mensagem é mantida.
+    """
+    fronteira = msg.get_boundary() or f"==============={uuid.uuid4().hex}=="
+    msg.set_boundary(fronteira)
+
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, policy=msg.policy.clone(linesep='\r\n')).flatten(msg)
+    inicio = buffer.getvalue()
+    fechamento = f"--{fronteira}--\r\n".encode('ascii')
+    if inicio.endswith(fechamento):
+        inicio = inicio[:-len(fechamento)]
+    inicio = prefixo + inicio
+    yield _PONTO_INICIO_LINHA.sub(b'..', inicio) if escapar else inicio
+
+    # Linhas base64 nunca começam com ".", então não precisam de escape
+    for caminho in anexos_grandes:
+        yield f"--{fronteira}\r\n".encode('ascii') + _cabecalho_anexo(caminho)
+        yield from _blocos_base64(caminho)
+        yield b"\r\n"
+
+    yield fechamento
+
+
+def blocos_dados(dados):
+    """Prepara uma mensagem já serializada (CRLF) para o DATA: ponto duplicado e CRLF final"""
+    dados = _PONTO_INICIO_LINHA.sub(b'..', dados)
+    if not dados.endswith(b'\r\n'):
+        dados += b'\r\n'
+    return [dados]
+
+
+def _recusar(server, codigo, erro):
+    if codigo == 421:
+        server.close()
+    else:
+        server.rset()
+    raise erro
+
+
+def _respostas_pipeline(server, quantidade):
+    """Lê as respostas dos comandos enviados juntos, parando no primeiro 421.
+
+    Depois de um 421 o servidor fecha a conexão, então as respostas
+    seguintes não chegam; as já lidas são devolvidas para que o 421 seja
+    tratado. Uma queda sem 421 é repassada.
+    """
+    respostas = []
+    for _ in range(quantidade):
+        respostas.append(server.getreply())
+        if respostas[-1][0] == 421:
+            break
+    return respostas
+
+
+def enviar_blocos(server, remetente, destinatarios, blocos):
+    """Transação MAIL/RCPT/DATA transmitindo `blocos` (já com CRLF e ponto duplicado).
+
+    Com a extensão PIPELINING, MAIL, todos os RCPT e o DATA vão num único
+    envio e as respostas são lidas em seguida, economizando uma volta de
+    rede por comando. Levanta as mesmas exceções do smtplib.sendmail
+    (SMTPSenderRefused, SMTPRecipientsRefused, SMTPDataError) e, como ele,
+    retorna os destinatários recusados quando ao menos um foi aceito.
+    """
+    server.ehlo_or_helo_if_needed()
+
+    comandos = [f"mail FROM:{smtplib.quoteaddr(remetente)}"]
+    comandos += [f"rcpt TO:{smtplib.quoteaddr(d)}" for d in destinatarios]
+    if server.has_extn('pipelining'):
+        server.send(''.join(f"{c}\r\n" for c in comandos + ['data']))
+        respostas = _respostas_pipeline(server, len(comandos) + 1)
+    else:
+        respostas = []
+        for c in comandos:
+            respostas.append(server.docmd(c))
+            if respostas[-1][0] == 421 or respostas[0][0] != 250:
+                break
+
+    codigo, resposta = respostas[0]
+    if codigo != 250:
+        _recusar(server, codigo, smtplib.SMTPSenderRefused(codigo, resposta, remetente))
+
+    recusados = {}
+    for destinatario, (codigo, resposta) in zip(destinatarios, respostas[1:]):
+        if codigo not in (250, 251):
+            recusados[destinatario] = (codigo, resposta)
+        if codigo == 421:
+            server.close()
+            raise smtplib.SMTPRecipientsRefused(recusados)
+
+    if len(recusados) == len(destinatarios):
+        if len(respostas) > len(comandos) and respostas[-1][0] == 354:
+            # Com pipelining o DATA já foi aceito: encerra a transação vazia
+            server.send(b".\r\n")
+            server.getreply()
+        _recusar(server, None, smtplib.SMTPRecipientsRefused(recusados))
+
+    codigo, resposta = respostas[-1] if len(respostas) > len(comandos) else server.docmd('data')
+    if codigo != 354:
+        _recusar(server, codigo, smtplib.SMTPDataError(codigo, resposta))
+
+    # O terminador vai junto com o último bloco: um envio pequeno isolado
+    # esperaria o ACK atrasado do servidor (Nagle), custando ~40 ms por mensagem
+    anterior = b""
+    for bloco in blocos:
+        if anterior:
+            server.send(anterior)
+        anterior = bloco
+    server.send(anterior + b".\r\n")
+
+    codigo, resposta = server.getreply()
+    if codigo != 250:
+        _recusar(server, codigo, smtplib.SMTPDataError(codigo, resposta))
+    return recusados
+
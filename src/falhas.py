@@ -0,0 +1,41 @@
+"""Classificação de falhas SMTP e política de novas tentativas"""
+import random
+import smtplib
+import socket
+
+from limitador import codigo_smtp
+
+
+CONEXAO = 'conexao'        # sessão caiu: reconectar e tentar de novo
+TEMPORARIA = 'temporaria'  # 4xx: tentar de novo mais tarde
+PERMANENTE = 'permanente'  # 5xx: não adianta repetir
+OUTRA = 'outra'            # erro local (anexo, template...): não repetir
+
+# Códigos 5xx no RCPT que indicam endereço inexistente ou recusado de vez
+CODIGOS_SUPRESSAO = {550, 551, 553}
+
+
+def classificar(erro):
+    """Classifica a exceção de um envio pelo código de resposta SMTP"""
+    if isinstance(erro, (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)):
+        return CONEXAO
+    codigo = codigo_smtp(erro)
+    if codigo is None:
+        return CONEXAO if isinstance(erro, OSError) else OUTRA
+    if codigo == 421:
+        return CONEXAO  # o servidor fecha a sessão junto com o 421
+    if 400 <= codigo < 500:
+        return TEMPORARIA
+    if 500 <= codigo < 600:
+        return PERMANENTE
+    return OUTRA
+
+
+def deve_suprimir(erro):
+    """Recusa definitiva do destinatário, que deve ir para a lista de supressão"""
+    return isinstance(erro, smtplib.SMTPRecipientsRefused) and codigo_smtp(erro) in CODIGOS_SUPRESSAO
+
+
+def atraso_reenvio(tentativa, base=30.0, maximo=900.0):
+    """Espera exponencial com jitter (±50%) antes da tentativa seguinte"""
+    return min(maximo, base * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.5)
@@ -0,0 +1,206 @@
+"""Índice dos arquivos de uma pasta de anexos, para associá-los aos destinatários"""
+import bisect
+import fnmatch
+import glob
+import os
+import re
+
+
+# Padrão usado sem configuração: arquivo com o valor da coluna como nome, qualquer extensão
+PADRAO_ANEXOS = '{valor}.*'
+
+# Prefixo que marca o padrão como expressão regular (com {valor} ou (?P<valor>...))
+PREFIXO_REGEX = 're:'
+
+CURINGAS = '*?['
+
+
+def _ignorado(nome):
+    """Ocultos e temporários do Office (~$arquivo.docx) não entram no índice"""
+    return nome.startswith(('.', '~$'))
+
+
+def _prefixo_literal(padrao):
+    for i, caractere in enumerate(padrao):
+        if caractere in CURINGAS:
+            return padrao[:i]
+    return padrao
+
+
+def _sufixo_literal(padrao):
+    for i in range(len(padrao) - 1, -1, -1):
+        if padrao[i] in CURINGAS or padrao[i] == ']':
+            return padrao[i + 1:]
+    return padrao
+
+
+class IndiceAnexos:
+    """Nomes de arquivo de uma pasta (e subpastas), lidos com os.scandir.
+
+    Cada pasta guarda o mtime da última leitura; `atualizar` só relê as
+    pastas que mudaram (arquivo criado, removido ou renomeado), então
+    repetir a indexação de uma pasta grande custa um stat por subpasta.
+    `associar` resolve milhares de destinatários de uma vez: com glob,
+    cada valor vira uma busca binária pelo trecho literal do padrão nos
+    nomes ordenados; com regex, os arquivos são lidos numa única passada
+    e o grupo `valor` de cada nome vira chave de um dicionário.
+    """
+
+    def __init__(self, pasta, recursivo=True):
+        self.pasta = os.path.abspath(pasta)
+        self.recursivo = recursivo
+        # pasta -> (mtime_ns, {nome: caminho}, {subpastas})
+        self._pastas = {}
+        self._nomes = None
+        self._invertidos = None
+
+    def __len__(self):
+        return sum(len(arquivos) for _, arquivos, _ in self._pastas.values())
+
+    def atualizar(self):
+        """Relê as pastas novas ou alteradas; retorna (arquivos novos, arquivos removidos)"""
+        if not self._pastas:
+            return self._ler_pasta(self.pasta), 0
+
+        novos = removidos = 0
+        for pasta in list(self._pastas):
+            if pasta not in self._pastas:
+                continue  # já removida junto com a pasta-mãe
+            try:
+                mtime = os.stat(pasta).st_mtime_ns
+            except OSError:
+                removidos += self._remover_pasta(pasta)
+                continue
+            if mtime == self._pastas[pasta][0]:
+                continue
+
+            _, arquivos_antes, subpastas_antes = self._pastas[pasta]
+            self._ler_pasta(pasta, recursiva=False)
+            _, arquivos, subpastas = self._pastas.get(pasta, (None, {}, set()))
+            novos += len(arquivos.keys() - arquivos_antes.keys())
+            removidos += len(arquivos_antes.keys() - arquivos.keys())
+            for subpasta in subpastas_antes - subpastas:
+                if subpasta in self._pastas:
+                    removidos += self._remover_pasta(subpasta)
+            for subpasta in subpastas - subpastas_antes:
+                novos += self._ler_pasta(subpasta)
+        return novos, removidos
+
+    def _ler_pasta(self, pasta, recursiva=True):
+        """Lê uma pasta com scandir; retorna quantos arquivos foram indexados"""
+        arquivos = {}
+        subpastas = set()
+        try:
+            mtime = os.stat(pasta).st_mtime_ns
+            with os.scandir(pasta) as entradas:
+                for entrada in entradas:
+                    if _ignorado(entrada.name):
+                        continue
+                    if entrada.is_dir(follow_symlinks=False):
+                        if self.recursivo:
+                            subpastas.add(entrada.path)
+                    elif entrada.is_file():
+                        arquivos[entrada.name] = entrada.path
+        except OSError:
+            return 0
+        self._pastas[pasta] = (mtime, arquivos, subpastas)
+        self._nomes = self._invertidos = None
+
+        total = len(arquivos)
+        if recursiva:
+            for subpasta in subpastas:
+                total += self._ler_pasta(subpasta)
+        return total
+
+    def _remover_pasta(self, pasta):
+        _, arquivos, subpastas = self._pastas.pop(pasta)
+        self._nomes = self._invertidos = None
+        total = len(arquivos)
+        for subpasta in subpastas:
+            if subpasta in self._pastas:
+                total += self._remover_pasta(subpasta)
+        return total
+
+    def _ordenados(self):
+        """(nome em minúsculas, caminho) ordenados pelo nome e pelo nome invertido"""
+        if self._nomes is None:
+            entradas = [
+                (nome.lower(), caminho)
+                for _, arquivos, _ in self._pastas.values()
+                for nome, caminho in arquivos.items()
+            ]
+            self._nomes = sorted(entradas)
+            self._invertidos = sorted((nome[::-1], caminho) for nome, caminho in entradas)
+        return self._nomes, self._invertidos
+
+    def associar(self, valores, padrao=PADRAO_ANEXOS):
+        """{valor: [caminhos]} para os valores (ex.: uma coluna do CSV) com arquivo correspondente.
+
+        `padrao` é um glob sobre o nome do arquivo com {valor} no lugar do
+        valor (ex.: "NF_{valor}*.pdf") ou, com o prefixo "re:", uma
+        expressão regular com {valor} ou o grupo (?P<valor>...). A
+        comparação ignora maiúsculas e espaços nas pontas do valor.
+        """
+        valores = {valor: valor.strip().lower() for valor in valores if valor and valor.strip()}
+        if padrao.startswith(PREFIXO_REGEX):
+            return self._associar_regex(valores, padrao[len(PREFIXO_REGEX):])
+        return self._associar_glob(valores, padrao.lower())
+
+    def _associar_glob(self, valores, padrao):
+        if padrao.count('{valor}') != 1:
+            raise ValueError("o padrão glob precisa conter {valor} exatamente uma vez")
+        # As metades do glob são compiladas uma vez; o valor é procurado literalmente entre elas
+        antes, depois = padrao.split('{valor}')
+        casa_antes = re.compile(fnmatch.translate(antes)).match
+        casa_depois = re.compile(fnmatch.translate(depois)).match
+
+        nomes, invertidos = self._ordenados()
+        associacoes = {}
+        for valor, chave in valores.items():
+            concreto = antes + glob.escape(chave) + depois
+            encontrados = []
+            for nome, caminho in self._candidatos(concreto, nomes, invertidos):
+                i = nome.find(chave)
+                while i != -1:
+                    if casa_antes(nome, 0, i) and casa_depois(nome, i + len(chave)):
+                        encontrados.append(caminho)
+                        break
+                    i = nome.find(chave, i + 1)
+            if encontrados:
+                associacoes[valor] = sorted(encontrados)
+        return associacoes
+
+    @staticmethod
+    def _candidatos(concreto, nomes, invertidos):
+        """Nomes que começam (ou terminam) com o trecho literal do padrão, por busca binária"""
+        prefixo = _prefixo_literal(concreto)
+        sufixo = _sufixo_literal(concreto)
+        if prefixo or not sufixo:
+            # Sem trecho literal nas pontas ("*{valor}*") a busca percorre todos os nomes
+            for i in range(bisect.bisect_left(nomes, (prefixo,)), len(nomes)):
+                nome, caminho = nomes[i]
+                if not nome.startswith(prefixo):
+                    break
+                yield nome, caminho
+        else:
+            invertido = sufixo[::-1]
+            for i in range(bisect.bisect_left(invertidos, (invertido,)), len(invertidos)):
+                nome, caminho = invertidos[i]
+                if not nome.startswith(invertido):
+                    break
+                yield nome[::-1], caminho
+
+    def _associar_regex(self, valores, padrao):
+        if '(?P<valor>' not in padrao:
+            padrao = padrao.replace('{valor}', '(?P<valor>.+?)')
+        expressao = re.compile(padrao, re.IGNORECASE)
+        if 'valor' not in expressao.groupindex:
+            raise ValueError("o padrão regex precisa de {valor} ou do grupo (?P<valor>...)")
+
+        # Uma passada pelos arquivos: o grupo 'valor' de cada nome é a chave
+        por_chave = {}
+        for nome, caminho in self._ordenados()[0]:
+            achado = expressao.fullmatch(nome)
+            if achado:
+                por_chave.setdefault(achado.group('valor').strip().lower(), []).append(caminho)
+        return {valor: sorted(por_chave[chave]) for valor, chave in valores.items() if chave in por_chave}
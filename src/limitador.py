@@ -0,0 +1,125 @@
+"""Limitador de taxa (token bucket) compartilhado pelas conexões SMTP"""
+import smtplib
+import threading
+import time
+
+
+# Janelas suportadas no config.ini (chave -> segundos)
+JANELAS = {
+    'por_segundo': 1,
+    'por_minuto': 60,
+    'por_hora': 3600,
+}
+
+# Sem configuração específica mantém o ritmo antigo: 1 mensagem por segundo
+LIMITES_PADRAO = {'por_segundo': 1, 'rajada': 1}
+
+
+def codigo_smtp(erro):
+    """Extrai o código de resposta SMTP de uma exceção do smtplib (ou None)"""
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        codigos = [codigo for codigo, _ in erro.recipients.values()]
+        return min(codigos) if codigos else None
+    return getattr(erro, 'smtp_code', None)
+
+
+class _Balde:
+    __slots__ = ('capacidade', 'taxa', 'tokens')
+
+    def __init__(self, capacidade, taxa):
+        self.capacidade = capacidade
+        self.taxa = taxa  # tokens por segundo
+        self.tokens = capacidade
+
+
+class LimitadorTaxa:
+    """Token bucket com limites por segundo/minuto/hora e rajada máxima.
+
+    Uma única instância é compartilhada por todas as conexões do pool; o
+    ritmo efetivo cai pela metade a cada resposta 4xx do servidor e volta
+    a subir aos poucos conforme os envios são aceitos.
+    """
+
+    def __init__(self, por_segundo=None, por_minuto=None, por_hora=None, rajada=None,
+                 pausa_limitacao=10.0):
+        self._lock = threading.Lock()
+        self._baldes = []
+        limites = {'por_segundo': por_segundo, 'por_minuto': por_minuto, 'por_hora': por_hora}
+        for chave, limite in limites.items():
+            if not limite:
+                continue
+            capacidade = min(limite, rajada) if rajada else limite
+            self._baldes.append(_Balde(max(1.0, float(capacidade)), limite / JANELAS[chave]))
+
+        self.pausa_limitacao = pausa_limitacao
+        self.fator = 1.0
+        self._pausa_ate = 0.0
+        self._ultimo = time.monotonic()
+
+    @classmethod
+    def do_config(cls, config, servidor):
+        """Cria o limitador a partir da seção [limites:<servidor>] do config.ini"""
+        secao = f'limites:{servidor}'
+        if not config.has_section(secao):
+            return cls(**LIMITES_PADRAO)
+
+        valores = {}
+        for chave in list(JANELAS) + ['rajada']:
+            valor = config.getfloat(secao, chave, fallback=0)
+            valores[chave] = valor or None
+        pausa = config.getfloat(secao, 'pausa_limitacao', fallback=10.0)
+        return cls(pausa_limitacao=pausa, **valores)
+
+    def _reabastecer(self, agora):
+        decorrido = agora - self._ultimo
+        self._ultimo = agora
+        if agora < self._pausa_ate:
+            return  # Não acumula tokens durante a pausa imposta pelo servidor
+        for balde in self._baldes:
+            balde.tokens = min(balde.capacidade, balde.tokens + decorrido * balde.taxa * self.fator)
+
+    def taxa(self):
+        """Ritmo sustentado (mensagens por segundo) do limite mais restritivo; None se ilimitado"""
+        if not self._baldes:
+            return None
+        return min(balde.taxa for balde in self._baldes) * self.fator
+
+    def tentar(self):
+        """Consome um token se houver; senão retorna quantos segundos faltam (sem bloquear)"""
+        with self._lock:
+            agora = time.monotonic()
+            self._reabastecer(agora)
+
+            espera = self._pausa_ate - agora
+            for balde in self._baldes:
+                if balde.tokens < 1:
+                    espera = max(espera, (1 - balde.tokens) / (balde.taxa * self.fator))
+
+            if espera <= 0:
+                for balde in self._baldes:
+                    balde.tokens -= 1
+                return 0.0
+            return espera
+
+    def aguardar(self):
+        """Bloqueia apenas o tempo necessário até haver um token disponível"""
+        espera = self.tentar()
+        while espera > 0:
+            time.sleep(espera)
+            espera = self.tentar()
+
+    def registrar_sucesso(self):
+        """Recupera gradualmente o ritmo após envios aceitos"""
+        with self._lock:
+            if self.fator < 1.0:
+                self.fator = min(1.0, self.fator + 0.05)
+
+    def reduzir(self):
+        """Reage a uma resposta 4xx: pausa todas as conexões e reduz o ritmo"""
+        with self._lock:
+            self._reabastecer(time.monotonic())
+            self.fator = max(0.05, self.fator / 2)
+            self._pausa_ate = time.monotonic() + self.pausa_limitacao
+            for balde in self._baldes:
+                balde.tokens = 0
+        return self.fator
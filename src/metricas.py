@@ -0,0 +1,183 @@
+"""Métricas de envio: tempo por fase, contadores e exportação"""
+import bisect
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Limites superiores (segundos) dos intervalos dos histogramas
+LIMITES_HISTOGRAMA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Fases medidas pelo motor, na ordem em que aparecem nos relatórios
+FASES = ('conectar', 'login', 'montar', 'anexos', 'envio')
+
+
+class Histograma:
+    """Contagem por intervalo fixo de duração, no formato dos histogramas Prometheus"""
+    __slots__ = ('contagens', 'quantidade', 'soma', 'maximo')
+
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_HISTOGRAMA) + 1)
+        self.quantidade = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, duracao):
+        self.contagens[bisect.bisect_left(LIMITES_HISTOGRAMA, duracao)] += 1
+        self.quantidade += 1
+        self.soma += duracao
+        if duracao > self.maximo:
+            self.maximo = duracao
+
+    def percentil(self, fracao):
+        """Percentil aproximado pelo limite superior do intervalo que o contém"""
+        if not self.quantidade:
+            return 0.0
+        alvo = fracao * self.quantidade
+        acumulado = 0
+        for limite, contagem in zip(LIMITES_HISTOGRAMA, self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def resumo(self):
+        return {
+            'quantidade': self.quantidade,
+            'total_s': round(self.soma, 6),
+            'media_s': round(self.soma / self.quantidade, 6) if self.quantidade else 0.0,
+            'p50_s': round(self.percentil(0.5), 6),
+            'p99_s': round(self.percentil(0.99), 6),
+            'max_s': round(self.maximo, 6),
+        }
+
+
+class MetricasEnvio:
+    """Coleta as métricas de uma campanha; compartilhada por todas as conexões.
+
+    Cada medição custa um perf_counter e um lock curto, então pode ficar
+    ligada sempre. `resumo()` devolve uma cópia consistente para a tela,
+    os relatórios e o endpoint HTTP.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fases = {fase: Histograma() for fase in FASES}
+        self._contadores = {}
+        self._medidores = {}
+        self.inicio = time.monotonic()
+
+    @contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(fase, time.perf_counter() - inicio)
+
+    def registrar(self, fase, duracao):
+        with self._lock:
+            histograma = self._fases.get(fase)
+            if histograma is None:
+                histograma = self._fases[fase] = Histograma()
+            histograma.registrar(duracao)
+
+    def contar(self, nome, quantidade=1):
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + quantidade
+
+    def definir(self, nome, valor):
+        """Valor instantâneo (ex.: profundidade da fila de mensagens prontas)"""
+        with self._lock:
+            self._medidores[nome] = valor
+
+    def resumo(self):
+        with self._lock:
+            decorrido = time.monotonic() - self.inicio
+            enviados = self._contadores.get('enviados', 0)
+            return {
+                'decorrido_s': round(decorrido, 3),
+                'mensagens_por_segundo': round(enviados / decorrido, 3) if decorrido > 0 else 0.0,
+                'contadores': dict(self._contadores),
+                'medidores': dict(self._medidores),
+                'fases': {fase: h.resumo() for fase, h in self._fases.items()},
+            }
+
+    def texto_prometheus(self):
+        """Métricas no formato de texto do Prometheus"""
+        with self._lock:
+            linhas = [
+                "# HELP envio_fase_segundos Duração de cada fase do envio",
+                "# TYPE envio_fase_segundos histogram",
+            ]
+            for fase, h in self._fases.items():
+                acumulado = 0
+                for limite, contagem in zip(LIMITES_HISTOGRAMA, h.contagens):
+                    acumulado += contagem
+                    linhas.append(f'envio_fase_segundos_bucket{{fase="{fase}",le="{limite}"}} {acumulado}')
+                linhas.append(f'envio_fase_segundos_bucket{{fase="{fase}",le="+Inf"}} {h.quantidade}')
+                linhas.append(f'envio_fase_segundos_sum{{fase="{fase}"}} {h.soma}')
+                linhas.append(f'envio_fase_segundos_count{{fase="{fase}"}} {h.quantidade}')
+            linhas.append("# TYPE envio_eventos_total counter")
+            for nome, valor in sorted(self._contadores.items()):
+                linhas.append(f'envio_eventos_total{{evento="{nome}"}} {valor}')
+            linhas.append("# TYPE envio_medidor gauge")
+            for nome, valor in sorted(self._medidores.items()):
+                linhas.append(f'envio_medidor{{nome="{nome}"}} {valor}')
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, pasta, campanha):
+        """Grava metricas_<campanha>.json e .csv em `pasta`; retorna os caminhos"""
+        os.makedirs(pasta, exist_ok=True)
+        resumo = self.resumo()
+        resumo['campanha'] = campanha
+        base = os.path.join(pasta, f"metricas_{campanha}")
+
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+        with open(base + '.csv', 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['fase', 'quantidade', 'total_s', 'media_s', 'p50_s', 'p99_s', 'max_s'])
+            for fase, valores in resumo['fases'].items():
+                writer.writerow([fase] + [valores[c] for c in
+                                          ('quantidade', 'total_s', 'media_s', 'p50_s', 'p99_s', 'max_s')])
+            writer.writerow([])
+            writer.writerow(['contador', 'valor'])
+            writer.writerow(['mensagens_por_segundo', resumo['mensagens_por_segundo']])
+            for nome, valor in sorted(resumo['contadores'].items()):
+                writer.writerow([nome, valor])
+        return base + '.json', base + '.csv'
+
+
+class ServidorMetricas:
+    """Endpoint HTTP local (GET /metrics) com as métricas no formato Prometheus"""
+
+    def __init__(self, metricas, porta, host='127.0.0.1'):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                corpo = metricas.texto_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer((host, porta), Handler)
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_address[1]
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
@@ -0,0 +1,447 @@
+"""Motor de envio com asyncio: muitas sessões SMTP numa única thread.
+
+Alternativa ao pool de threads para servidores que aceitam dezenas ou
+centenas de conexões simultâneas. As sessões são corrotinas sobre
+asyncio.open_connection, então cada conexão ociosa custa um socket e não
+uma thread. Montagem das mensagens, agendamento por domínio, limitador,
+diário e classificação de falhas são os mesmos do MotorEnvio.
+"""
+import asyncio
+import base64
+import functools
+import smtplib
+import socket
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from motor_envio import MotorEnvio, membros_lote
+
+
+_FIM = object()
+
+
+async def _em_memoria(blocos):
+    for bloco in blocos:
+        yield bloco
+
+
+async def _ler_em_thread(blocos):
+    """Percorre `blocos` (leitura de arquivos) numa thread, adiantando o próximo bloco enquanto o atual é enviado"""
+    blocos = iter(blocos)
+    proximo = asyncio.ensure_future(asyncio.to_thread(next, blocos, _FIM))
+    try:
+        while True:
+            bloco = await proximo
+            if bloco is _FIM:
+                break
+            proximo = asyncio.ensure_future(asyncio.to_thread(next, blocos, _FIM))
+            yield bloco
+    finally:
+        # Envio interrompido: espera a leitura em curso para fechar os arquivos
+        if not proximo.done():
+            await asyncio.wait([proximo])
+        blocos.close()
+
+
+class ClienteSMTPAsync:
+    """Cliente SMTP mínimo sobre asyncio (EHLO, STARTTLS, AUTH, MAIL/RCPT/DATA).
+
+    Levanta as mesmas exceções do smtplib para que a classificação de
+    falhas e as mensagens de log sejam idênticas às do motor com threads.
+    Com a extensão PIPELINING, MAIL, RCPT e DATA vão num único envio.
+    """
+
+    def __init__(self, host, porta, timeout=20, seguranca='starttls'):
+        self.host = host
+        self.porta = porta
+        self.timeout = timeout
+        self.seguranca = seguranca
+        self.extensoes = {}
+        self._leitor = None
+        self._escritor = None
+
+    async def conectar(self):
+        contexto = ssl.create_default_context()
+        try:
+            self._leitor, self._escritor = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.porta, ssl=contexto if self.seguranca == 'ssl' else None),
+                self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise socket.timeout(f"tempo esgotado ao conectar a {self.host}:{self.porta}")
+
+        try:
+            codigo, resposta = await self._resposta()
+            if codigo != 220:
+                raise smtplib.SMTPConnectError(codigo, resposta)
+            await self.ehlo()
+
+            if self.seguranca == 'starttls':
+                if 'starttls' not in self.extensoes:
+                    raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+                codigo, resposta = await self.comando('STARTTLS')
+                if codigo != 220:
+                    raise smtplib.SMTPResponseException(codigo, resposta)
+                await self._escritor.start_tls(contexto, server_hostname=self.host)
+                await self.ehlo()
+        except BaseException:
+            # Falha no meio da saudação: o socket aberto não pode ficar para trás
+            await self.encerrar()
+            raise
+
+    async def ehlo(self):
+        codigo, resposta = await self.comando(f'EHLO {socket.getfqdn()}')
+        if codigo != 250:
+            raise smtplib.SMTPHeloError(codigo, resposta)
+        self.extensoes = {}
+        for linha in resposta.decode('latin-1').splitlines()[1:]:
+            nome, _, parametros = linha.partition(' ')
+            self.extensoes[nome.lower()] = parametros.strip()
+
+    async def login(self, usuario, senha):
+        metodos = self.extensoes.get('auth', '').upper().split()
+        if 'PLAIN' in metodos or 'LOGIN' not in metodos:
+            credencial = base64.b64encode(f"\0{usuario}\0{senha}".encode('utf-8')).decode('ascii')
+            codigo, resposta = await self.comando(f'AUTH PLAIN {credencial}')
+        else:
+            codigo, resposta = await self.comando('AUTH LOGIN')
+            for valor in (usuario, senha):
+                if codigo != 334:
+                    break
+                codigo, resposta = await self.comando(base64.b64encode(valor.encode('utf-8')).decode('ascii'))
+        if codigo not in (235, 503):
+            raise smtplib.SMTPAuthenticationError(codigo, resposta)
+
+    async def _resposta(self):
+        """Lê uma resposta completa (várias linhas "250-...") e retorna (código, texto)"""
+        linhas = []
+        while True:
+            try:
+                linha = await asyncio.wait_for(self._leitor.readline(), self.timeout)
+            except asyncio.TimeoutError:
+                raise socket.timeout("tempo esgotado aguardando resposta do servidor")
+            if not linha:
+                self.fechar()
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            linhas.append(linha[4:].rstrip(b'\r\n'))
+            if linha[3:4] != b'-':
+                break
+        try:
+            codigo = int(linha[:3])
+        except ValueError:
+            codigo = -1
+        return codigo, b'\n'.join(linhas)
+
+    async def _escrever(self, dados):
+        if self._escritor is None:
+            raise smtplib.SMTPServerDisconnected("please run connect() first")
+        self._escritor.write(dados)
+        try:
+            await asyncio.wait_for(self._escritor.drain(), self.timeout)
+        except asyncio.TimeoutError:
+            raise socket.timeout("tempo esgotado enviando dados ao servidor")
+        except ConnectionError:
+            self.fechar()
+            raise smtplib.SMTPServerDisconnected("Server not connected")
+
+    async def comando(self, linha):
+        await self._escrever(f'{linha}\r\n'.encode('utf-8'))
+        return await self._resposta()
+
+    async def _recusar(self, codigo, excecao):
+        """Fecha a sessão no 421 ou desfaz a transação, depois levanta a exceção"""
+        if codigo == 421:
+            self.fechar()
+        else:
+            await self.comando('RSET')
+        raise excecao
+
+    async def enviar(self, remetente, destinatarios, blocos):
+        """Transmite a mensagem (blocos já com CRLF e ponto duplicado).
+
+        Mesmo contrato do smtplib.sendmail: retorna os destinatários
+        recusados quando ao menos um foi aceito. `blocos` pode ser um
+        iterável comum ou assíncrono.
+        """
+        if not hasattr(blocos, '__aiter__'):
+            blocos = _em_memoria(blocos)
+        comandos = [f'MAIL FROM:<{remetente}>'] + [f'RCPT TO:<{d}>' for d in destinatarios] + ['DATA']
+        if 'pipelining' in self.extensoes:
+            await self._escrever(''.join(f'{c}\r\n' for c in comandos).encode('utf-8'))
+            respostas = []
+            for _ in comandos:
+                respostas.append(await self._resposta())
+                # Depois de um 421 o servidor fecha a conexão: as demais respostas não vêm
+                if respostas[-1][0] == 421:
+                    break
+        else:
+            respostas = []
+            for c in comandos:
+                if c == 'DATA' and not any(codigo in (250, 251) for codigo, _ in respostas[1:]):
+                    break  # nenhum destinatário aceito: não abre o DATA
+                respostas.append(await self.comando(c))
+                # Sem pipelining dá para parar no primeiro erro fatal
+                if respostas[-1][0] == 421 or (len(respostas) == 1 and respostas[0][0] != 250):
+                    break
+
+        codigo, resposta = respostas[0]
+        if codigo != 250:
+            await self._recusar(codigo, smtplib.SMTPSenderRefused(codigo, resposta, remetente))
+
+        recusados = {}
+        for destinatario, (codigo, resposta) in zip(destinatarios, respostas[1:]):
+            if codigo not in (250, 251):
+                recusados[destinatario] = (codigo, resposta)
+            if codigo == 421:
+                self.fechar()
+                raise smtplib.SMTPRecipientsRefused(recusados)
+
+        codigo, resposta = respostas[-1] if len(respostas) == len(comandos) else (None, b'')
+        if len(recusados) == len(destinatarios):
+            if codigo == 354:
+                # Com pipelining o DATA já foi aceito: encerra a transação vazia
+                await self._escrever(b".\r\n")
+                await self._resposta()
+            await self._recusar(None, smtplib.SMTPRecipientsRefused(recusados))
+        if codigo != 354:
+            await self._recusar(codigo, smtplib.SMTPDataError(codigo, resposta))
+
+        # Terminador junto com o último bloco, como em envio_streaming.enviar_blocos
+        anterior = b""
+        async for bloco in blocos:
+            if anterior:
+                await self._escrever(anterior)
+            anterior = bloco
+        await self._escrever(anterior + b".\r\n")
+
+        codigo, resposta = await self._resposta()
+        if codigo != 250:
+            await self._recusar(codigo, smtplib.SMTPDataError(codigo, resposta))
+        return recusados
+
+    async def quit(self):
+        try:
+            await self.comando('QUIT')
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    async def encerrar(self):
+        """Fecha a conexão e espera o transporte ser liberado"""
+        escritor = self._escritor
+        self.fechar()
+        if escritor is not None:
+            try:
+                await asyncio.wait_for(escritor.wait_closed(), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                pass
+
+
+class _FilaProntas:
+    """asyncio.Queue limitada, alimentada pelas threads construtoras"""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.fila = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, item):
+        # Bloqueia a thread construtora enquanto a fila estiver cheia
+        asyncio.run_coroutine_threadsafe(self.fila.put(item), self.loop).result()
+
+
+class MotorEnvioAsync(MotorEnvio):
+    """MotorEnvio com as sessões SMTP como corrotinas de um único event loop.
+
+    Mantém o contrato do motor com threads (mesmo construtor, callbacks
+    ao_log/ao_detalhe/ao_progresso e executar() retornando bool); só a
+    etapa de envio muda. As mensagens continuam sendo montadas por threads
+    construtoras, fora do event loop; anexos grandes são lidos em threads
+    e o diário e o agendador são atualizados numa thread de registro, para
+    que disco e locks não parem as demais sessões.
+    """
+
+    async def _registrar(self, funcao, *args):
+        """Executa `funcao` na thread de registro (diário SQLite e agendador)"""
+        return await asyncio.get_running_loop().run_in_executor(self._registro, funcao, *args)
+
+    async def _conectar_async(self, relay):
+        seguranca = self._modo_seguranca(relay)
+        cliente = ClienteSMTPAsync(relay.servidor, relay.porta, timeout=20, seguranca=seguranca)
+        with self.metricas.medir('conectar'):
+            await cliente.conectar()
+        try:
+            with self.metricas.medir('login'):
+                if seguranca != 'nenhuma' or 'auth' in cliente.extensoes:
+                    await cliente.login(relay.usuario, relay.senha)
+        except BaseException:
+            await cliente.encerrar()
+            raise
+        self.metricas.contar('conexoes')
+        return cliente
+
+    async def _aguardar_limitador(self, limitador):
+        espera = limitador.tentar()
+        while espera > 0:
+            await asyncio.sleep(espera)
+            espera = limitador.tentar()
+
+    async def _reconectar_async(self, n, relay):
+        for tentativa in range(1, 4):
+            if not relay.disponivel:
+                break
+            try:
+                cliente = await self._conectar_async(relay)
+                self.ao_log(f"🔄 Conexão {n} reaberta")
+                return cliente
+            except smtplib.SMTPAuthenticationError:
+                break
+            except Exception as e:
+                self.ao_log(f"⚠ Conexão {n}: tentativa {tentativa} de reconexão falhou: {str(e)}")
+                self._falha_relay(relay, e)
+                await asyncio.sleep(2 ** tentativa)
+        return None
+
+    async def _descartar_restantes_async(self, agendador, prontas, total):
+        motivo = self._motivo_interrupcao()
+        restantes = await self._registrar(agendador.cancelar)
+        while True:
+            item = await prontas.fila.get()
+            if item is None:
+                break
+            restantes.append(item.destinatario)
+            await self._registrar(agendador.concluir, item.destinatario)
+        await self._registrar(self._registrar_perdidos, restantes, total, motivo)
+
+    async def _enviador_async(self, n, cliente, relay, agendador, prontas, total):
+        """Corrotina equivalente a MotorEnvio._enviador"""
+        fim_da_fila = False
+        remetente = relay.remetente or self.email_user
+        try:
+            if cliente is None:
+                try:
+                    cliente = await self._conectar_async(relay)
+                    self.ao_log(f"🔗 Conexão {n} aberta ({relay.nome})")
+                except Exception as e:
+                    self.ao_log(f"⚠ Conexão {n} ({relay.nome}) não pôde ser aberta: {str(e)}")
+                    self._falha_relay(relay, e)
+                    return
+
+            while True:
+                item = await prontas.fila.get()
+                if item is None:
+                    fim_da_fila = True
+                    break
+                self.metricas.definir('fila', prontas.fila.qsize())
+
+                destinatario = item.destinatario
+                emails = [membro['email'] for membro in membros_lote(destinatario)]
+                if not relay.reservar(len(emails)):
+                    # Relay fora do rodízio ou sem cota: a mensagem volta para a fila dos demais
+                    await self._registrar(functools.partial(agendador.concluir, destinatario, reenviar_em=0))
+                    self.ao_log(f"↪ Conexão {n} encerrada: relay {relay.nome} indisponível ({relay.motivo})")
+                    break
+                try:
+                    if item.erro is not None:
+                        raise item.erro
+                    await self._aguardar_limitador(relay.limitador)
+                    if item.assinatura is not None:
+                        # A assinatura sai do pool de processos sem bloquear o loop
+                        await asyncio.wrap_future(item.assinatura.futuro)
+                    blocos = self._blocos(item)
+                    if item.anexos_grandes:
+                        blocos = _ler_em_thread(blocos)
+                    with self.metricas.medir('envio'):
+                        recusados = await cliente.enviar(remetente, emails, blocos)
+                except Exception as e:
+                    relay.devolver(len(emails))
+                    if await self._registrar(self._falha_envio, n, e, destinatario, agendador, total, relay):
+                        cliente.fechar()
+                        cliente = await self._reconectar_async(n, relay)
+                        if cliente is None:
+                            self.ao_log(f"⚠ Conexão {n} encerrada após falhas de reconexão")
+                            break
+                    continue
+
+                relay.registrar_sucesso()
+                await self._registrar(self._concluir_envio, n, destinatario, recusados, agendador, total, relay)
+        finally:
+            self._enviadores_ativos -= 1
+            if cliente is not None:
+                try:
+                    await cliente.quit()
+                except Exception:
+                    pass
+            if self._enviadores_ativos == 0 and not fim_da_fila:
+                await self._descartar_restantes_async(agendador, prontas, total)
+
+    async def _abrir_relays_async(self):
+        """Equivalente a MotorEnvio._abrir_relays"""
+        sessoes = {}
+        primeiro_erro = None
+        for relay in self.relays:
+            try:
+                sessoes[relay] = await self._conectar_async(relay)
+            except Exception as e:
+                primeiro_erro = primeiro_erro or e
+                relay.desativar(f"conexão inicial falhou ({str(e)})")
+                self.ao_log(f"⚠ Relay {relay.nome} ({relay.servidor}) fora do rodízio: {str(e)}")
+        if not sessoes:
+            raise primeiro_erro
+        return sessoes
+
+    async def _enviar_async(self, agendador, total_a_enviar):
+        # Uma única thread: os registros saem na ordem em que os envios terminam
+        self._registro = ThreadPoolExecutor(1, thread_name_prefix='registro')
+        try:
+            await self._enviar_sessoes(agendador, total_a_enviar)
+        finally:
+            self._registro.shutdown()
+
+    async def _enviar_sessoes(self, agendador, total_a_enviar):
+        # A primeira conexão de cada relay valida o login antes de abrir as demais
+        sessoes = await self._abrir_relays_async()
+        self.ao_log("✅ Conexão e login realizados com sucesso!")
+
+        conexoes = self._distribuir(sessoes, total_a_enviar)
+        for relay, cliente in sessoes.items():
+            if not relay.disponivel:
+                try:
+                    await cliente.quit()
+                except Exception:
+                    pass
+        self.ao_log(
+            f"📤 Iniciando envio (asyncio) para {total_a_enviar} destinatário(s) em {len(agendador)} domínio(s) "
+            f"com {len(conexoes)} conexão(ões)..."
+        )
+
+        prontas = _FilaProntas(asyncio.get_running_loop(), self.profundidade_fila or 2 * len(conexoes))
+        construtores = [
+            threading.Thread(target=self._construtor, args=(agendador, prontas), daemon=True)
+            for _ in range(self.construtores)
+        ]
+        for t in construtores:
+            t.start()
+        self._enviadores_ativos = len(conexoes)
+        enviadores = [
+            asyncio.create_task(self._enviador_async(n, cliente, relay, agendador, prontas, total_a_enviar))
+            for n, relay, cliente in conexoes
+        ]
+
+        for t in construtores:
+            await asyncio.to_thread(t.join)
+        # Marcadores de fim depois de todas as mensagens, até cada conexão encerrar
+        while not all(t.done() for t in enviadores):
+            try:
+                await asyncio.wait_for(prontas.fila.put(None), 0.2)
+            except asyncio.TimeoutError:
+                pass
+        for t in enviadores:
+            t.result()
+
+    def _enviar(self, agendador, total_a_enviar):
+        asyncio.run(self._enviar_async(agendador, total_a_enviar))
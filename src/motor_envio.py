@@ -0,0 +1,827 @@
+"""Motor de envio em massa, independente da interface gráfica.
+
+Usado tanto pela janela PyQt6 (via EmailThread) quanto pela linha de
+comando; o progresso e o log são repassados por callbacks.
+"""
+import itertools
+import os
+import queue
+import smtplib
+import socket
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+
+from limitador import LimitadorTaxa, codigo_smtp
+from falhas import classificar, deve_suprimir, atraso_reenvio, CONEXAO, TEMPORARIA
+from cache_anexos import CacheAnexos
+from envio_streaming import gerar_mensagem, blocos_dados, enviar_blocos
+from diario import DiarioEnvio, identificar_campanha, ENVIADO, FALHOU, REENVIANDO
+from agendador import AgendadorDominios, ler_limites_dominio, grupo_dominio
+from template import TemplateCompilado, valores_destinatario
+from metricas import MetricasEnvio, ServidorMetricas
+from politica_anexos import PoliticaAnexos, texto_links
+from verificacao import verificar_envio
+from relays import Relay, ler_relays, distribuir_conexoes, LIMITE_FALHAS
+from assinatura_dkim import AssinadorDKIM, fronteira_conteudo
+
+
+class _ConfigValidada:
+    """Fachada do ConfigParser cujos getint/getfloat/getboolean dizem qual chave é inválida"""
+    _TIPOS = {'getint': 'um número inteiro', 'getfloat': 'um número', 'getboolean': 'true ou false'}
+
+    def __init__(self, config):
+        self._config = config
+
+    def __getattr__(self, nome):
+        metodo = getattr(self._config, nome)
+        if nome not in self._TIPOS:
+            return metodo
+
+        def ler(secao, chave, **kwargs):
+            try:
+                return metodo(secao, chave, **kwargs)
+            except ValueError:
+                valor = self._config.get(secao, chave, fallback='')
+                raise ValueError(f"[{secao}] {chave} = {valor!r}: deveria ser {self._TIPOS[nome]}") from None
+        return ler
+
+
+def opcoes_envio(config, smtp_server):
+    """Lê do config.ini as opções de desempenho do motor de envio.
+
+    Valores inválidos levantam ValueError com a seção e a chave, para
+    serem mostrados antes de qualquer conexão.
+    """
+    config = _ConfigValidada(config)
+    return {
+        'conexoes': config.getint('EMAIL', 'conexoes', fallback=1),
+        'limitador': LimitadorTaxa.do_config(config, smtp_server),
+        'cache_anexos_mb': config.getint('EMAIL', 'cache_anexos_mb', fallback=256),
+        'limite_streaming_mb': config.getint('EMAIL', 'limite_streaming_mb', fallback=10),
+        'diario': config.get('EMAIL', 'diario', fallback='envios.db'),
+        'conexoes_por_dominio': config.getint('EMAIL', 'conexoes_por_dominio', fallback=0),
+        'limites_dominio': ler_limites_dominio(config),
+        'construtores': config.getint('EMAIL', 'construtores', fallback=2),
+        'profundidade_fila': config.getint('EMAIL', 'profundidade_fila', fallback=0),
+        'max_tentativas': config.getint('EMAIL', 'max_tentativas', fallback=4),
+        'motor': config.get('EMAIL', 'motor', fallback='threads').strip().lower(),
+        'destinatarios_por_envio': config.getint('EMAIL', 'destinatarios_por_envio', fallback=1),
+        'relatorio_metricas': config.get('EMAIL', 'relatorio_metricas', fallback='relatorios'),
+        'porta_metricas': config.getint('EMAIL', 'porta_metricas', fallback=0),
+        'seguranca': config.get('EMAIL', 'seguranca', fallback='auto').strip().lower(),
+        'compactar_anexos': config.getboolean('EMAIL', 'compactar_anexos', fallback=False),
+        'limite_link_mb': config.getfloat('EMAIL', 'limite_link_mb', fallback=0),
+        'pasta_links': config.get('EMAIL', 'pasta_links', fallback='anexos_compartilhados'),
+        'url_links': config.get('EMAIL', 'url_links', fallback=''),
+        'anexo_ausente': config.get('EMAIL', 'anexo_ausente', fallback='cancelar').strip().lower(),
+        'peso': config.getfloat('EMAIL', 'peso', fallback=1.0),
+        'cota': config.getint('EMAIL', 'cota', fallback=0),
+        'relays': ler_relays(config),
+        'dkim': AssinadorDKIM.do_config(config),
+    }
+
+
+def criar_motor(*args, motor='threads', **kwargs):
+    """Instancia o motor escolhido em [EMAIL] motor: 'threads' (padrão) ou 'asyncio'"""
+    if motor == 'asyncio':
+        from motor_async import MotorEnvioAsync
+        return MotorEnvioAsync(*args, **kwargs)
+    return MotorEnvio(*args, **kwargs)
+
+
+def membros_lote(destinatario):
+    """Destinatários de uma unidade de envio: ele mesmo ou o lote de mensagens idênticas"""
+    return destinatario.get('lote') or [destinatario]
+
+
+class MensagemPronta:
+    """Mensagem já montada: bytes serializados ou, com anexos grandes, o MIME para envio em fluxo"""
+    __slots__ = ('destinatario', 'dados', 'msg', 'anexos_grandes', 'assinatura', 'erro')
+
+    def __init__(self, destinatario):
+        self.destinatario = destinatario
+        self.dados = None
+        self.msg = None
+        self.anexos_grandes = []
+        self.assinatura = None  # AssinaturaPendente com DKIM ativo
+        self.erro = None
+
+
+class MotorEnvio:
+    def __init__(self, lista_para_envio, smtp_server, smtp_port, email_user, email_pass, email_subject,
+                 corpo_template, conexoes=1, limitador=None, cache_anexos_mb=256, limite_streaming_mb=10,
+                 diario='envios.db', campanha=None, conexoes_por_dominio=0, limites_dominio=None,
+                 construtores=2, profundidade_fila=0, max_tentativas=4, destinatarios_por_envio=1,
+                 relatorio_metricas='relatorios', porta_metricas=0, seguranca='auto',
+                 compactar_anexos=False, limite_link_mb=0, pasta_links='anexos_compartilhados', url_links='',
+                 anexo_ausente='cancelar', verificacao=None, relays=None, peso=1.0, cota=0, dkim=None, anexos=None,
+                 ao_log=print, ao_detalhe=None, ao_progresso=None):
+        self.lista_para_envio = lista_para_envio
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.email_user = email_user
+        self.email_pass = email_pass
+        # Assunto e corpo compilados uma vez (ou já compilados pela Campanha); campos %(coluna)s vêm do CSV
+        self.template_assunto = TemplateCompilado.de(email_subject)
+        self.template_corpo = TemplateCompilado.de(corpo_template)
+        self.email_subject = self.template_assunto.texto
+        self.corpo_template = self.template_corpo.texto
+        self.conexoes = max(1, int(conexoes))
+        self.limitador = limitador or LimitadorTaxa(por_segundo=1, rajada=1)
+        self.cache_anexos = CacheAnexos(int(cache_anexos_mb) * 1024 * 1024)
+        # Anexos acima deste tamanho são transmitidos em blocos, sem passar pelo cache
+        self.limite_streaming = int(limite_streaming_mb) * 1024 * 1024
+        # Anexo ausente ou ilegível na verificação prévia: 'cancelar' ou 'avisar' e seguir;
+        # `verificacao` reaproveita um relatório já feito (ex.: pela janela)
+        self.anexo_ausente = anexo_ausente
+        self.verificacao = verificacao
+        # Decisão por arquivo (uma vez na campanha): anexar, anexar zipado ou enviar link
+        self.politica_anexos = PoliticaAnexos(
+            compactar_anexos, int(float(limite_link_mb or 0) * 1024 * 1024), pasta_links, url_links
+        )
+        # Diário em disco (vazio desativa) e identificador usado para retomar a campanha
+        self.caminho_diario = diario
+        # `anexos`: arquivos da lista já reunidos (Campanha.anexos), sem percorrer as linhas
+        if anexos is None and not campanha:
+            anexos = {caminho for destinatario in lista_para_envio for caminho in destinatario.get('arquivos') or ()}
+        self.campanha = campanha or identificar_campanha(self.email_subject, self.corpo_template, anexos)
+        self.diario = None
+        self.suprimidos = set()
+        # Envios simultâneos por domínio de destino (0 = sem limite) e limites específicos ([dominio:...])
+        self.conexoes_por_dominio = max(0, int(conexoes_por_dominio))
+        self.limites_dominio = limites_dominio or {}
+        # Threads que montam mensagens à frente e tamanho da fila de prontas (0 = 2 por conexão)
+        self.construtores = max(1, int(construtores))
+        self.profundidade_fila = max(0, int(profundidade_fila))
+        # Tentativas por destinatário para falhas temporárias (4xx) e quedas de conexão
+        self.max_tentativas = max(1, int(max_tentativas))
+        # Destinatários do mesmo domínio com mensagem idêntica vão numa só transação (1 = desativado)
+        self.destinatarios_por_envio = max(1, int(destinatarios_por_envio))
+        # Tempo por fase e contadores; relatório JSON/CSV ao final (pasta vazia desativa)
+        # e endpoint Prometheus opcional em 127.0.0.1:<porta_metricas>
+        self.metricas = MetricasEnvio()
+        self.relatorio_metricas = relatorio_metricas
+        self.porta_metricas = int(porta_metricas or 0)
+        # 'auto' (SSL na 465, STARTTLS nas demais), 'ssl', 'starttls' ou 'nenhuma' (relay local)
+        self.seguranca = seguranca
+        # Contas extras ([relay:<nome>]) que dividem a fila com a conta principal;
+        # `peso` e `cota` são os da principal (cota 0 = sem limite)
+        self.relays_extras = list(relays or ())
+        self.peso = peso
+        self.cota = cota
+        self.relays = []
+        # AssinadorDKIM opcional: RSA num pool de processos, hash de corpos iguais em cache
+        self.dkim = dkim
+        # Domínio do Message-ID, resolvido uma vez (make_msgid sem domínio consulta o FQDN a cada chamada)
+        self.dominio_msgid = ((dkim.dominio if dkim else '')
+                              or (email_user.rpartition('@')[2] if '@' in email_user else '')
+                              or socket.getfqdn())
+
+        self.ao_log = ao_log
+        # Passos por mensagem/anexo: por padrão vão para o mesmo destino do log
+        self.ao_detalhe = ao_detalhe or ao_log
+        self.ao_progresso = ao_progresso or (lambda progresso: None)
+
+        # Estado compartilhado entre as conexões do pool
+        self._lock = threading.Lock()
+        self._concluidos = 0
+        self._ultimo_progresso = -1
+        self._tentativas = {}
+        self._enviadores_ativos = 0
+
+    def _modo_seguranca(self, relay):
+        if relay.seguranca in ('ssl', 'starttls', 'nenhuma'):
+            return relay.seguranca
+        return 'ssl' if relay.porta == 465 else 'starttls'
+
+    def _conectar(self, relay):
+        """Abre e autentica uma sessão SMTP no relay (SSL na 465, STARTTLS nas demais)"""
+        seguranca = self._modo_seguranca(relay)
+        with self.metricas.medir('conectar'):
+            if seguranca == 'ssl':
+                server = smtplib.SMTP_SSL(host=relay.servidor, port=relay.porta, timeout=20)
+            else:
+                server = smtplib.SMTP(host=relay.servidor, port=relay.porta, timeout=20)
+                if seguranca == 'starttls':
+                    server.starttls()
+                else:
+                    server.ehlo()
+        with self.metricas.medir('login'):
+            # Sem TLS, só autentica se o relay local pedir (anunciar AUTH)
+            if seguranca != 'nenhuma' or server.has_extn('auth'):
+                server.login(relay.usuario, relay.senha)
+        self.metricas.contar('conexoes')
+        return server
+
+    def _montar_mensagem(self, destinatario):
+        """Monta o MIMEMultipart de um destinatário e separa os anexos grandes"""
+        email_dest = destinatario['email']
+        lista_de_anexos = destinatario.get('arquivos', [])
+
+        self.ao_detalhe(f"Preparando e-mail para {email_dest} com {len(lista_de_anexos)} anexo(s)")
+        
+        msg = MIMEMultipart()
+        msg['From'] = self.email_user
+        # Num lote os endereços vão só no envelope (RCPT TO), sem expor a lista
+        msg['To'] = 'undisclosed-recipients:;' if 'lote' in destinatario else email_dest
+        valores = valores_destinatario(destinatario)
+        msg['Subject'] = self.template_assunto.renderizar(valores)
+        # Presentes antes da assinatura para que o DKIM (h=) também os cubra
+        msg['Date'] = formatdate(localtime=True)
+        msg['Message-ID'] = make_msgid(domain=self.dominio_msgid)
+
+        corpo_personalizado = self.template_corpo.renderizar(valores)
+        partes = []
+        links = []
+        anexos_grandes = []
+        incluidos = []
+
+        # Log detalhado dos anexos
+        for idx, caminho_arquivo in enumerate(lista_de_anexos, 1):
+            self.ao_detalhe(f"  Verificando anexo {idx}: {caminho_arquivo}")
+            try:
+                decisao = self.politica_anexos.decidir(caminho_arquivo)
+                if decisao is None:
+                    self.ao_log(f"  ⚠ Arquivo não encontrado: {caminho_arquivo}")
+                    continue
+
+                if decisao.link:
+                    links.append(decisao)
+                elif decisao.tamanho > self.limite_streaming:
+                    anexos_grandes.append(decisao.caminho)
+                    incluidos.append((decisao.caminho, decisao.tamanho, decisao.mtime))
+                else:
+                    with self.metricas.medir('anexos'):
+                        partes.append(self.cache_anexos.parte(decisao.caminho))
+                    incluidos.append((decisao.caminho, decisao.tamanho, decisao.mtime))
+                self.ao_detalhe(f"  ✅ Anexo adicionado: {os.path.basename(decisao.caminho)}")
+            except Exception as e:
+                self.ao_log(f"  ❌ Erro ao processar anexo: {str(e)}")
+                continue
+
+        if links:
+            corpo_personalizado += texto_links(links)
+        msg.attach(MIMEText(corpo_personalizado, 'plain'))
+        for parte in partes:
+            msg.attach(parte)
+        if self.dkim:
+            # Mesmo texto e mesmos anexos geram o mesmo corpo MIME, e o hash DKIM é reaproveitado
+            msg.set_boundary(fronteira_conteudo(corpo_personalizado, incluidos))
+
+        return msg, anexos_grandes
+
+    def _validar_campos(self):
+        """Confere, antes de conectar, se todo campo do template existe para todos"""
+        campos = set(self.template_assunto.campos) | set(self.template_corpo.campos)
+        if campos <= {'nome', 'email'}:
+            return True
+
+        sem_campo = {}
+        vazios = {}
+        for destinatario in self.lista_para_envio:
+            valores = valores_destinatario(destinatario)
+            for campo in campos:
+                if campo not in valores:
+                    sem_campo[campo] = sem_campo.get(campo, 0) + 1
+                elif not valores[campo]:
+                    vazios[campo] = vazios.get(campo, 0) + 1
+
+        for campo, quantidade in sorted(vazios.items()):
+            self.ao_log(f"ℹ️ Campo %({campo})s está vazio para {quantidade} destinatário(s)")
+        for campo, quantidade in sorted(sem_campo.items()):
+            self.ao_log(f"⚠ Campo %({campo})s do template não existe para {quantidade} destinatário(s)")
+        if sem_campo:
+            self.ao_log("⚠ Erro: Ajuste o template ou as colunas do CSV antes de enviar.")
+        return not sem_campo
+
+    def _retomar_campanha(self):
+        """Abre o diário e retorna apenas os destinatários que ainda não receberam"""
+        if not self.caminho_diario:
+            return list(self.lista_para_envio)
+
+        self.diario = DiarioEnvio(self.caminho_diario)
+        estados = self.diario.enfileirar(self.campanha, [d['email'] for d in self.lista_para_envio])
+
+        suprimidos = self.suprimidos = self.diario.suprimidos()
+
+        pendentes = []
+        n_suprimidos = 0
+        for destinatario in self.lista_para_envio:
+            estado = estados.get(destinatario['email'])
+            if estado == ENVIADO:
+                continue
+            if destinatario['email'].strip().lower() in suprimidos:
+                n_suprimidos += 1
+                continue
+            if estado == FALHOU:
+                self.diario.registrar(self.campanha, destinatario['email'], REENVIANDO)
+            pendentes.append(destinatario)
+
+        if n_suprimidos:
+            self.ao_log(f"🚫 {n_suprimidos} destinatário(s) na lista de supressão (recusa definitiva anterior) serão pulados")
+        ja_enviados = len(self.lista_para_envio) - len(pendentes) - n_suprimidos
+        if ja_enviados:
+            self.ao_log(f"⏭ Retomando campanha {self.campanha}: {ja_enviados} destinatário(s) já receberam e serão pulados")
+        return pendentes
+
+    def _agrupar_identicos(self, pendentes):
+        """Junta em lotes os destinatários do mesmo domínio que receberiam a mesma mensagem"""
+        if self.destinatarios_por_envio <= 1:
+            return pendentes
+
+        # Mensagens iguais <=> mesmos anexos e mesmos valores nos campos do template
+        campos = list(dict.fromkeys(self.template_assunto.campos + self.template_corpo.campos))
+        grupos = {}
+        for destinatario in pendentes:
+            chave = (grupo_dominio(destinatario['email']), tuple(destinatario.get('arquivos') or ()))
+            if campos:
+                valores = valores_destinatario(destinatario)
+                chave += tuple(valores.get(campo) for campo in campos)
+            grupos.setdefault(chave, []).append(destinatario)
+
+        unidades = []
+        for membros in grupos.values():
+            for inicio in range(0, len(membros), self.destinatarios_por_envio):
+                lote = membros[inicio:inicio + self.destinatarios_por_envio]
+                unidades.append(lote[0] if len(lote) == 1 else dict(lote[0], lote=lote))
+        if len(unidades) < len(pendentes):
+            self.ao_log(f"📦 {len(pendentes)} destinatário(s) agrupados em {len(unidades)} envio(s) de mensagens idênticas")
+        return unidades
+
+    def _verificar_previamente(self, pendentes):
+        """Inspeciona anexos e destinatários antes de conectar; False cancela o envio"""
+        verificacao = self.verificacao or verificar_envio(pendentes, self.limitador, self.suprimidos)
+        for linha in verificacao.linhas():
+            self.ao_log(linha)
+        # O envio reaproveita tamanho e mtime em vez de consultar o disco de novo
+        self.politica_anexos.estados.update(verificacao.estados())
+        if verificacao.problemas and self.anexo_ausente == 'cancelar':
+            self.ao_log("⚠ Erro: Corrija os anexos acima (ou use anexo_ausente = avisar) antes de enviar.")
+            return False
+        return True
+
+    def _registrar_conclusao(self, total):
+        """Conta um destinatário processado e emite o progresso quando ele muda"""
+        with self._lock:
+            self._concluidos += 1
+            concluidos = self._concluidos
+            progresso = int((concluidos / total) * 100)
+            if progresso != self._ultimo_progresso:
+                self._ultimo_progresso = progresso
+                self.ao_progresso(progresso)
+        return concluidos
+
+    def _construtor(self, agendador, prontas):
+        """Monta e serializa mensagens à frente dos envios (produtor)"""
+        while True:
+            destinatario = agendador.proximo()
+            if destinatario is None:
+                break
+
+            item = MensagemPronta(destinatario)
+            try:
+                with self.metricas.medir('montar'):
+                    item.msg, item.anexos_grandes = self._montar_mensagem(destinatario)
+                    if not item.anexos_grandes:
+                        item.dados = item.msg.as_bytes(policy=item.msg.policy.clone(linesep='\r\n'))
+                if self.dkim:
+                    with self.metricas.medir('dkim'):
+                        item.assinatura = self._assinar(item)
+                if item.dados is not None:
+                    item.msg = None
+            except Exception as e:
+                item.erro = e
+            # Bloqueia quando a fila está cheia: a memória fica limitada à profundidade
+            prontas.put(item)
+
+    def _assinar(self, item):
+        """Calcula o hash do corpo e entrega a assinatura RSA ao pool, sem esperar por ela"""
+        if item.dados is not None:
+            cabecalhos, _, corpo = item.dados.partition(b'\r\n\r\n')
+            blocos = (corpo,)
+        else:
+            # Anexos grandes: o corpo é lido em fluxo só se o hash não estiver em cache
+            blocos = gerar_mensagem(item.msg, item.anexos_grandes, escapar=False)
+            cabecalhos, _, inicio = next(blocos).partition(b'\r\n\r\n')
+            blocos = itertools.chain((inicio,), blocos)
+        # A fronteira deriva do conteúdo, então identifica corpos idênticos
+        return self.dkim.assinar(cabecalhos, blocos, item.msg.get_boundary())
+
+    def _blocos(self, item):
+        """Blocos do DATA de uma mensagem pronta, com o DKIM-Signature à frente quando houver"""
+        prefixo = item.assinatura.cabecalho() if item.assinatura is not None else b''
+        if item.anexos_grandes:
+            return gerar_mensagem(item.msg, item.anexos_grandes, prefixo=prefixo)
+        return blocos_dados(prefixo + item.dados)
+
+    def _reconectar(self, n, relay):
+        """Reabre a sessão de uma conexão que caiu; None se não conseguir"""
+        for tentativa in range(1, 4):
+            if not relay.disponivel:
+                break
+            try:
+                server = self._conectar(relay)
+                self.ao_log(f"🔄 Conexão {n} reaberta")
+                return server
+            except smtplib.SMTPAuthenticationError:
+                break
+            except Exception as e:
+                self.ao_log(f"⚠ Conexão {n}: tentativa {tentativa} de reconexão falhou: {str(e)}")
+                self._falha_relay(relay, e)
+                time.sleep(2 ** tentativa)
+        return None
+
+    def _falha_relay(self, relay, erro):
+        """Conta uma falha do relay e o tira do rodízio se ela se repete e há outro ativo"""
+        falhas = relay.registrar_falha()
+        if falhas < LIMITE_FALHAS:
+            return
+        if not any(outro.disponivel for outro in self.relays if outro is not relay):
+            return
+        if relay.desativar(f"{falhas} falhas seguidas ({str(erro)})"):
+            self.metricas.contar(f'relay_{relay.nome}_desativado')
+            self.ao_log(f"⛔ Relay {relay.nome} fora do rodízio após {falhas} falhas seguidas; a fila segue pelos demais")
+
+    def _tratar_falha(self, n, erro, destinatario, agendador, total, relay, em_andamento=True):
+        """Classifica a falha, reagenda as temporárias e registra as definitivas.
+
+        `em_andamento=False` é usado para um destinatário recusado dentro de
+        um lote: a vaga no agendador é liberada pelo lote, não por ele.
+        Retorna True se a sessão SMTP precisa ser reaberta.
+        """
+        email_dest = destinatario['email']
+        membros = membros_lote(destinatario)
+        rotulo = email_dest if len(membros) == 1 else f"{email_dest} e mais {len(membros) - 1}"
+        tipo = classificar(erro)
+        codigo = codigo_smtp(erro)
+        self.metricas.contar(f'erro_{codigo or tipo}')
+        with self._lock:
+            tentativas = self._tentativas[email_dest] = self._tentativas.get(email_dest, 0) + 1
+
+        # 4xx no RCPT (ex.: greylisting) adia só a caixa; 421 no RCPT pausa o domínio.
+        # 421 fora do RCPT é do servidor inteiro e só reduz a taxa do relay
+        recusa_rcpt = em_andamento and isinstance(erro, smtplib.SMTPRecipientsRefused)
+        pausar_dominio = recusa_rcpt and codigo == 421
+        recusa_caixa = recusa_rcpt and tipo == TEMPORARIA
+        if (tipo == TEMPORARIA and not isinstance(erro, smtplib.SMTPRecipientsRefused)) or codigo == 421:
+            fator = relay.limitador.reduzir()
+            self.ao_log(f"🐢 Servidor pediu para reduzir o ritmo ({codigo}); taxa ajustada para {fator:.0%}")
+            self._falha_relay(relay, erro)
+        elif tipo == CONEXAO:
+            self._falha_relay(relay, erro)
+
+        pausa = 0.0
+        if tipo in (CONEXAO, TEMPORARIA) and tentativas < self.max_tentativas:
+            # Queda de conexão volta logo para a fila; 4xx espera com backoff exponencial
+            atraso = 0.0 if tipo == CONEXAO else atraso_reenvio(tentativas)
+            if self.diario:
+                for membro in membros:
+                    self.diario.registrar(self.campanha, membro['email'], REENVIANDO, str(erro))
+            self.ao_log(
+                f"🔁 Falha temporária para {rotulo} ({codigo or str(erro)}); "
+                f"tentativa {tentativas + 1}/{self.max_tentativas} em {atraso:.0f}s"
+            )
+            self.metricas.contar('reenvios', len(membros))
+            if em_andamento:
+                pausa = agendador.concluir(destinatario, pausar_dominio, reenviar_em=atraso, recusado=recusa_caixa)
+            else:
+                agendador.reenfileirar(destinatario, atraso)
+        else:
+            if deve_suprimir(erro) and self.diario:
+                self.diario.suprimir(email_dest, codigo, str(erro))
+                self.ao_log(f"🚫 {email_dest} incluído na lista de supressão ({codigo})")
+            for membro in membros:
+                if self.diario:
+                    self.diario.registrar(self.campanha, membro['email'], FALHOU, str(erro))
+                self._registrar_conclusao(total)
+            self.metricas.contar('falhas', len(membros))
+            self.ao_log(f"❌ Falha no envio para {rotulo}: {str(erro)}")
+            if em_andamento:
+                pausa = agendador.concluir(destinatario, pausar_dominio, recusado=recusa_caixa)
+
+        if pausa:
+            self.ao_log(f"🐢 Domínio de {email_dest} pausado por {pausa:.0f}s após resposta {codigo}")
+        return tipo == CONEXAO
+
+    def _concluir_envio(self, n, destinatario, recusados, agendador, total, relay):
+        """Registra os aceitos de uma transação; recusados de um lote seguem cada um seu código.
+
+        Se nenhuma caixa foi aceita, as recusas 4xx contam para a pausa do
+        domínio em vez de zerá-la como um envio bem-sucedido.
+        """
+        aceitos = 0
+        recusa_temporaria = False
+        for membro in membros_lote(destinatario):
+            email_dest = membro['email']
+            if email_dest in recusados:
+                erro = smtplib.SMTPRecipientsRefused({email_dest: recusados[email_dest]})
+                recusa_temporaria = recusa_temporaria or classificar(erro) == TEMPORARIA
+                self._tratar_falha(n, erro, membro, agendador, total, relay, em_andamento=False)
+                continue
+            aceitos += 1
+            if self.diario:
+                self.diario.registrar(self.campanha, email_dest, ENVIADO)
+            i = self._registrar_conclusao(total)
+            self.metricas.contar('enviados')
+            self.metricas.contar(f'relay_{relay.nome}_enviados')
+            self.ao_log(f"✅ ({i}/{total}) E-mail enviado para: {email_dest}")
+        self.metricas.contar('transacoes')
+        pausa = agendador.concluir(destinatario, recusado=not aceitos and recusa_temporaria)
+        if pausa:
+            self.ao_log(f"🐢 Domínio de {destinatario['email']} pausado por {pausa:.0f}s após recusas 4xx")
+
+    def _falha_envio(self, n, erro, destinatario, agendador, total, relay):
+        """Trata a exceção de um envio; retorna True se a sessão precisa ser reaberta"""
+        if 'lote' in destinatario and isinstance(erro, smtplib.SMTPRecipientsRefused) and classificar(erro) != CONEXAO:
+            # Todos os destinatários do lote recusados: cada um segue o próprio código
+            self._concluir_envio(n, destinatario, erro.recipients, agendador, total, relay)
+            return False
+        return self._tratar_falha(n, erro, destinatario, agendador, total, relay)
+
+    def _descartar_restantes(self, agendador, prontas, total):
+        """Sem nenhuma conexão ativa: marca como falha tudo o que ainda não foi enviado"""
+        motivo = self._motivo_interrupcao()
+        restantes = agendador.cancelar()
+        while True:
+            item = prontas.get()
+            if item is None:
+                break
+            restantes.append(item.destinatario)
+            agendador.concluir(item.destinatario)
+        self._registrar_perdidos(restantes, total, motivo)
+
+    def _motivo_interrupcao(self):
+        """Loga a interrupção e retorna o motivo gravado no diário para quem ficou sem envio"""
+        self.ao_log("⛔ Nenhuma conexão SMTP ativa; os envios restantes foram interrompidos")
+        motivos = [f"{relay.nome}: {relay.motivo}" for relay in self.relays if relay.motivo]
+        if motivos:
+            self.ao_log("⛔ Relays indisponíveis: " + "; ".join(motivos))
+            return "relays indisponíveis (" + "; ".join(motivos) + ")"
+        return "conexão perdida"
+
+    def _registrar_perdidos(self, restantes, total, motivo="conexão perdida"):
+        for destinatario in restantes:
+            for membro in membros_lote(destinatario):
+                if self.diario:
+                    self.diario.registrar(self.campanha, membro['email'], FALHOU, motivo)
+                self._registrar_conclusao(total)
+
+    def _enviador(self, n, server, relay, agendador, prontas, total):
+        """Envia as mensagens prontas usando uma sessão SMTP própria no relay (consumidor)"""
+        fim_da_fila = False
+        remetente = relay.remetente or self.email_user
+        try:
+            if server is None:
+                try:
+                    server = self._conectar(relay)
+                    self.ao_log(f"🔗 Conexão {n} aberta ({relay.nome})")
+                except Exception as e:
+                    self.ao_log(f"⚠ Conexão {n} ({relay.nome}) não pôde ser aberta: {str(e)}")
+                    self._falha_relay(relay, e)
+                    return
+
+            while True:
+                item = prontas.get()
+                if item is None:
+                    fim_da_fila = True
+                    break
+                self.metricas.definir('fila', prontas.qsize())
+
+                destinatario = item.destinatario
+                emails = [membro['email'] for membro in membros_lote(destinatario)]
+                if not relay.reservar(len(emails)):
+                    # Relay fora do rodízio ou sem cota: a mensagem volta para a fila dos demais
+                    agendador.concluir(destinatario, reenviar_em=0)
+                    self.ao_log(f"↪ Conexão {n} encerrada: relay {relay.nome} indisponível ({relay.motivo})")
+                    break
+                try:
+                    if item.erro is not None:
+                        raise item.erro
+                    relay.limitador.aguardar()
+                    blocos = self._blocos(item)
+                    with self.metricas.medir('envio'):
+                        recusados = enviar_blocos(server, remetente, emails, blocos)
+                except Exception as e:
+                    relay.devolver(len(emails))
+                    if self._falha_envio(n, e, destinatario, agendador, total, relay):
+                        try:
+                            server.close()
+                        except Exception:
+                            pass
+                        server = self._reconectar(n, relay)
+                        if server is None:
+                            self.ao_log(f"⚠ Conexão {n} encerrada após falhas de reconexão")
+                            break
+                    continue
+
+                relay.registrar_sucesso()
+                self._concluir_envio(n, destinatario, recusados, agendador, total, relay)
+        finally:
+            with self._lock:
+                self._enviadores_ativos -= 1
+                ultimo = self._enviadores_ativos == 0
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+            if ultimo and not fim_da_fila:
+                self._descartar_restantes(agendador, prontas, total)
+
+    def _abrir_relays(self):
+        """Primeira conexão de cada relay, que valida o login antes de abrir as demais.
+
+        Um relay extra que falha fica fora do rodízio; o erro só interrompe
+        a campanha se nenhum relay conectar.
+        """
+        sessoes = {}
+        primeiro_erro = None
+        for relay in self.relays:
+            try:
+                sessoes[relay] = self._conectar(relay)
+            except Exception as e:
+                primeiro_erro = primeiro_erro or e
+                relay.desativar(f"conexão inicial falhou ({str(e)})")
+                self.ao_log(f"⚠ Relay {relay.nome} ({relay.servidor}) fora do rodízio: {str(e)}")
+        if not sessoes:
+            raise primeiro_erro
+        return sessoes
+
+    def _distribuir(self, sessoes, total_a_enviar):
+        """[(n, relay, sessão já aberta ou None)] para cada conexão do pool"""
+        conexoes = []
+        distribuicao = distribuir_conexoes(list(sessoes), self.conexoes)
+        for relay, quantidade in distribuicao:
+            for i in range(min(quantidade, total_a_enviar)):
+                conexoes.append((len(conexoes) + 1, relay, sessoes[relay] if i == 0 else None))
+        # Sem conexões na divisão (peso 0): não serve de alternativa para os demais
+        usados = {relay for relay, _ in distribuicao}
+        for relay in sessoes:
+            if relay not in usados:
+                relay.desativar("sem conexões na divisão por peso")
+        if len(self.relays) > 1:
+            self.ao_log("🔀 Relays: " + ", ".join(
+                relay.descricao(sum(1 for _, r, _ in conexoes if r is relay)) for relay in sessoes
+            ))
+        return conexoes
+
+    def _enviar(self, agendador, total_a_enviar):
+        """Abre as conexões e executa o pipeline construtores -> enviadores"""
+        sessoes = self._abrir_relays()
+        self.ao_log("✅ Conexão e login realizados com sucesso!")
+
+        conexoes = self._distribuir(sessoes, total_a_enviar)
+        for relay, server in sessoes.items():
+            if not relay.disponivel:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+        self.ao_log(
+            f"📤 Iniciando envio para {total_a_enviar} destinatário(s) em {len(agendador)} domínio(s) "
+            f"com {len(conexoes)} conexão(ões)..."
+        )
+
+        # Pipeline: construtores preparam as mensagens enquanto as conexões de
+        # todos os relays consomem a mesma fila
+        prontas = queue.Queue(maxsize=self.profundidade_fila or 2 * len(conexoes))
+        construtores = [
+            threading.Thread(target=self._construtor, args=(agendador, prontas), daemon=True)
+            for _ in range(self.construtores)
+        ]
+        self._enviadores_ativos = len(conexoes)
+        enviadores = [
+            threading.Thread(
+                target=self._enviador, args=(n, server, relay, agendador, prontas, total_a_enviar), daemon=True
+            )
+            for n, relay, server in conexoes
+        ]
+        for t in construtores + enviadores:
+            t.start()
+
+        for t in construtores:
+            t.join()
+        # Marcadores de fim depois de todas as mensagens, até cada conexão encerrar
+        while any(t.is_alive() for t in enviadores):
+            try:
+                prontas.put(None, timeout=0.2)
+            except queue.Full:
+                pass
+
+    def _resumir_metricas(self):
+        """Registra no log as principais métricas e grava o relatório da campanha"""
+        resumo = self.metricas.resumo()
+        envio = resumo['fases']['envio']
+        montar = resumo['fases']['montar']
+        self.ao_log(
+            f"📊 {resumo['mensagens_por_segundo']:.1f} msg/s; envio p50 {envio['p50_s'] * 1000:.0f} ms, "
+            f"p99 {envio['p99_s'] * 1000:.0f} ms; montagem p50 {montar['p50_s'] * 1000:.0f} ms"
+        )
+        if self.relatorio_metricas:
+            try:
+                caminho_json, _ = self.metricas.exportar(self.relatorio_metricas, self.campanha)
+                self.ao_log(f"📊 Relatório de métricas salvo em {caminho_json} (e .csv)")
+            except OSError as e:
+                self.ao_log(f"⚠ Não foi possível salvar o relatório de métricas: {str(e)}")
+
+    def executar(self):
+        """Executa a campanha completa; retorna True se o envio foi concluído"""
+        servidor_metricas = None
+        try:
+            # Verificar configurações
+            if not all([self.smtp_server, self.smtp_port, self.email_user, self.email_pass]):
+                self.ao_log("⚠ Erro: Preencha todos os campos de configuração do e-mail e a senha.")
+                return False
+
+            total_a_enviar = len(self.lista_para_envio)
+            if total_a_enviar == 0:
+                self.ao_log("ℹ️ A lista de envio está vazia. Adicione destinatários primeiro.")
+                return False
+
+            if not self._validar_campos():
+                return False
+
+            pendentes = self._retomar_campanha()
+            total_a_enviar = len(pendentes)
+            if total_a_enviar == 0:
+                self.ao_log("✅ Todos os destinatários desta campanha já receberam o e-mail.")
+                return True
+
+            if not self._verificar_previamente(pendentes):
+                return False
+
+            if self.dkim:
+                self.dkim.iniciar()
+                self.ao_log(
+                    f"🔏 Assinatura DKIM ativa (d={self.dkim.dominio}, s={self.dkim.seletor}, "
+                    f"{self.dkim.processos} processo(s))"
+                )
+
+            porta = int(self.smtp_port)
+            self.relays = [
+                Relay('principal', self.smtp_server, porta, self.email_user, self.email_pass,
+                      limitador=self.limitador, seguranca=self.seguranca, peso=self.peso, cota=self.cota)
+            ] + self.relays_extras
+            self.ao_log(f"⏳ Conectando a {self.smtp_server} na porta {porta}...")
+            self.ao_log(f"🔑 Autenticando usuário {self.email_user}...")
+
+            if self.porta_metricas:
+                try:
+                    servidor_metricas = ServidorMetricas(self.metricas, self.porta_metricas)
+                    self.ao_log(f"📊 Métricas em http://127.0.0.1:{servidor_metricas.porta}/metrics")
+                except OSError as e:
+                    self.ao_log(f"⚠ Endpoint de métricas não iniciado: {str(e)}")
+
+            # Filas por domínio, intercaladas entre as conexões do pool
+            agendador = AgendadorDominios(
+                self._agrupar_identicos(pendentes), self.conexoes_por_dominio, self.limites_dominio
+            )
+            self._concluidos = 0
+            self._ultimo_progresso = -1
+            self._tentativas = {}
+            self._enviadores_ativos = 0
+            self._enviar(agendador, total_a_enviar)
+
+            self.ao_log(
+                f"📎 Anexos: {self.cache_anexos.codificados} arquivo(s) codificado(s), "
+                f"{self.cache_anexos.acertos} reaproveitamento(s) do cache"
+            )
+            if self.politica_anexos.compactados or self.politica_anexos.links:
+                self.ao_log(
+                    f"🗜 Anexos: {self.politica_anexos.compactados} compactado(s) em .zip, "
+                    f"{self.politica_anexos.links} enviado(s) como link"
+                )
+            if self.dkim:
+                self.ao_log(
+                    f"🔏 DKIM: {self.dkim.assinadas} mensagem(ns) assinada(s), "
+                    f"{self.dkim.hashes_reaproveitados} hash(es) de corpo reaproveitado(s)"
+                )
+            if self.diario:
+                resumo = self.diario.resumo(self.campanha)
+                self.ao_log(
+                    f"📒 Diário da campanha {self.campanha}: {resumo.get(ENVIADO, 0)} enviado(s), "
+                    f"{resumo.get(FALHOU, 0)} com falha"
+                )
+            self._resumir_metricas()
+            self.ao_log("\n🎉 Processo finalizado!")
+            return True
+
+        except smtplib.SMTPAuthenticationError:
+            self.ao_log("⛔ ERRO DE AUTENTICAÇÃO: Usuário ou senha incorretos.")
+            self.ao_log("ℹ️ DICA: Se usar Gmail/Outlook com 2FA, você precisa de uma 'Senha de App'.")
+            return False
+        except Exception as e:
+            self.ao_log(f"⛔ Erro crítico durante o processo: {str(e)}")
+            return False
+        finally:
+            if servidor_metricas:
+                servidor_metricas.fechar()
+            self.politica_anexos.limpar()
+            if self.dkim:
+                self.dkim.fechar()
+            if self.diario:
+                self.diario.fechar()
+                self.diario = None
@@ -0,0 +1,45 @@
+"""Tempo de cada fase da abertura da janela (enviar.py --profile-startup)"""
+import time
+from contextlib import contextmanager
+
+
+class PerfilInicio:
+    """Cronômetro por fase, a partir de um instante inicial (o início do processo).
+
+    `marcar` fecha a fase que terminou agora; `medir` cronometra um bloco.
+    Fases medidas depois que a janela aparece (abas adiadas) também entram
+    no relatório, separadas do tempo até a primeira pintura.
+    """
+
+    def __init__(self, inicio=None):
+        self.inicio = inicio if inicio is not None else time.perf_counter()
+        self.fases = []
+        self.primeira_pintura = None
+        self._ultimo = self.inicio
+
+    def marcar(self, fase):
+        agora = time.perf_counter()
+        self.fases.append((fase, agora - self._ultimo))
+        self._ultimo = agora
+
+    @contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases.append((fase, time.perf_counter() - inicio))
+            self._ultimo = time.perf_counter()
+
+    def pintou(self):
+        """Registra o instante da primeira pintura da janela"""
+        self.marcar('primeira pintura')
+        self.primeira_pintura = self._ultimo - self.inicio
+
+    def linhas(self):
+        largura = max((len(fase) for fase, _ in self.fases), default=0)
+        linhas = [f"{fase:<{largura}}  {duracao * 1000:8.1f} ms" for fase, duracao in self.fases]
+        if self.primeira_pintura is not None:
+            linhas.append(f"{'até a primeira pintura':<{largura}}  {self.primeira_pintura * 1000:8.1f} ms")
+        linhas.append(f"{'total':<{largura}}  {(self._ultimo - self.inicio) * 1000:8.1f} ms")
+        return linhas
@@ -0,0 +1,148 @@
+"""Política de anexos por tamanho: compactar uma vez ou trocar por link"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+from urllib.parse import quote
+
+
+# Formatos que já são compactados: zipar de novo só gasta CPU
+JA_COMPACTADOS = {
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jpg', '.jpeg', '.png', '.gif',
+    '.webp', '.mp3', '.mp4', '.mov', '.avi', '.mkv', '.docx', '.xlsx', '.pptx', '.odt', '.ods',
+}
+
+# Só fica com a versão zipada se ela economizar ao menos 10%
+GANHO_MINIMO = 0.9
+
+BLOCO_HASH = 1024 * 1024
+
+
+class DecisaoAnexo:
+    """O que fazer com um arquivo: anexar `caminho` (original ou .zip) ou enviar `link`.
+
+    `mtime` é o do original quando a decisão foi tomada.
+    """
+    __slots__ = ('original', 'caminho', 'tamanho', 'mtime', 'link')
+
+    def __init__(self, original, caminho, tamanho, mtime=0, link=None):
+        self.original = original
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.mtime = mtime
+        self.link = link
+
+
+class PoliticaAnexos:
+    """Decide uma única vez por arquivo, durante a campanha, como ele será enviado.
+
+    Com `compactar`, arquivos compactáveis são zipados (deflate) numa pasta
+    temporária e a cópia zipada é anexada a todos os destinatários. Acima
+    de `limite_link_bytes`, o arquivo não é anexado: uma cópia única,
+    endereçada pelo SHA-256 do conteúdo, vai para `pasta_links` e o corpo
+    recebe um link file:// (ou `url_links`/<hash>/<nome>, se configurado).
+    """
+
+    def __init__(self, compactar=False, limite_link_bytes=0, pasta_links='anexos_compartilhados', url_links=''):
+        self.compactar = compactar
+        self.limite_link_bytes = limite_link_bytes
+        self.pasta_links = pasta_links
+        self.url_links = url_links.rstrip('/')
+        self.compactados = 0
+        self.links = 0
+        # Estados já obtidos pela verificação prévia (caminho absoluto -> (bytes, mtime_ns))
+        self.estados = {}
+        self._decisoes = {}
+        self._lock = threading.Lock()
+        self._locks_arquivo = {}
+        self._pasta_temporaria = None
+
+    def decidir(self, caminho):
+        """Decisão (em cache) para `caminho`; None se o arquivo não existir"""
+        chave = os.path.abspath(caminho)
+        decisao = self._decisoes.get(chave)
+        if decisao is not None:
+            return decisao
+
+        # Construtores que pedem o mesmo arquivo ao mesmo tempo esperam uma única decisão
+        with self._lock:
+            lock_arquivo = self._locks_arquivo.setdefault(chave, threading.Lock())
+        with lock_arquivo:
+            decisao = self._decisoes.get(chave)
+            if decisao is None:
+                estado = self.estados.get(chave)
+                if estado is None:
+                    try:
+                        info = os.stat(chave)
+                    except OSError:
+                        return None
+                    estado = (info.st_size, info.st_mtime_ns)
+                decisao = self._decidir(chave, *estado)
+                self._decisoes[chave] = decisao
+        with self._lock:
+            self._locks_arquivo.pop(chave, None)
+        return decisao
+
+    def _decidir(self, caminho, tamanho, mtime):
+        if self.limite_link_bytes and tamanho > self.limite_link_bytes:
+            return DecisaoAnexo(caminho, caminho, tamanho, mtime, link=self._publicar(caminho))
+        if self.compactar and os.path.splitext(caminho)[1].lower() not in JA_COMPACTADOS:
+            compactado = self._compactar(caminho)
+            tamanho_zip = os.path.getsize(compactado)
+            if tamanho_zip <= tamanho * GANHO_MINIMO:
+                with self._lock:
+                    self.compactados += 1
+                return DecisaoAnexo(caminho, compactado, tamanho_zip, mtime)
+            os.remove(compactado)
+        return DecisaoAnexo(caminho, caminho, tamanho, mtime)
+
+    def _compactar(self, caminho):
+        with self._lock:
+            if self._pasta_temporaria is None:
+                self._pasta_temporaria = tempfile.mkdtemp(prefix='anexos_')
+            # Subpasta por arquivo: nomes iguais em pastas diferentes não colidem
+            destino = tempfile.mkdtemp(dir=self._pasta_temporaria)
+        nome = os.path.basename(caminho)
+        compactado = os.path.join(destino, os.path.splitext(nome)[0] + '.zip')
+        with zipfile.ZipFile(compactado, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+            arquivo_zip.write(caminho, arcname=nome)
+        return compactado
+
+    def _publicar(self, caminho):
+        """Copia o arquivo (uma vez por conteúdo) para a pasta de links e retorna a URL"""
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(BLOCO_HASH), b''):
+                sha.update(bloco)
+        nome = os.path.basename(caminho)
+        destino = os.path.join(self.pasta_links, sha.hexdigest(), nome)
+        if not os.path.exists(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporario = destino + '.parcial'
+            shutil.copyfile(caminho, temporario)
+            os.replace(temporario, destino)
+        with self._lock:
+            self.links += 1
+        if self.url_links:
+            return f"{self.url_links}/{sha.hexdigest()}/{quote(nome)}"
+        return Path(destino).resolve().as_uri()
+
+    def limpar(self):
+        """Remove as cópias zipadas temporárias (os links publicados permanecem)"""
+        if self._pasta_temporaria:
+            shutil.rmtree(self._pasta_temporaria, ignore_errors=True)
+            self._pasta_temporaria = None
+        self._decisoes.clear()
+
+
+def texto_links(decisoes):
+    """Parágrafo acrescentado ao corpo com os arquivos enviados como link"""
+    linhas = ["", "", "Arquivos disponíveis para download:"]
+    for decisao in decisoes:
+        linhas.append(
+            f"- {os.path.basename(decisao.original)} ({decisao.tamanho / 1024 / 1024:.1f} MB): {decisao.link}"
+        )
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,52 @@
+"""Registro do envio: buffer limitado para a tela e arquivo rotativo completo"""
+import logging
+import logging.handlers
+import threading
+import time
+from collections import deque
+
+
+class RegistroEnvio:
+    """Recebe linhas de log de qualquer thread sem emitir um sinal por linha.
+
+    As mensagens ficam num buffer circular que a interface esvazia em lotes
+    (`coletar`); se a tela não acompanhar, as mais antigas são descartadas e
+    apenas contadas. Tudo, inclusive os detalhes por anexo, vai para um
+    arquivo com rotação por tamanho.
+    """
+
+    def __init__(self, arquivo='envio.log', max_bytes=5 * 1024 * 1024, backups=5, max_pendentes=5000):
+        self._lock = threading.Lock()
+        self._pendentes = deque(maxlen=max_pendentes)
+        self.descartadas = 0
+
+        self._logger = logging.getLogger('email_sender')
+        self._logger.setLevel(logging.DEBUG)
+        self._logger.propagate = False
+        if arquivo and not self._logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                arquivo, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._logger.addHandler(handler)
+
+    def escrever(self, message):
+        """Linha exibida na tela e gravada no arquivo"""
+        timestamp = time.strftime("%H:%M:%S", time.localtime())
+        with self._lock:
+            if len(self._pendentes) == self._pendentes.maxlen:
+                self.descartadas += 1
+            self._pendentes.append(f"[{timestamp}] {message}")
+        self._logger.info(message)
+
+    def detalhe(self, message):
+        """Linha apenas para o arquivo (passos por mensagem e por anexo)"""
+        self._logger.debug(message)
+
+    def coletar(self):
+        """Retorna (linhas pendentes, quantas foram descartadas) e esvazia o buffer"""
+        with self._lock:
+            linhas = list(self._pendentes)
+            self._pendentes.clear()
+            descartadas, self.descartadas = self.descartadas, 0
+        return linhas, descartadas
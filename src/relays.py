@@ -0,0 +1,133 @@
+"""Contas SMTP (relays) usadas em paralelo numa mesma campanha"""
+import os
+import threading
+
+from limitador import LimitadorTaxa
+
+
+# Falhas seguidas do lado do servidor que tiram um relay do rodízio (se houver outro)
+LIMITE_FALHAS = 5
+
+
+class Relay:
+    """Uma conta SMTP com seu limite de taxa, cota, peso e estado de saúde.
+
+    As conexões de todos os relays consomem a mesma fila de mensagens
+    prontas; quando um relay fica indisponível (falhas seguidas, conexão
+    perdida ou cota atingida), suas conexões param de consumir e o que
+    ainda está na fila segue pelos demais.
+    """
+
+    def __init__(self, nome, servidor, porta, usuario, senha, limitador=None, seguranca='auto',
+                 peso=1.0, cota=0, conexoes=0, remetente=''):
+        self.nome = nome
+        self.servidor = servidor
+        self.porta = int(porta)
+        self.usuario = usuario
+        self.senha = senha
+        self.limitador = limitador or LimitadorTaxa(por_segundo=1, rajada=1)
+        self.seguranca = seguranca
+        self.peso = max(0.0, float(peso))
+        self.cota = max(0, int(cota or 0))
+        self.conexoes = max(0, int(conexoes or 0))
+        # Endereço do MAIL FROM; vazio usa o remetente da campanha (conta principal)
+        self.remetente = remetente
+        self.enviados = 0
+        self.falhas_seguidas = 0
+        self.motivo = None  # por que ficou indisponível; None = disponível
+        self._lock = threading.Lock()
+
+    @property
+    def disponivel(self):
+        return self.motivo is None
+
+    def reservar(self, quantidade):
+        """Reserva `quantidade` envios da cota; False se o relay não pode mais enviar"""
+        with self._lock:
+            if self.motivo is not None:
+                return False
+            if self.cota and self.enviados + quantidade > self.cota:
+                self.motivo = f"cota de {self.cota} envio(s) atingida"
+                return False
+            self.enviados += quantidade
+            return True
+
+    def devolver(self, quantidade):
+        """Devolve à cota uma reserva que não foi entregue"""
+        with self._lock:
+            self.enviados -= quantidade
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.falhas_seguidas = 0
+        self.limitador.registrar_sucesso()
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            return self.falhas_seguidas
+
+    def desativar(self, motivo):
+        with self._lock:
+            if self.motivo is None:
+                self.motivo = motivo
+                return True
+            return False
+
+    def descricao(self, n_conexoes):
+        cota = f", cota {self.cota}" if self.cota else ""
+        return f"{self.nome} ({self.usuario} em {self.servidor}, {n_conexoes} conexão(ões){cota})"
+
+
+def ler_relays(config):
+    """Relays adicionais das seções [relay:<nome>] do config.ini.
+
+    A senha vem da variável de ambiente indicada em `senha_env` (como o
+    EMAIL_PASSWORD do .env) ou, na falta dela, da chave `senha`.
+    Levanta ValueError se uma seção não tiver servidor_smtp.
+    """
+    relays = []
+    for secao in config.sections():
+        if not secao.startswith('relay:'):
+            continue
+        servidor = config.get(secao, 'servidor_smtp', fallback='').strip()
+        if not servidor:
+            raise ValueError(f"[{secao}]: servidor_smtp é obrigatório")
+        variavel = config.get(secao, 'senha_env', fallback='')
+        senha = (os.getenv(variavel) if variavel else None) or config.get(secao, 'senha', fallback='')
+        relays.append(Relay(
+            secao.split(':', 1)[1].strip(),
+            servidor,
+            config.getint(secao, 'porta_smtp', fallback=587),
+            config.get(secao, 'usuario', fallback=''),
+            senha,
+            limitador=LimitadorTaxa.do_config(config, servidor),
+            seguranca=config.get(secao, 'seguranca', fallback='auto').strip().lower(),
+            peso=config.getfloat(secao, 'peso', fallback=1.0),
+            cota=config.getint(secao, 'cota', fallback=0),
+            conexoes=config.getint(secao, 'conexoes', fallback=0),
+            remetente=config.get(secao, 'remetente', fallback=''),
+        ))
+    return relays
+
+
+def distribuir_conexoes(relays, total):
+    """Conexões por relay: as fixadas em `conexoes`; o restante de `total` dividido pelo peso.
+
+    A divisão é pelo maior resto, de modo que as partes somam exatamente o
+    restante. Relays com peso 0 e os que não recebem nenhuma conexão ficam
+    de fora; se nenhum tiver peso nem conexões fixas, todos valem o mesmo.
+    """
+    fixas = {relay: relay.conexoes for relay in relays if relay.conexoes}
+    pesos = {relay: relay.peso for relay in relays if not relay.conexoes and relay.peso > 0}
+    if not fixas and not pesos:
+        pesos = {relay: 1.0 for relay in relays}
+    restante = max(0, total - sum(fixas.values()))
+    soma = sum(pesos.values())
+    cotas = {relay: restante * peso / soma for relay, peso in pesos.items()}
+    partes = {relay: int(cota) for relay, cota in cotas.items()}
+    faltam = restante - sum(partes.values())
+    for relay in sorted(cotas, key=lambda relay: cotas[relay] - partes[relay], reverse=True)[:faltam]:
+        partes[relay] += 1
+    partes.update(fixas)
+    return [(relay, partes[relay]) for relay in relays if partes.get(relay)]
@@ -0,0 +1,56 @@
+"""Templates de assunto e corpo com campos %(coluna)s vindos do CSV"""
+import re
+
+
+_CAMPO = re.compile(r"%\((\w+)\)s")
+
+
+class TemplateCompilado:
+    """Compila o template uma vez por campanha.
+
+    O texto é convertido num formato pronto para o operador % (os "%"
+    literais, como em "50%", são escapados), então cada renderização é
+    uma única formatação em C, sem buscas e substituições repetidas.
+    Depois de compilado é somente leitura e pode ser usado por várias
+    threads.
+    """
+    __slots__ = ('texto', 'campos', '_formato')
+
+    def __init__(self, texto):
+        partes = []
+        campos = []
+        posicao = 0
+        for achado in _CAMPO.finditer(texto):
+            partes.append(texto[posicao:achado.start()].replace('%', '%%'))
+            partes.append(achado.group(0))
+            if achado.group(1) not in campos:
+                campos.append(achado.group(1))
+            posicao = achado.end()
+        partes.append(texto[posicao:].replace('%', '%%'))
+        atribuir = super().__setattr__
+        atribuir('texto', texto)
+        atribuir('campos', tuple(campos))
+        atribuir('_formato', ''.join(partes))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("TemplateCompilado é somente leitura")
+
+    @classmethod
+    def de(cls, template):
+        """O próprio template se já compilado; senão compila o texto"""
+        return template if isinstance(template, cls) else cls(template)
+
+    def renderizar(self, valores):
+        return self._formato % valores
+
+    def campos_ausentes(self, disponiveis):
+        """Campos usados no template que não existem em `disponiveis`"""
+        return [campo for campo in self.campos if campo not in disponiveis]
+
+
+def valores_destinatario(destinatario):
+    """Campos disponíveis para o template: nome, email e demais colunas do CSV"""
+    valores = dict(destinatario.get('campos') or {})
+    valores['nome'] = destinatario['nome']
+    valores['email'] = destinatario['email']
+    return valores
@@ -0,0 +1,156 @@
+"""Verificação prévia da campanha, antes de abrir qualquer conexão SMTP"""
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from contatos import email_valido
+
+
+# Assinaturas (primeiros bytes) dos formatos mais comuns em anexos
+ASSINATURAS = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\x1f\x8b', 'application/gzip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),
+)
+
+TAMANHO_AMOSTRA = 512
+
+# Cabeçalhos, corpo e fronteiras MIME de uma mensagem sem anexos (estimativa)
+BYTES_BASE_MENSAGEM = 1024
+
+
+class InfoArquivo:
+    __slots__ = ('caminho', 'tamanho', 'mtime', 'tipo', 'erro')
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.tamanho = 0
+        self.mtime = 0
+        self.tipo = None
+        self.erro = None
+
+
+def inspecionar_arquivo(caminho):
+    """stat, permissão de leitura e tipo (pelos primeiros bytes) de um anexo"""
+    info = InfoArquivo(caminho)
+    try:
+        estado = os.stat(caminho)
+        info.tamanho, info.mtime = estado.st_size, estado.st_mtime_ns
+        with open(caminho, 'rb') as f:
+            inicio = f.read(TAMANHO_AMOSTRA)
+    except FileNotFoundError:
+        info.erro = "não encontrado"
+        return info
+    except PermissionError:
+        info.erro = "sem permissão de leitura"
+        return info
+    except OSError as e:
+        info.erro = str(e)
+        return info
+
+    for assinatura, tipo in ASSINATURAS:
+        if inicio.startswith(assinatura):
+            info.tipo = tipo
+            break
+    else:
+        info.tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+    return info
+
+
+class RelatorioVerificacao:
+    """Resultado da verificação prévia: anexos, destinatários e estimativas"""
+
+    def __init__(self):
+        self.arquivos = {}
+        self.destinatarios = 0
+        self.invalidos = []
+        self.suprimidos = 0
+        self.afetados = 0
+        self.bytes_estimados = 0
+        self.segundos_estimados = None
+
+    @property
+    def problemas(self):
+        return [info for info in self.arquivos.values() if info.erro]
+
+    @property
+    def ok(self):
+        return not self.problemas and not self.invalidos
+
+    def estados(self):
+        """(tamanho, mtime) já conhecidos dos anexos válidos, para a fase de envio"""
+        return {os.path.abspath(caminho): (info.tamanho, info.mtime)
+                for caminho, info in self.arquivos.items() if not info.erro}
+
+    def linhas(self):
+        megabytes = self.bytes_estimados / 1024 / 1024
+        linhas = [
+            f"🔎 Verificação prévia: {self.destinatarios} destinatário(s), {len(self.arquivos)} anexo(s) distinto(s), "
+            f"~{megabytes:.1f} MB a transmitir"
+        ]
+        tipos = {}
+        for info in self.arquivos.values():
+            if info.tipo:
+                tipos[info.tipo] = tipos.get(info.tipo, 0) + 1
+        if tipos:
+            linhas.append("📎 Tipos: " + ", ".join(f"{tipo} ({n})" for tipo, n in sorted(tipos.items())))
+        if self.segundos_estimados is not None:
+            minutos, segundos = divmod(int(self.segundos_estimados), 60)
+            horas, minutos = divmod(minutos, 60)
+            linhas.append(f"⏱ Duração estimada pelo limite de envio: {horas}h{minutos:02d}m{segundos:02d}s")
+        for info in self.problemas:
+            linhas.append(f"⚠ Anexo {info.caminho}: {info.erro}")
+        if self.afetados:
+            linhas.append(f"⚠ {self.afetados} destinatário(s) com anexo ausente ou ilegível")
+        if self.invalidos:
+            exemplos = ", ".join(self.invalidos[:5])
+            linhas.append(f"⚠ {len(self.invalidos)} e-mail(s) inválido(s): {exemplos}")
+        if self.suprimidos:
+            linhas.append(f"🚫 {self.suprimidos} destinatário(s) na lista de supressão")
+        return linhas
+
+
+def verificar_envio(destinatarios, limitador=None, suprimidos=(), trabalhadores=8):
+    """Verifica, numa única passada, anexos e destinatários de uma campanha.
+
+    Os anexos distintos são inspecionados em paralelo (a maior parte do
+    tempo é espera de disco ou de rede, em pastas compartilhadas).
+    """
+    relatorio = RelatorioVerificacao()
+    caminhos = {}
+    for destinatario in destinatarios:
+        for caminho in destinatario.get('arquivos') or ():
+            caminhos.setdefault(caminho)
+
+    with ThreadPoolExecutor(max_workers=max(1, trabalhadores)) as executor:
+        for info in executor.map(inspecionar_arquivo, caminhos):
+            relatorio.arquivos[info.caminho] = info
+
+    for destinatario in destinatarios:
+        relatorio.destinatarios += 1
+        email = destinatario['email']
+        if not email_valido(email):
+            relatorio.invalidos.append(email)
+        if suprimidos and email.strip().lower() in suprimidos:
+            relatorio.suprimidos += 1
+
+        tamanho = BYTES_BASE_MENSAGEM
+        afetado = False
+        for caminho in destinatario.get('arquivos') or ():
+            info = relatorio.arquivos[caminho]
+            if info.erro:
+                afetado = True
+            else:
+                tamanho += info.tamanho * 4 // 3  # base64
+        relatorio.afetados += afetado
+        relatorio.bytes_estimados += tamanho
+
+    taxa = limitador.taxa() if limitador is not None else None
+    if taxa:
+        relatorio.segundos_estimados = relatorio.destinatarios / taxa
+    return relatorio
@@ -0,0 +1,7 @@
+"""Os módulos ficam soltos em src/ e bench/ e se importam como vizinhos"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pasta in ('src', 'bench'):
+    sys.path.insert(0, os.path.join(RAIZ, pasta))
@@ -0,0 +1,80 @@
+import time
+
+from agendador import AgendadorDominios, grupo_dominio, LIMITE_CAIXAS_RECUSADAS, PAUSA_BASE
+
+
+def destinatarios(*emails):
+    return [{'email': email} for email in emails]
+
+
+def test_grupos_mx_compartilham_dominio():
+    assert grupo_dominio('Ana@GoogleMail.com') == 'gmail.com'
+    assert grupo_dominio('ana@exemplo.com') == 'exemplo.com'
+
+
+def test_intercala_dominios_e_respeita_conexoes_por_dominio():
+    agendador = AgendadorDominios(destinatarios('a1@a.com', 'a2@a.com', 'b1@b.com'), conexoes_por_dominio=1)
+    primeiro = agendador.proximo()
+    segundo = agendador.proximo()
+    assert {grupo_dominio(primeiro['email']), grupo_dominio(segundo['email'])} == {'a.com', 'b.com'}
+    agendador.concluir(primeiro)
+    agendador.concluir(segundo)
+    assert agendador.proximo()['email'] == 'a2@a.com'
+
+
+def test_sem_limite_por_dominio_um_dominio_usa_todas_as_conexoes():
+    agendador = AgendadorDominios(destinatarios(*(f'u{i}@d.com' for i in range(8))))
+    simultaneos = [agendador.proximo() for _ in range(8)]
+    assert len({d['email'] for d in simultaneos}) == 8
+
+
+def test_limite_da_secao_dominio_vale_so_para_aquele_dominio():
+    agendador = AgendadorDominios(destinatarios('a1@a.com', 'a2@a.com', 'b1@b.com', 'b2@b.com'),
+                                  limites_dominio={'a.com': {'conexoes': 1}})
+    emails = {agendador.proximo()['email'] for _ in range(3)}
+    assert emails == {'a1@a.com', 'b1@b.com', 'b2@b.com'}
+
+
+def test_reenvio_volta_para_a_fila_e_fim_retorna_none():
+    agendador = AgendadorDominios(destinatarios('a@a.com'))
+    destinatario = agendador.proximo()
+    agendador.concluir(destinatario, reenviar_em=0)
+    assert agendador.proximo() is destinatario
+    agendador.concluir(destinatario)
+    assert agendador.proximo() is None
+
+
+def test_recusa_de_uma_caixa_nao_pausa_o_dominio():
+    agendador = AgendadorDominios(destinatarios(*(f'u{i}@d.com' for i in range(4))))
+    assert agendador.concluir(agendador.proximo(), reenviar_em=60, recusado=True) == 0.0
+    # Um sucesso entre as recusas indica greylisting por caixa, não limitação
+    agendador.concluir(agendador.proximo())
+    assert agendador.concluir(agendador.proximo(), reenviar_em=60, recusado=True) == 0.0
+
+
+def test_recusas_em_caixas_diferentes_pausam_o_dominio():
+    agendador = AgendadorDominios(destinatarios(*(f'u{i}@d.com' for i in range(LIMITE_CAIXAS_RECUSADAS))))
+    pausas = [agendador.concluir(agendador.proximo(), reenviar_em=60, recusado=True)
+              for _ in range(LIMITE_CAIXAS_RECUSADAS)]
+    assert pausas[:-1] == [0.0] * (LIMITE_CAIXAS_RECUSADAS - 1)
+    assert pausas[-1] == PAUSA_BASE
+
+
+def test_limitacao_pausa_o_dominio():
+    agendador = AgendadorDominios(destinatarios('a@d.com'))
+    destinatario = agendador.proximo()
+    assert agendador.concluir(destinatario, True, reenviar_em=0) == PAUSA_BASE
+    # O destinatário volta para a fila, mas o domínio só é liberado depois da pausa
+    agora = time.monotonic()
+    agendador._liberar_espera(agora)
+    dominio, espera = agendador._escolher(agora)
+    assert dominio is None and PAUSA_BASE - 1 < espera <= PAUSA_BASE
+    assert agendador.pendentes == 1
+
+
+def test_cancelar_devolve_os_pendentes():
+    agendador = AgendadorDominios(destinatarios('a@a.com', 'b@b.com'))
+    em_andamento = agendador.proximo()
+    agendador.concluir(em_andamento, reenviar_em=300)
+    restantes = agendador.cancelar()
+    assert sorted(d['email'] for d in restantes) == ['a@a.com', 'b@b.com']
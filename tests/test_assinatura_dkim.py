@@ -0,0 +1,62 @@
+import hashlib
+import random
+import re
+
+import pytest
+
+from assinatura_dkim import HashCorpoRelaxed, fronteira_conteudo
+
+
+def hash_referencia(corpo):
+    """Canonicalização relaxed do corpo (RFC 6376, 3.4.4) aplicada ao corpo inteiro"""
+    linhas = corpo.split(b'\r\n')
+    if linhas[-1] == b'':
+        linhas.pop()
+    linhas = [re.sub(rb'[ \t]+', b' ', linha).rstrip(b' ') for linha in linhas]
+    while linhas and linhas[-1] == b'':
+        linhas.pop()
+    return hashlib.sha256(b''.join(linha + b'\r\n' for linha in linhas)).digest()
+
+
+CORPOS = [
+    b'',
+    b'\r\n\r\n',
+    b'Linha simples\r\n',
+    b'Sem CRLF no fim',
+    b'Espacos  \t internos \t\r\n  recuo\r\n\r\n\r\n',
+    b'Texto\r\n\r\n\r\nmeio\r\n \r\n\t\r\n',
+    b'\r\n\r\ncomeca vazio\r\n',
+]
+
+
+@pytest.mark.parametrize('corpo', CORPOS)
+def test_hash_igual_a_referencia(corpo):
+    resumo = HashCorpoRelaxed()
+    resumo.update(corpo)
+    assert resumo.digest() == hash_referencia(corpo)
+
+
+@pytest.mark.parametrize('corpo', CORPOS)
+def test_hash_independe_do_corte_dos_blocos(corpo):
+    aleatorio = random.Random(len(corpo))
+    for _ in range(20):
+        resumo = HashCorpoRelaxed()
+        posicao = 0
+        while posicao < len(corpo):
+            tamanho = aleatorio.randint(1, 5)
+            resumo.update(corpo[posicao:posicao + tamanho])
+            posicao += tamanho
+        assert resumo.digest() == hash_referencia(corpo)
+
+
+def test_fronteira_muda_com_tamanho_ou_mtime_do_anexo():
+    fronteira = fronteira_conteudo('texto', [('/a.bin', 1, 100)])
+    assert fronteira_conteudo('texto', [('/a.bin', 1, 100)]) == fronteira
+    assert fronteira_conteudo('texto', [('/a.bin', 2, 100)]) != fronteira
+    assert fronteira_conteudo('texto', [('/a.bin', 1, 101)]) != fronteira
+    assert fronteira_conteudo('outro texto', [('/a.bin', 1, 100)]) != fronteira
+
+
+def test_fronteira_nao_consulta_o_disco():
+    # O caminho não existe: só os dados já conhecidos da campanha entram na fronteira
+    assert fronteira_conteudo('texto', [('/nao/existe.pdf', 10, 1)]).startswith('===============')
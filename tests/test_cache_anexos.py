@@ -0,0 +1,64 @@
+import base64
+import os
+import threading
+from email.message import Message
+
+from cache_anexos import CacheAnexos, parte_anexo
+
+
+def test_codifica_cada_arquivo_uma_vez(tmp_path):
+    anexo = tmp_path / 'a.bin'
+    anexo.write_bytes(b'x' * 1000)
+    cache = CacheAnexos()
+    primeiro = cache.codificado(str(anexo))
+    assert base64.b64decode(primeiro) == b'x' * 1000
+    assert max(len(linha) for linha in primeiro.splitlines()) == 76
+    assert cache.codificado(str(anexo)) is primeiro
+    assert (cache.codificados, cache.acertos) == (1, 1)
+
+
+def test_arquivo_alterado_e_recodificado(tmp_path):
+    anexo = tmp_path / 'a.txt'
+    anexo.write_bytes(b'v1')
+    cache = CacheAnexos()
+    cache.codificado(str(anexo))
+    anexo.write_bytes(b'versao 2')
+    assert base64.b64decode(cache.codificado(str(anexo))) == b'versao 2'
+    assert cache.codificados == 2
+
+
+def test_limite_descarta_os_menos_usados(tmp_path):
+    caminhos = []
+    for nome in 'abc':
+        caminho = tmp_path / nome
+        caminho.write_bytes(nome.encode() * 300)  # 400 bytes em base64 (com quebras de linha)
+        caminhos.append(str(caminho))
+    cache = CacheAnexos(limite_bytes=1000)
+    for caminho in caminhos:
+        cache.codificado(caminho)
+    assert cache.ocupado <= 1000
+    cache.codificado(caminhos[0])  # foi descartado: lê de novo
+    assert cache.codificados == 4
+
+
+def test_leituras_simultaneas_do_mesmo_arquivo(tmp_path):
+    anexo = tmp_path / 'grande.bin'
+    anexo.write_bytes(os.urandom(2 * 1024 * 1024))
+    cache = CacheAnexos()
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(cache.codificado(str(anexo)))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.codificados == 1
+    assert len(set(map(id, resultados))) == 1
+
+
+def test_nome_nao_ascii_vai_codificado():
+    parte = parte_anexo('/pasta/Relatório Março.pdf')
+    cabecalho = parte['Content-Disposition']
+    assert cabecalho.encode('ascii')
+    mensagem = Message()
+    mensagem['Content-Disposition'] = cabecalho
+    assert mensagem.get_filename() == 'Relatório Março.pdf'
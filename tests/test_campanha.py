@@ -0,0 +1,37 @@
+import pytest
+
+from campanha import Campanha
+from contatos import ListaDestinatarios
+
+
+def lista_com_anexo(tmp_path):
+    anexo = tmp_path / 'nota.pdf'
+    anexo.write_bytes(b'%PDF-')
+    lista = ListaDestinatarios()
+    lista.adicionar('Ana', 'ana@x.com', [str(anexo)])
+    lista.adicionar('Bia', 'bia@x.com')
+    return lista, str(anexo)
+
+
+def test_campanha_congela_lista_e_compila_templates(tmp_path):
+    lista, anexo = lista_com_anexo(tmp_path)
+    campanha = Campanha(lista, 'Olá %(nome)s', 'Corpo %(email)s')
+    lista.adicionar('Caio', 'caio@x.com')
+
+    assert len(campanha) == 2
+    assert campanha.anexos == {anexo}
+    assert campanha.template_assunto.campos == ('nome',)
+    assert campanha.template_corpo.renderizar({'email': 'a@x.com'}) == 'Corpo a@x.com'
+    with pytest.raises(AttributeError):
+        campanha.assunto = 'outro'
+
+
+def test_identificador_estavel_e_novo_envio(tmp_path):
+    lista, anexo = lista_com_anexo(tmp_path)
+    campanha = Campanha(lista, 'Assunto', 'Corpo')
+    assert Campanha(lista, 'Assunto', 'Corpo').identificador == campanha.identificador
+    assert Campanha(lista, 'Assunto', 'Outro corpo').identificador != campanha.identificador
+
+    novo = campanha.novo_envio()
+    assert novo.identificador.startswith(campanha.identificador + '-')
+    assert novo.destinatarios is campanha.destinatarios
@@ -0,0 +1,125 @@
+import pytest
+
+from contatos import (IndiceDestinatarios, ListaDestinatarios, detectar_codificacao, email_valido, ler_contatos_csv,
+                      ler_contatos_csv_em_lotes, nome_coluna, normalizar_email)
+
+
+def test_le_csv_com_cabecalho_em_lotes(tmp_path):
+    caminho = tmp_path / 'contatos.csv'
+    linhas = ['Nome;E-mail;Empresa'] + [f'P{i};p{i}@x.com;Empresa {i}' for i in range(5)] + ['Inv;invalido;x']
+    caminho.write_text('\n'.join(linhas) + '\n', encoding='utf-8')
+
+    lotes = list(ler_contatos_csv_em_lotes(str(caminho), tamanho_lote=2))
+    assert [len(lote) for lote, _, _ in lotes] == [2, 2, 1]
+    contatos = [contato for lote, _, _ in lotes for contato in lote]
+    assert contatos[0] == {'nome': 'P0', 'email': 'p0@x.com', 'campos': {'empresa': 'Empresa 0'}}
+    assert lotes[-1][1:] == (1.0, 1)
+
+
+def test_csv_sem_cabecalho_e_em_windows_1252(tmp_path):
+    caminho = tmp_path / 'excel.csv'
+    caminho.write_bytes('José,jose@x.com,São Paulo – SP\n'.encode('cp1252'))
+    assert detectar_codificacao(str(caminho)) == 'cp1252'
+    assert list(ler_contatos_csv(str(caminho))) == [
+        {'nome': 'José', 'email': 'jose@x.com', 'campos': {'coluna3': 'São Paulo – SP'}}
+    ]
+
+
+def test_csv_utf8_com_bom_e_bytes_invalidos(tmp_path):
+    utf8 = tmp_path / 'utf8.csv'
+    utf8.write_text('nome,email\nJosé,jose@x.com\n', encoding='utf-8-sig')
+    assert detectar_codificacao(str(utf8)) == 'utf-8-sig'
+    assert next(ler_contatos_csv(str(utf8)))['nome'] == 'José'
+
+    latin = tmp_path / 'latin.csv'
+    latin.write_bytes(b'A\x81,a@x.com\n')  # 0x81 não existe em Windows-1252
+    assert detectar_codificacao(str(latin)) == 'latin-1'
+
+
+def test_email_valido():
+    assert email_valido('ana.silva+news@exemplo.com.br')
+    assert not email_valido('ana@exemplo')
+    assert not email_valido('ana exemplo.com')
+    assert not email_valido('a' * 250 + '@x.com')
+
+
+def test_normalizar_email_agrupando_tag():
+    assert normalizar_email(' Ana+News@X.com ') == 'ana+news@x.com'
+    assert normalizar_email('Ana+News@X.com', agrupar_tag=True) == 'ana@x.com'
+
+
+def test_indice_conta_duplicados():
+    indice = IndiceDestinatarios()
+    assert indice.registrar('ana@x.com')
+    assert not indice.registrar(' ANA@x.com')
+    assert 'Ana@X.com' in indice and indice.duplicados == 1
+
+
+def test_lista_descarta_duplicados_do_lote_e_da_lista():
+    lista = ListaDestinatarios(agrupar_tag=True)
+    lista.estender(lista.novos([
+        {'nome': 'Ana', 'email': 'ana@x.com'},
+        {'nome': 'Ana 2', 'email': 'ANA+tag@x.com'},
+        {'nome': 'Bia', 'email': 'bia@x.com'},
+    ]))
+    assert lista.novos([{'nome': 'Bia', 'email': 'bia@x.com'}, {'nome': 'Caio', 'email': 'caio@x.com'}]) == [
+        {'nome': 'Caio', 'email': 'caio@x.com'}
+    ]
+    assert lista.emails == ['ana@x.com', 'bia@x.com']
+    assert lista.indice.duplicados == 2
+
+
+def test_nome_coluna():
+    assert nome_coluna(' Nome Completo ') == 'nome_completo'
+    assert nome_coluna('Cidade/UF') == 'cidade_uf'
+
+
+def test_colunas_extras_viram_campos_do_template(tmp_path):
+    caminho = tmp_path / 'contatos.csv'
+    caminho.write_text('Nome;E-mail;Nome Completo;Empresa\nAna;ana@x.com;Ana Souza;ACME\nBia;bia@x.com;;\n',
+                       encoding='utf-8')
+    lista = ListaDestinatarios()
+    lista.estender(lista.novos(ler_contatos_csv(str(caminho))))
+    assert lista[0]['campos'] == {'nome_completo': 'Ana Souza', 'empresa': 'ACME'}
+    assert lista.coluna('Empresa') == ['ACME', '']
+
+
+def test_lista_congelada_e_independente_e_somente_leitura():
+    lista = ListaDestinatarios()
+    lista.adicionar('Ana', 'ana@x.com', ['/a.pdf'], {'empresa': 'ACME'})
+    lista.adicionar('Bia', 'bia@x.com')
+    congelada = lista.congelar()
+    lista.adicionar('Caio', 'caio@x.com', ['/c.pdf'])
+
+    assert len(congelada) == 2
+    assert congelada[0] == {'nome': 'Ana', 'email': 'ana@x.com', 'arquivos': ['/a.pdf'], 'campos': {'empresa': 'ACME'}}
+    assert congelada.caminhos_anexos() == {'/a.pdf'}
+    with pytest.raises(AttributeError):
+        congelada.nomes = ()
+    with pytest.raises(TypeError):
+        congelada.anexos[0] = 0
+
+
+def test_caminhos_anexos_so_dos_grupos_em_uso(tmp_path):
+    pasta = tmp_path / 'notas'
+    lista = ListaDestinatarios()
+    lista.adicionar('Ana', 'ana@x.com', ['/fora.pdf'])
+    antiga, nova = str(pasta / 'ana_v1.pdf'), str(pasta / 'ana_v2.pdf')
+    lista.anexar_da_pasta(str(pasta), {'ana@x.com': [antiga]})
+    lista.anexar_da_pasta(str(pasta), {'ana@x.com': [nova]})
+    # O grupo com a versão antiga continua no índice, mas nenhuma linha o usa
+    assert lista.congelar().caminhos_anexos() == {'/fora.pdf', nova}
+
+
+def test_anexar_da_pasta_mantem_anexos_de_fora(tmp_path):
+    pasta = tmp_path / 'notas'
+    lista = ListaDestinatarios()
+    lista.adicionar('Ana', 'ana@x.com', ['/fora.pdf'])
+    lista.adicionar('Bia', 'bia@x.com')
+    nota = str(pasta / 'ana.pdf')
+    assert lista.anexar_da_pasta(str(pasta), {'ana@x.com': [nota]}) == 1
+    assert lista[0]['arquivos'] == ['/fora.pdf', nota]
+    assert lista[1]['arquivos'] == []
+    # Refazer sem a nota tira só o que veio da pasta
+    assert lista.anexar_da_pasta(str(pasta), {}) == 0
+    assert lista[0]['arquivos'] == ['/fora.pdf']
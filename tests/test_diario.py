@@ -0,0 +1,48 @@
+import os
+
+from diario import (DiarioEnvio, identificar_campanha, novo_identificador, ja_enviados, ler_suprimidos,
+                    ENVIADO, FALHOU, NA_FILA)
+
+
+def test_identificador_muda_com_o_conteudo_dos_anexos(tmp_path):
+    anexo = tmp_path / 'nota.pdf'
+    anexo.write_bytes(b'v1')
+    primeiro = identificar_campanha('Assunto', 'Corpo', [str(anexo)])
+    assert identificar_campanha('Assunto', 'Corpo', [str(anexo)]) == primeiro
+    assert identificar_campanha('Assunto', 'Corpo') != primeiro
+
+    anexo.write_bytes(b'versao 2')
+    assert identificar_campanha('Assunto', 'Corpo', [str(anexo)]) != primeiro
+
+
+def test_novo_identificador_nao_retoma_o_anterior():
+    assert novo_identificador('abc').startswith('abc-')
+
+
+def test_estados_e_retomada(tmp_path):
+    caminho = str(tmp_path / 'envios.db')
+    diario = DiarioEnvio(caminho)
+    estados = diario.enfileirar('c1', ['a@x.com', 'b@x.com'])
+    assert estados == {'a@x.com': NA_FILA, 'b@x.com': NA_FILA}
+
+    diario.registrar('c1', 'a@x.com', ENVIADO)
+    diario.registrar('c1', 'b@x.com', FALHOU, 'erro')
+    # Enfileirar de novo não apaga o que já aconteceu
+    assert diario.enfileirar('c1', ['a@x.com', 'b@x.com'])['a@x.com'] == ENVIADO
+    assert diario.resumo('c1') == {ENVIADO: 1, FALHOU: 1}
+    diario.fechar()
+
+    assert ja_enviados(caminho, 'c1') == 1
+    assert ja_enviados(caminho, 'outra') == 0
+    assert ja_enviados(str(tmp_path / 'inexistente.db'), 'c1') == 0
+    assert not os.path.exists(tmp_path / 'inexistente.db')
+
+
+def test_supressao_vale_para_todas_as_campanhas(tmp_path):
+    caminho = str(tmp_path / 'envios.db')
+    diario = DiarioEnvio(caminho)
+    diario.suprimir(' Ana@X.com ', 550, 'no such user')
+    assert diario.suprimidos() == {'ana@x.com'}
+    diario.fechar()
+    assert ler_suprimidos(caminho) == {'ana@x.com'}
+    assert ler_suprimidos('') == set()
@@ -0,0 +1,72 @@
+import smtplib
+from collections import deque
+
+import pytest
+
+from envio_streaming import enviar_blocos
+
+
+class ServidorRoteirizado:
+    """Faz o papel do smtplib.SMTP, respondendo na ordem dada e anotando o que foi enviado"""
+
+    def __init__(self, respostas, pipelining=True):
+        self.respostas = deque((codigo, b'') for codigo in respostas)
+        self.pipelining = pipelining
+        self.enviados = []
+        self.fechado = False
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def has_extn(self, nome):
+        return nome == 'pipelining' and self.pipelining
+
+    def send(self, dados):
+        self.enviados.append(dados.encode('ascii') if isinstance(dados, str) else dados)
+
+    def getreply(self):
+        return self.respostas.popleft()
+
+    def docmd(self, comando):
+        self.send(comando + '\r\n')
+        return self.getreply()
+
+    def rset(self):
+        self.send('rset\r\n')
+
+    def close(self):
+        self.fechado = True
+
+
+def test_pipelining_envia_mail_rcpt_e_data_juntos():
+    server = ServidorRoteirizado([250, 250, 250, 354, 250])
+    assert enviar_blocos(server, 'r@x.com', ['a@d.com', 'b@d.com'], [b'linha\r\n']) == {}
+    assert server.enviados[0] == (b'mail FROM:<r@x.com>\r\nrcpt TO:<a@d.com>\r\n'
+                                  b'rcpt TO:<b@d.com>\r\ndata\r\n')
+    assert server.enviados[1:] == [b'linha\r\n.\r\n']
+
+
+def test_sem_pipelining_um_comando_por_vez_e_recusa_parcial():
+    server = ServidorRoteirizado([250, 250, 550, 354, 250], pipelining=False)
+    recusados = enviar_blocos(server, 'r@x.com', ['a@d.com', 'b@d.com'], [b'x\r\n'])
+    assert recusados == {'b@d.com': (550, b'')}
+    assert server.enviados[:4] == [b'mail FROM:<r@x.com>\r\n', b'rcpt TO:<a@d.com>\r\n',
+                                   b'rcpt TO:<b@d.com>\r\n', b'data\r\n']
+
+
+def test_todos_recusados_encerram_o_data_ja_aceito():
+    server = ServidorRoteirizado([250, 450, 550, 354, 554])
+    with pytest.raises(smtplib.SMTPRecipientsRefused) as erro:
+        enviar_blocos(server, 'r@x.com', ['a@d.com', 'b@d.com'], [b'x\r\n'])
+    assert set(erro.value.recipients) == {'a@d.com', 'b@d.com'}
+    assert server.enviados[1:] == [b'.\r\n', b'rset\r\n']
+    assert not server.respostas
+
+
+def test_421_no_rcpt_para_de_ler_e_fecha():
+    # Depois do 421 o servidor não responde aos comandos que já estavam no pipeline
+    server = ServidorRoteirizado([250, 250, 421])
+    with pytest.raises(smtplib.SMTPRecipientsRefused) as erro:
+        enviar_blocos(server, 'r@x.com', ['a@d.com', 'b@d.com', 'c@d.com'], [b'x\r\n'])
+    assert erro.value.recipients == {'b@d.com': (421, b'')}
+    assert server.fechado
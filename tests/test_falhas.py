@@ -0,0 +1,43 @@
+import smtplib
+import socket
+
+import pytest
+
+from falhas import classificar, deve_suprimir, atraso_reenvio, CONEXAO, TEMPORARIA, PERMANENTE, OUTRA
+from limitador import codigo_smtp
+
+
+def recusado(codigo):
+    return smtplib.SMTPRecipientsRefused({'a@x.com': (codigo, b'recusado')})
+
+
+@pytest.mark.parametrize('erro, tipo', [
+    (smtplib.SMTPServerDisconnected("caiu"), CONEXAO),
+    (socket.timeout("tempo esgotado"), CONEXAO),
+    (ConnectionResetError(), CONEXAO),
+    (recusado(421), CONEXAO),
+    (recusado(450), TEMPORARIA),
+    (smtplib.SMTPDataError(451, b'tente depois'), TEMPORARIA),
+    (recusado(550), PERMANENTE),
+    (ValueError("template"), OUTRA),
+])
+def test_classificar(erro, tipo):
+    assert classificar(erro) == tipo
+
+
+def test_codigo_do_lote_e_o_menor():
+    erro = smtplib.SMTPRecipientsRefused({'a@x.com': (550, b''), 'b@x.com': (450, b'')})
+    assert codigo_smtp(erro) == 450
+
+
+def test_so_recusa_definitiva_no_rcpt_vai_para_supressao():
+    assert deve_suprimir(recusado(550))
+    assert not deve_suprimir(recusado(450))
+    assert not deve_suprimir(smtplib.SMTPDataError(550, b'conteudo'))
+
+
+def test_atraso_reenvio_cresce_com_jitter_e_teto():
+    for tentativa in (1, 2, 3):
+        base = 30.0 * 2 ** (tentativa - 1)
+        assert base * 0.5 <= atraso_reenvio(tentativa) <= base * 1.5
+    assert atraso_reenvio(20) <= 900.0 * 1.5
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import pytest
+
+from indice_anexos import IndiceAnexos
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    raiz = tmp_path / 'anexos'
+    (raiz / '2024').mkdir(parents=True)
+    for nome in ('ana@x.com.pdf', 'NF_123_janeiro.pdf', 'NF_1234_janeiro.pdf', '.oculto.pdf', '~$ana@x.com.docx'):
+        (raiz / nome).write_bytes(b'x')
+    (raiz / '2024' / 'Relatorio_bia.txt').write_bytes(b'x')
+    return raiz
+
+
+def test_glob_padrao_ignora_ocultos_e_percorre_subpastas(pasta):
+    indice = IndiceAnexos(str(pasta))
+    assert indice.atualizar() == (4, 0)
+    assert indice.associar([' ANA@x.com ', 'caio@x.com']) == {' ANA@x.com ': [str(pasta / 'ana@x.com.pdf')]}
+    assert indice.associar(['bia'], '*_{valor}.txt') == {'bia': [str(pasta / '2024' / 'Relatorio_bia.txt')]}
+
+
+def test_glob_com_prefixo_nao_confunde_valores_parecidos(pasta):
+    indice = IndiceAnexos(str(pasta))
+    indice.atualizar()
+    assert indice.associar(['123', '1234', '999'], 'NF_{valor}_*.pdf') == {
+        '123': [str(pasta / 'NF_123_janeiro.pdf')],
+        '1234': [str(pasta / 'NF_1234_janeiro.pdf')],
+    }
+    with pytest.raises(ValueError):
+        indice.associar(['123'], 'NF_*.pdf')
+
+
+def test_regex_com_grupo_valor(pasta):
+    indice = IndiceAnexos(str(pasta))
+    indice.atualizar()
+    assert indice.associar(['1234'], r're:nf_(?P<valor>\d+)_.*\.pdf') == {'1234': [str(pasta / 'NF_1234_janeiro.pdf')]}
+    assert indice.associar(['123'], r're:NF_{valor}_janeiro\.pdf') == {'123': [str(pasta / 'NF_123_janeiro.pdf')]}
+
+
+def test_atualizar_rele_so_o_que_mudou(pasta):
+    indice = IndiceAnexos(str(pasta))
+    indice.atualizar()
+    assert indice.atualizar() == (0, 0)
+    (pasta / 'bia@x.com.pdf').write_bytes(b'x')
+    shutil.rmtree(pasta / '2024')
+    assert indice.atualizar() == (1, 1)
+    assert len(indice) == 4
+    assert 'bia@x.com' in indice.associar(['bia@x.com'])
+    os.remove(pasta / 'bia@x.com.pdf')
+    assert indice.atualizar() == (0, 1)
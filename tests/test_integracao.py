@@ -0,0 +1,55 @@
+"""Envio completo contra o servidor SMTP falso do benchmark, em cada motor"""
+import pytest
+
+from contatos import ListaDestinatarios
+from diario import ja_enviados
+from limitador import LimitadorTaxa
+from motor_envio import criar_motor
+from servidor_smtp import ServidorSMTPFalso
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorSMTPFalso()
+    servidor.iniciar()
+    yield servidor
+    servidor.parar()
+
+
+def lista_de_teste(pasta, quantidade=12):
+    pequeno = pasta / 'pequeno.txt'
+    pequeno.write_text('anexo pequeno\n' * 10)
+    grande = pasta / 'grande.bin'
+    grande.write_bytes(bytes(range(256)) * 6 * 1024)  # 1,5 MB: vai em fluxo, fora do cache
+    lista = ListaDestinatarios()
+    for i in range(quantidade):
+        arquivos = [str(pequeno)] + ([str(grande)] if i % 4 == 0 else [])
+        lista.adicionar(f"Pessoa {i}", f"p{i}@dominio{i % 3}.exemplo", arquivos, {'codigo': str(i)})
+    return lista.congelar()
+
+
+@pytest.mark.parametrize('motor', ['threads', 'asyncio'])
+def test_envio_completo_e_retomada(motor, servidor, tmp_path):
+    lista = lista_de_teste(tmp_path)
+    diario = str(tmp_path / 'envios.db')
+    log = []
+
+    def criar():
+        return criar_motor(
+            lista, '127.0.0.1', servidor.porta, 'remetente@exemplo', 'senha',
+            'Teste %(codigo)s', 'Olá %(nome)s,\n\nsegue o anexo.\n',
+            motor=motor, conexoes=3, limite_streaming_mb=1, diario=diario, relatorio_metricas='',
+            limitador=LimitadorTaxa(por_segundo=100000, rajada=100000), seguranca='nenhuma',
+            ao_log=log.append,
+        )
+
+    envio = criar()
+    assert envio.executar(), "\n".join(log)
+    assert servidor.mensagens == servidor.destinatarios == len(lista)
+    assert ja_enviados(diario, envio.campanha) == len(lista)
+    # Três mensagens levam o anexo grande, transmitido em fluxo e em base64
+    assert servidor.bytes > 3 * 1.5 * 1024 * 1024
+
+    # Mesma campanha de novo: todos já receberam, nada é reenviado
+    assert criar().executar()
+    assert servidor.mensagens == len(lista)
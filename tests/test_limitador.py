@@ -0,0 +1,38 @@
+import configparser
+import smtplib
+
+from limitador import LimitadorTaxa, codigo_smtp
+
+
+def test_rajada_limita_envios_imediatos():
+    limitador = LimitadorTaxa(por_segundo=10, rajada=2)
+    assert limitador.tentar() == 0.0
+    assert limitador.tentar() == 0.0
+    assert 0 < limitador.tentar() <= 0.1
+
+
+def test_reduzir_pausa_e_recupera_aos_poucos():
+    limitador = LimitadorTaxa(por_segundo=100, pausa_limitacao=5.0)
+    assert limitador.reduzir() == 0.5
+    assert limitador.tentar() > 4.0
+    limitador.registrar_sucesso()
+    assert limitador.fator == 0.55
+    assert limitador.taxa() == 100 * 0.55
+
+
+def test_sem_limites_nao_espera():
+    limitador = LimitadorTaxa()
+    assert limitador.taxa() is None
+    assert all(limitador.tentar() == 0.0 for _ in range(1000))
+
+
+def test_do_config_le_a_secao_do_servidor():
+    config = configparser.ConfigParser()
+    config.read_string("[limites:smtp.exemplo]\npor_minuto = 120\nrajada = 5\n")
+    assert LimitadorTaxa.do_config(config, 'smtp.exemplo').taxa() == 2.0
+    assert LimitadorTaxa.do_config(config, 'outro').taxa() == 1.0
+
+
+def test_codigo_smtp():
+    assert codigo_smtp(smtplib.SMTPSenderRefused(553, b'', 'a@x.com')) == 553
+    assert codigo_smtp(ValueError()) is None
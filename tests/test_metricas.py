@@ -0,0 +1,58 @@
+import json
+import urllib.request
+
+from metricas import Histograma, MetricasEnvio, ServidorMetricas
+
+
+def test_histograma_percentis_pelo_limite_do_intervalo():
+    histograma = Histograma()
+    for duracao in [0.004] * 98 + [0.2, 3.0]:
+        histograma.registrar(duracao)
+    assert histograma.percentil(0.5) == 0.005
+    assert histograma.percentil(0.99) == 0.25
+    assert histograma.percentil(1.0) == 3.0
+    assert Histograma().percentil(0.5) == 0.0
+
+
+def test_resumo_e_copia_independente():
+    metricas = MetricasEnvio()
+    with metricas.medir('envio'):
+        pass
+    metricas.registrar('dkim', 0.01)
+    metricas.contar('enviados', 3)
+    metricas.definir('fila_prontas', 7)
+
+    resumo = metricas.resumo()
+    metricas.contar('enviados')
+    assert resumo['contadores'] == {'enviados': 3}
+    assert resumo['medidores'] == {'fila_prontas': 7}
+    assert resumo['fases']['envio']['quantidade'] == 1
+    assert resumo['fases']['dkim']['max_s'] == 0.01
+    assert resumo['fases']['conectar']['quantidade'] == 0
+
+
+def test_exportar_json_e_csv(tmp_path):
+    metricas = MetricasEnvio()
+    metricas.registrar('montar', 0.002)
+    metricas.contar('enviados')
+    caminho_json, caminho_csv = metricas.exportar(str(tmp_path / 'relatorios'), 'camp1')
+    with open(caminho_json, encoding='utf-8') as f:
+        dados = json.load(f)
+    assert dados['campanha'] == 'camp1' and dados['contadores'] == {'enviados': 1}
+    with open(caminho_csv, encoding='utf-8') as f:
+        assert 'montar,1,0.002,0.002,0.002,0.002,0.002' in f.read()
+
+
+def test_endpoint_prometheus():
+    metricas = MetricasEnvio()
+    metricas.registrar('envio', 0.02)
+    metricas.contar('enviados', 2)
+    servidor = ServidorMetricas(metricas, 0)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{servidor.porta}/metrics', timeout=5) as resposta:
+            texto = resposta.read().decode('utf-8')
+    finally:
+        servidor.fechar()
+    assert 'envio_fase_segundos_bucket{fase="envio",le="0.025"} 1' in texto
+    assert 'envio_fase_segundos_count{fase="envio"} 1' in texto
+    assert 'envio_eventos_total{evento="enviados"} 2' in texto
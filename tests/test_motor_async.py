@@ -0,0 +1,36 @@
+import asyncio
+import smtplib
+
+import pytest
+
+from motor_async import ClienteSMTPAsync
+
+
+def test_falha_na_saudacao_fecha_a_conexao():
+    async def cenario():
+        fechada = asyncio.Event()
+
+        async def servidor(leitor, escritor):
+            escritor.write(b"220 ok\r\n")
+            await leitor.readline()
+            escritor.write(b"554 sem EHLO\r\n")
+            await escritor.drain()
+            # readline devolve b"" quando o cliente fecha o socket
+            while await leitor.readline():
+                pass
+            fechada.set()
+            escritor.close()
+
+        aberto = await asyncio.start_server(servidor, '127.0.0.1', 0)
+        porta = aberto.sockets[0].getsockname()[1]
+        cliente = ClienteSMTPAsync('127.0.0.1', porta, timeout=5, seguranca='nenhuma')
+        try:
+            with pytest.raises(smtplib.SMTPHeloError):
+                await cliente.conectar()
+            assert cliente._escritor is None
+            await asyncio.wait_for(fechada.wait(), 5)
+        finally:
+            aberto.close()
+            await aberto.wait_closed()
+
+    asyncio.run(cenario())
@@ -0,0 +1,32 @@
+import smtplib
+import socket
+
+from agendador import AgendadorDominios
+from assinatura_dkim import AssinadorDKIM
+from motor_envio import MotorEnvio
+from relays import Relay
+
+
+def test_lote_todo_recusado_com_4xx_conta_para_a_pausa_do_dominio():
+    motor = MotorEnvio([], 'smtp.x.com', 25, 'r@x.com', 'senha', 'Assunto', 'Corpo', diario='',
+                       relatorio_metricas='', ao_log=lambda texto: None)
+    membros = [{'nome': '', 'email': f'u{i}@d.com'} for i in range(2)]
+    agendador = AgendadorDominios([dict(membros[0], lote=membros)])
+    lote = agendador.proximo()
+    erro = smtplib.SMTPRecipientsRefused({'u0@d.com': (450, b''), 'u1@d.com': (450, b'')})
+
+    assert not motor._falha_envio(1, erro, lote, agendador, 2, Relay('principal', 'smtp.x.com', 25, 'r', 'senha'))
+    # Cada caixa volta para a fila sozinha e as recusas não zeram o estado do domínio
+    assert agendador.pendentes == 2 and agendador.em_andamento == 0
+    assert agendador._dominios['d.com'].recusadas == {'u0@d.com', 'u1@d.com'}
+
+
+def test_dominio_do_message_id():
+    def motor(usuario, dkim=None):
+        return MotorEnvio([], 'smtp.x.com', 25, usuario, 'senha', 'Assunto', 'Corpo', dkim=dkim)
+
+    dkim = AssinadorDKIM('assinado.com', 'envio', '/chave.pem')
+    assert motor('r@login.com', dkim).dominio_msgid == 'assinado.com'
+    assert motor('r@login.com').dominio_msgid == 'login.com'
+    # Login sem @ (conta de relay): o domínio vem do nome da máquina
+    assert motor('usuario_relay').dominio_msgid == socket.getfqdn()
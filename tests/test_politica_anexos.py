@@ -0,0 +1,53 @@
+import os
+import zipfile
+
+from politica_anexos import PoliticaAnexos, texto_links
+
+
+def test_compacta_uma_vez_so_quando_compensa(tmp_path):
+    texto = tmp_path / 'relatorio.txt'
+    texto.write_text('linha repetida\n' * 5000)
+    aleatorio = tmp_path / 'dados.bin'
+    aleatorio.write_bytes(os.urandom(50000))
+    foto = tmp_path / 'foto.jpg'
+    foto.write_bytes(b'x' * 5000)
+    politica = PoliticaAnexos(compactar=True)
+    try:
+        decisao = politica.decidir(str(texto))
+        assert decisao.caminho.endswith('relatorio.zip') and decisao.tamanho < texto.stat().st_size
+        assert zipfile.ZipFile(decisao.caminho).namelist() == ['relatorio.txt']
+        assert politica.decidir(str(texto)) is decisao
+        # Sem ganho de 10% e formatos já compactados seguem como estão
+        assert politica.decidir(str(aleatorio)).caminho == os.path.abspath(aleatorio)
+        assert politica.decidir(str(foto)).caminho == os.path.abspath(foto)
+        assert politica.compactados == 1
+        assert politica.decidir(str(tmp_path / 'nao_existe.txt')) is None
+    finally:
+        politica.limpar()
+    assert not os.path.exists(decisao.caminho)
+
+
+def test_arquivo_grande_vira_link_unico_por_conteudo(tmp_path):
+    primeiro = tmp_path / 'a' / 'video.bin'
+    segundo = tmp_path / 'b' / 'video.bin'
+    for caminho in (primeiro, segundo):
+        caminho.parent.mkdir()
+        caminho.write_bytes(b'v' * 2048)
+    pasta_links = tmp_path / 'links'
+    politica = PoliticaAnexos(limite_link_bytes=1024, pasta_links=str(pasta_links),
+                              url_links='http://servidor:8000/')
+    decisoes = [politica.decidir(str(primeiro)), politica.decidir(str(segundo))]
+    assert decisoes[0].link == decisoes[1].link
+    assert decisoes[0].link.startswith('http://servidor:8000/') and decisoes[0].link.endswith('/video.bin')
+    assert len(list(pasta_links.iterdir())) == 1
+    assert politica.links == 2
+    assert 'video.bin (0.0 MB): http://servidor:8000/' in texto_links(decisoes[:1])
+
+
+def test_usa_o_tamanho_da_verificacao(tmp_path):
+    arquivo = tmp_path / 'nota.pdf'
+    arquivo.write_bytes(b'%PDF')
+    politica = PoliticaAnexos(limite_link_bytes=1024, pasta_links=str(tmp_path / 'links'))
+    politica.estados[os.path.abspath(arquivo)] = (4096, 7)
+    decisao = politica.decidir(str(arquivo))
+    assert (decisao.tamanho, decisao.mtime) == (4096, 7) and decisao.link.startswith('file://')
@@ -0,0 +1,88 @@
+import configparser
+import socket
+
+import pytest
+
+from contatos import ListaDestinatarios
+from limitador import LimitadorTaxa
+from motor_envio import criar_motor
+from relays import Relay, distribuir_conexoes, ler_relays
+from servidor_smtp import ServidorSMTPFalso
+
+
+def relay(nome, peso=1.0, conexoes=0, porta=25, cota=0):
+    return Relay(nome, '127.0.0.1', porta, 'usuario', 'senha', peso=peso, conexoes=conexoes, cota=cota,
+                 limitador=LimitadorTaxa(por_segundo=100000, rajada=100000))
+
+
+def test_distribuir_pelo_maior_resto_soma_o_total():
+    a, b, c = relay('a', 1), relay('b', 1), relay('c', 1)
+    distribuicao = distribuir_conexoes([a, b, c], 8)
+    assert sum(n for _, n in distribuicao) == 8
+    assert sorted(n for _, n in distribuicao) == [2, 3, 3]
+
+    pesado, leve = relay('pesado', 3), relay('leve', 1)
+    assert distribuir_conexoes([pesado, leve], 7) == [(pesado, 5), (leve, 2)]
+
+
+def test_distribuir_respeita_fixas_e_ignora_peso_zero():
+    fixo, pesado, zero = relay('fixo', conexoes=2), relay('pesado', 2), relay('zero', 0)
+    assert distribuir_conexoes([fixo, pesado, zero], 5) == [(fixo, 2), (pesado, 3)]
+    # Relay com parte menor que uma conexão fica de fora em vez de passar do total
+    grande, pequeno = relay('grande', 10), relay('pequeno', 1)
+    assert distribuir_conexoes([grande, pequeno], 2) == [(grande, 2)]
+    # Sem nenhum peso, a divisão é igual
+    x, y = relay('x', 0), relay('y', 0)
+    assert distribuir_conexoes([x, y], 4) == [(x, 2), (y, 2)]
+
+
+def test_cota_e_falhas():
+    conta = relay('conta', cota=3)
+    assert conta.reservar(2)
+    assert not conta.reservar(2) and not conta.disponivel
+    conta.devolver(1)
+    assert conta.enviados == 1
+
+    outra = relay('outra')
+    assert [outra.registrar_falha() for _ in range(3)] == [1, 2, 3]
+    outra.registrar_sucesso()
+    assert outra.registrar_falha() == 1
+    assert outra.desativar("caiu") and not outra.desativar("de novo")
+    assert outra.motivo == "caiu"
+
+
+def test_ler_relays_com_senha_do_ambiente(monkeypatch):
+    monkeypatch.setenv('SENHA_RESERVA', 'segredo')
+    config = configparser.ConfigParser()
+    config.read_string("[relay:reserva]\nservidor_smtp = smtp.outro.com\nsenha_env = SENHA_RESERVA\npeso = 2\n"
+                       "[relay:vazio]\nusuario = x\n")
+    with pytest.raises(ValueError, match=r"\[relay:vazio\]"):
+        ler_relays(config)
+    config.remove_section('relay:vazio')
+    reserva, = ler_relays(config)
+    assert (reserva.nome, reserva.servidor, reserva.porta, reserva.senha, reserva.peso) == \
+        ('reserva', 'smtp.outro.com', 587, 'segredo', 2.0)
+
+
+def test_relay_que_nao_conecta_sai_do_rodizio(tmp_path):
+    servidor = ServidorSMTPFalso()
+    servidor.iniciar()
+    with socket.socket() as livre:
+        livre.bind(('127.0.0.1', 0))
+        porta_fechada = livre.getsockname()[1]
+    lista = ListaDestinatarios()
+    for i in range(6):
+        lista.adicionar(f"P{i}", f"p{i}@x{i % 2}.com")
+    reserva = relay('reserva', porta=porta_fechada)
+    log = []
+    try:
+        envio = criar_motor(
+            lista.congelar(), '127.0.0.1', servidor.porta, 'r@exemplo', 'senha', 'Assunto', 'Corpo',
+            conexoes=4, diario='', relatorio_metricas='', seguranca='nenhuma', relays=[reserva],
+            limitador=LimitadorTaxa(por_segundo=100000, rajada=100000), ao_log=log.append,
+        )
+        assert envio.executar(), "\n".join(log)
+    finally:
+        servidor.parar()
+    assert servidor.mensagens == 6
+    assert not reserva.disponivel and reserva.enviados == 0
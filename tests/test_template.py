@@ -0,0 +1,27 @@
+import pytest
+
+from template import TemplateCompilado, valores_destinatario
+
+
+def test_renderiza_campos_e_preserva_porcentagem_literal():
+    template = TemplateCompilado("Olá %(nome)s, 50% de desconto até %(data)s")
+    assert template.renderizar({'nome': 'Ana', 'data': '10/10'}) == "Olá Ana, 50% de desconto até 10/10"
+
+
+def test_campos_em_ordem_sem_repeticao():
+    template = TemplateCompilado("%(b)s %(a)s %(b)s")
+    assert template.campos == ('b', 'a')
+    assert template.campos_ausentes({'a'}) == ['b']
+
+
+def test_template_compilado_e_somente_leitura():
+    template = TemplateCompilado("%(nome)s")
+    with pytest.raises(AttributeError):
+        template.texto = "outro"
+    assert TemplateCompilado.de(template) is template
+    assert TemplateCompilado.de("%(nome)s").campos == ('nome',)
+
+
+def test_valores_destinatario_inclui_colunas_extras():
+    valores = valores_destinatario({'nome': 'Ana', 'email': 'ana@x.com', 'campos': {'empresa': 'ACME'}})
+    assert valores == {'nome': 'Ana', 'email': 'ana@x.com', 'empresa': 'ACME'}
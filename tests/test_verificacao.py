@@ -0,0 +1,42 @@
+import os
+
+from limitador import LimitadorTaxa
+from verificacao import BYTES_BASE_MENSAGEM, inspecionar_arquivo, verificar_envio
+
+
+def test_tipo_pelos_primeiros_bytes(tmp_path):
+    pdf = tmp_path / 'sem_extensao'
+    pdf.write_bytes(b'%PDF-1.7\n...')
+    assert inspecionar_arquivo(str(pdf)).tipo == 'application/pdf'
+    texto = tmp_path / 'notas.txt'
+    texto.write_text('olá')
+    assert inspecionar_arquivo(str(texto)).tipo == 'text/plain'
+    assert inspecionar_arquivo(str(tmp_path / 'nao_existe.pdf')).erro == "não encontrado"
+
+
+def test_relatorio_de_anexos_e_destinatarios(tmp_path):
+    anexo = tmp_path / 'nota.pdf'
+    anexo.write_bytes(b'%PDF-' + b'x' * 295)
+    ausente = str(tmp_path / 'ausente.pdf')
+    destinatarios = [
+        {'email': 'ana@x.com', 'arquivos': [str(anexo)]},
+        {'email': 'bia@x.com', 'arquivos': [str(anexo), ausente]},
+        {'email': 'invalido', 'arquivos': []},
+        {'email': 'Caio@X.com'},
+    ]
+    relatorio = verificar_envio(destinatarios, LimitadorTaxa(por_segundo=2), suprimidos={'caio@x.com'})
+
+    assert not relatorio.ok
+    assert relatorio.destinatarios == 4
+    assert relatorio.invalidos == ['invalido'] and relatorio.suprimidos == 1
+    assert [info.caminho for info in relatorio.problemas] == [ausente] and relatorio.afetados == 1
+    # O anexo é inspecionado uma vez e conta em base64 para cada destinatário
+    assert relatorio.bytes_estimados == 4 * BYTES_BASE_MENSAGEM + 2 * (300 * 4 // 3)
+    assert relatorio.estados() == {os.path.abspath(anexo): (300, anexo.stat().st_mtime_ns)}
+    assert relatorio.segundos_estimados == 2.0
+    assert any('1 e-mail(s) inválido(s): invalido' in linha for linha in relatorio.linhas())
+
+
+def test_sem_limite_nao_estima_duracao():
+    relatorio = verificar_envio([{'email': 'ana@x.com'}])
+    assert relatorio.ok and relatorio.segundos_estimados is None